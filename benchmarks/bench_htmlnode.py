@@ -0,0 +1,77 @@
+# bench_htmlnode.py
+#
+# Times HTMLNode serialization on an attribute-heavy page, comparing the
+# shared escaping serializer with the string concatenation it replaced.
+#
+#   python3 benchmarks/bench_htmlnode.py [--rows N] [--repeat N]
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from htmlnode import LeafNode, ParentNode, attributes_to_html, escape_text
+
+
+def legacy_props_to_html(props):
+    # The serializer HTMLNode.props_to_html used to have: no escaping, += in a loop
+    final = ""
+    for key, values in props.items():
+        final += f'{key}="{values}" '
+    return f" {final.strip()}" if final else ""
+
+
+def build_page(rows, escaped_share=10):
+    """
+    A table-like page where every row has a handful of attributes, one row in
+    escaped_share of them holding characters that need escaping.
+    """
+    children = []
+    for i in range(rows):
+        title = f'Row "{i}" & more' if i % escaped_share == 0 else f"Row {i}"
+        link = LeafNode(value=f"Item {i}", tag="a", props={
+            "href": f"/docs/section-{i // 100}/item-{i}.html",
+            "class": "item-link internal",
+            "title": title,
+            "data-index": i,
+            "rel": "noopener",
+        })
+        children.append(ParentNode(children=[link], tag="div", props={"class": "row", "id": f"row-{i}"}))
+    return ParentNode(children=children, tag="section", props={"class": "listing"})
+
+
+def collect_props(node, result):
+    if node.props:
+        result.append(node.props)
+    for child in node.children or []:
+        if not isinstance(child, str):
+            collect_props(child, result)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    page = build_page(args.rows)
+    props = collect_props(page, [])
+    texts = [f"Item {i} costs < {i} & more" if i % 10 == 0 else f"Item {i}" for i in range(args.rows)]
+
+    timings = {
+        "legacy props serializer": lambda: [legacy_props_to_html(p) for p in props],
+        "attributes_to_html": lambda: [attributes_to_html(p) for p in props],
+        "escape_text": lambda: [escape_text(t) for t in texts],
+        "to_html (whole page)": page.to_html,
+    }
+
+    print(f"{args.rows} rows, {len(props)} attribute sets, best of {args.repeat}")
+    for name, func in timings.items():
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"  {name:<26} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# bench_node_cache.py
+#
+# Times loading a page's cached parse tree against parsing its markdown again,
+# which is what a template-only change used to cost for every page.
+#
+#   python3 benchmarks/bench_node_cache.py [--sections N] [--repeat N]
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from node_cache import dump_nodes, load_nodes
+from render_context import RenderContext
+from utils import markdown_to_html_node
+
+
+SECTION = """## Section {i}
+
+Some **bold** text, some _italic_ text and `inline code`, with a [link](/docs/page-{i}.html)
+and an ![image](/images/figure-{i}.png) in a paragraph that goes on for a while.
+
+- First item with a [link](https://example.com/{i})
+- Second item
+  1. Nested ordered item
+  2. Another one
+
+> A quote with **emphasis**
+> over two lines
+
+```python
+def section_{i}(x):
+    return x * {i}  # comment
+```
+"""
+
+
+def build_markdown(sections):
+    return "# Benchmark page\n\n" + "\n".join(SECTION.format(i=i) for i in range(sections))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sections", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    markdown = build_markdown(args.sections)
+    node = markdown_to_html_node(markdown, RenderContext())
+    data = dump_nodes(node)
+    assert load_nodes(data).to_html() == node.to_html()
+
+    timings = {
+        "parse markdown": lambda: markdown_to_html_node(markdown, RenderContext()),
+        "load cached tree": lambda: load_nodes(data),
+        "dump tree": lambda: dump_nodes(node),
+        "to_html": node.to_html,
+    }
+
+    print(f"{len(markdown)} characters of markdown, {len(data)} bytes serialized, best of {args.repeat}")
+    results = {}
+    for name, func in timings.items():
+        results[name] = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"  {name:<20} {results[name] * 1000:8.2f} ms")
+    print(f"  loading is {results['parse markdown'] / results['load cached tree']:.1f}x faster than parsing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# bench_tables.py
+#
+# Times parsing and rendering a reference page holding one large table, at
+# two sizes, to check the cost per row stays the same as the table grows.
+#
+#   python3 benchmarks/bench_tables.py [--rows N] [--columns N] [--repeat N]
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from block_parser import parse_blocks
+from render_context import RenderContext
+from utils import markdown_to_html_node
+
+
+def build_markdown(rows, columns):
+    header = "| " + " | ".join(f"Column {c}" for c in range(columns)) + " |"
+    delimiter = "|" + "|".join((":--", ":-:", "--:", "---")[c % 4] for c in range(columns)) + "|"
+    lines = ["# Reference", "", header, delimiter]
+    for r in range(rows):
+        cells = [f"`value_{r}`", f"[entry {r}](/ref/{r}.html)", f"**{r}**", f"text with a pipe \\| in {r}[^n]"]
+        lines.append("| " + " | ".join(cells[c % 4] for c in range(columns)) + " |")
+    lines += ["", "[^n]: A footnote referenced from every row."]
+    return "\n".join(lines)
+
+
+def time_page(markdown, repeat):
+    parse = min(timeit.repeat(lambda: parse_blocks(markdown), number=1, repeat=repeat))
+    render = min(timeit.repeat(lambda: markdown_to_html_node(markdown, RenderContext()).to_html(), number=1, repeat=repeat))
+    return parse, render
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.columns} columns, best of {args.repeat}")
+    per_row = []
+    for rows in (args.rows // 4, args.rows):
+        markdown = build_markdown(rows, args.columns)
+        parse, render = time_page(markdown, args.repeat)
+        per_row.append(render / rows)
+        print(f"  {rows:>7} rows ({len(markdown)} characters): parse {parse * 1000:8.2f} ms, "
+              f"parse and render {render * 1000:8.2f} ms, {render / rows * 1e6:6.2f} us per row")
+
+    print(f"  cost per row grows {per_row[1] / per_row[0]:.2f}x for 4x the rows (1.00x is linear)")
+
+
+if __name__ == "__main__":
+    main()
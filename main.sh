@@ -5,9 +5,9 @@ python3 src/main.py
 
 # Ensure the public directory exists
 if [ -d "public" ]; then
-    # Change to the public directory and start the HTTP server
-    cd public
-    python3 -m http.server 8888
+    # Serve the public directory, without changing into it: a staged build
+    # replaces it, and the server has to follow it to the new files
+    python3 -m http.server 8888 --directory public
 else
     echo "Error: public directory not found!"
 fi
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+
+# Bump when block_to_html_node changes its output, or what is cached with it,
+# so cached fragments from older builds aren't reused
+RENDER_VERSION = 5
+
+# Attributes of a Block that say where it is, not what it renders to. A list
+# item's list is its parent, which is already part of the text.
+_POSITION_ATTRIBUTES = {"line", "last_line_blank", "children", "lines", "list"}
+
+
+def block_text(block):
+    """
+    Returns a normalized text of a block and everything nested in it: its kind,
+    attributes and lines, without the line numbers, so the same block gets the
+    same text wherever it appears.
+    """
+    attributes = sorted((key, value) for key, value in vars(block).items() if key not in _POSITION_ATTRIBUTES)
+    parts = [block.kind, repr(attributes)]
+    parts.extend(block.lines)
+    parts.extend(f"[{block_text(child)}]" for child in block.children)
+    return "\n".join(parts)
+
+
+def block_key(block):
+    """
+    Returns the cache key of a block: a hash of its normalized text.
+    """
+    text = f"{RENDER_VERSION}\n{block_text(block)}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class BlockCache:
+    """
+    Memoizes the HTML fragments rendered for top-level blocks.
+
+    Each entry holds the fragment, the (line offset, url, kind) links found
+    in it, the [level, id, text, slug] of its headings and how many times
+    each inline rule matched in it. Up to max_entries of them are kept in memory, least recently used
+    first out, and, if a cache_dir is given, every entry is also stored on
+    disk so other worker processes and later builds reuse it.
+    """
+    def __init__(self, cache_dir=None, max_entries=1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key):
+        """
+        Returns the (html, links, headings, inline_matches) entry for a key, or None on a miss.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, html, links, headings=(), inline_matches=None):
+        entry = (html, links, [list(heading) for heading in headings], dict(inline_matches or {}))
+        self._remember(key, entry)
+        self._store(key, entry)
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key):
+        # Spread the entries over subdirectories, a large site has many of them
+        return os.path.join(self.cache_dir, key[:2], f"{key[2:]}.json")
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return data["html"], [tuple(link) for link in data["links"]], data["headings"], data["inline_matches"]
+
+    def _store(self, key, entry):
+        if not self.cache_dir:
+            return
+
+        html, links, headings, inline_matches = entry
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so another process never reads a partial entry
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"html": html, "links": links, "headings": headings, "inline_matches": inline_matches}, f)
+        os.replace(temp_path, path)
+
+
+_block_caches = {}
+
+
+def get_block_cache(cache_dir=None, fingerprint=None):
+    """
+    Returns the BlockCache of this process for a cache directory, so every
+    page a worker process renders shares the same in-memory entries.
+
+    Blocks render differently under other plugins and routes (see
+    links.Routes), so each fingerprint of what they render to gets a cache of
+    its own, in memory and in a subdirectory of cache_dir.
+    """
+    key = (cache_dir, fingerprint)
+    if key not in _block_caches:
+        _block_caches[key] = BlockCache(os.path.join(cache_dir, fingerprint) if cache_dir and fingerprint else cache_dir)
+    return _block_caches[key]
@@ -0,0 +1,385 @@
+import re
+
+
+QUOTE_MARKER = re.compile(r' {0,3}> ?')
+LIST_MARKER = re.compile(r'( {0,3})([*+-]|(\d{1,9})[.)])(?=[ \t]|$)( *)')
+FENCE = re.compile(r'( {0,3})(`{3,}|~{3,})[ \t]*([^`\s]*)[^`]*$')
+HEADING = re.compile(r' {0,3}(#{1,6})[ \t]+(.+)$')
+INCLUDE = re.compile(r' {0,3}\{\{>[ \t]*(\S+?)[ \t]*\}\}[ \t]*$')
+SPACES = re.compile(r' *')
+FOOTNOTE = re.compile(r' {0,3}\[\^([^\]\s]+)\]:[ \t]?')
+TABLE_PIPE = re.compile(r'(?<!\\)\|')  # Cell separators, \| is a pipe inside a cell
+DELIMITER_CELL = re.compile(r'(:?)-+(:?)$')
+
+# Containers nested deeper than this aren't opened, their markers are kept as text.
+# Rendering recurses once per level, and no real document gets anywhere near it.
+MAX_NESTING = 100
+
+CONTAINERS = ('document', 'quote block', 'unordered list', 'ordered list', 'list item', 'footnote')
+
+# Footnote definitions are indented like this to continue
+FOOTNOTE_INDENT = 4
+
+
+class Block:
+    """
+    A node of the block tree built by parse_blocks.
+
+    kind is one of the block_to_block_type categories ('heading', 'paragraph',
+    'code block', 'quote block', 'unordered list', 'ordered list'), or
+    'list item' / 'table' / 'footnote' / 'document' / 'include'. line is the
+    1-based source line the block starts on.
+    """
+    def __init__(self, kind, line, **attributes):
+        self.kind = kind
+        self.line = line
+        self.children = []
+        self.lines = []
+        self.last_line_blank = False
+
+        # Kind-specific data: level (heading), language/fence/indent (code block),
+        # marker/start/loose (lists), marker_indent/content_indent (list item, footnote), path (include),
+        # alignments/header/rows (table), label (footnote), footnotes (document: label -> footnote)
+        self.__dict__.update(attributes)
+
+    def __repr__(self):
+        return f"Block({self.kind!r}, line={self.line}, children={self.children!r}, lines={self.lines!r})"
+
+
+def _expand_indent(line):
+    # Only leading tabs matter for the block structure, code keeps the rest as is
+    stripped = line.lstrip(' \t')
+    return line[:len(line) - len(stripped)].expandtabs(4) + stripped
+
+
+def _heading_text(text):
+    """
+    Strips the trailing whitespace and optional closing #s off a heading's text.
+
+    This is done here rather than in HEADING, where a lazy match followed by
+    optional trailing groups backtracks quadratically on long runs of spaces.
+    """
+    text = text.rstrip(' \t')
+    without_closing = text.rstrip('#')
+    if without_closing != text and without_closing[-1:] in (' ', '\t'):
+        without_closing = without_closing.rstrip(' \t')
+        # The text can't be empty, a heading that is only #s keeps them
+        if without_closing:
+            return without_closing
+    return text
+
+
+def _interrupts_paragraph(text, in_list=False):
+    """
+    Checks whether a line starts a new block instead of continuing a paragraph.
+    """
+    if QUOTE_MARKER.match(text) or HEADING.match(text) or FENCE.match(text):
+        return True
+
+    # Inside a list any item interrupts a paragraph, elsewhere only
+    # non-empty items, and ordered lists starting at 1, do
+    marker = LIST_MARKER.match(text)
+    if marker and in_list:
+        return True
+    if marker and text[marker.end():].strip():
+        return marker.group(3) is None or int(marker.group(3)) == 1
+
+    return False
+
+
+def parse_blocks(markdown):
+    """
+    Parses markdown into a tree of Blocks in a single pass over its lines.
+
+    Open container blocks (block quotes, lists and list items) are kept on a
+    stack. Each line first continues as many of them as it can, then opens any
+    new containers, and what is left of it goes into a leaf block (heading,
+    paragraph or fenced code). Blank lines don't split the document up front,
+    so fenced code can contain them.
+
+    Returns:
+        Block: The 'document' block.
+    """
+    document = Block('document', 1, footnotes={})
+    document.children = list(iter_blocks(markdown.splitlines(), document))
+    return document
+
+
+def iter_blocks(lines, document):
+    """
+    Parses the lines of a document (without their line endings) like
+    parse_blocks, and yields each top-level block as soon as it is complete,
+    without keeping it in the document. Lines are read as the blocks are
+    consumed, so a document can be parsed straight from a file.
+
+    A top-level block is complete once the next one starts: later lines only
+    ever change the last block of the document. Footnote definitions are
+    still collected in document.footnotes.
+    """
+    stack = [document]  # Open containers, innermost last
+    leaf = None  # Open paragraph or fenced code block of the innermost container
+    children = document.children
+
+    for number, raw_line in enumerate(lines, 1):
+        # Every top-level block but the last is complete
+        if len(children) > 1:
+            complete = children[:-1]
+            del children[:-1]
+            yield from complete
+
+        line = _expand_indent(raw_line)
+        position = 0
+
+        # Step 1: Find how many of the open containers this line continues.
+        # The line is matched in place: copying what is left of it for every
+        # container would make deeply nested lines quadratic.
+        matched = 1
+        content_end = len(line.rstrip())
+        spaces_end = 0  # End of the run of spaces at position
+        for container in stack[1:]:
+            if container.kind == 'quote block':
+                marker = QUOTE_MARKER.match(line, position)
+                if not marker:
+                    break
+                position = marker.end()
+
+            elif container.kind in ('list item', 'footnote') and position < content_end:
+                if spaces_end <= position:
+                    spaces_end = SPACES.match(line, position).end()
+                indent = spaces_end - position
+                if indent >= container.content_indent:
+                    position += container.content_indent
+                elif indent > container.marker_indent and LIST_MARKER.match(line, spaces_end):
+                    # Be lenient with nested lists indented less than the item's content
+                    position += indent
+                else:
+                    break
+
+            # Lists continue as long as one of their items does, and blank lines continue items
+            matched += 1
+
+        rest = line[position:]
+
+        # Step 2: Lines inside a fenced code block go to it verbatim
+        if leaf is not None and leaf.kind == 'code block' and matched == len(stack):
+            closing = rest.strip()
+            indent = len(rest) - len(rest.lstrip(' '))
+            if indent <= 3 and len(closing) >= len(leaf.fence) and closing == leaf.fence[0] * len(closing):
+                leaf = None
+            else:
+                leaf.lines.append(rest[min(indent, leaf.indent):])
+            continue
+
+        # Step 3: A delimiter row under a paragraph turns its last line into the
+        # header of a table, and the lines after it are rows until a blank line
+        # or the start of another block
+        if leaf is not None and leaf.kind == 'paragraph' and matched == len(stack):
+            table = _start_table(leaf.lines[-1], rest, number - 1)
+            if table is not None:
+                leaf.lines.pop()
+                if not leaf.lines:
+                    stack[-1].children.pop()
+                leaf = table
+                _add_block(stack, table)
+                continue
+
+        if (leaf is not None and leaf.kind == 'table' and matched == len(stack) and rest.strip()
+                and not _interrupts_paragraph(rest, stack[-1].kind == 'list item') and not _starts_top_level_block(rest, matched, stack)):
+            leaf.rows.append(_table_row(rest, len(leaf.alignments)))
+            continue
+
+        # Step 4: Paragraph continuation, including lazy continuation lines
+        # that skipped the markers of the containers the paragraph is in
+        if (leaf is not None and leaf.kind == 'paragraph' and rest.strip() and not _interrupts_paragraph(rest, stack[-1].kind == 'list item')
+                and not _starts_top_level_block(rest, matched, stack)):
+            leaf.lines.append(rest)
+            for container in stack[:matched]:
+                container.last_line_blank = False
+            continue
+
+        # Step 5: Close whatever this line didn't continue
+        if matched < len(stack):
+            del stack[matched:]
+            leaf = None
+
+        # Step 6: Open new containers. Footnote definitions are only recognized
+        # at the top level, the footnotes of a page are all listed at its end.
+        while len(stack) <= MAX_NESTING:
+            quote = QUOTE_MARKER.match(rest)
+            marker = None if quote else LIST_MARKER.match(rest)
+            footnote = FOOTNOTE.match(rest) if not (quote or marker) else None
+            if footnote and not _is_top_level(stack, len(stack)):
+                footnote = None
+
+            if footnote:
+                leaf = None
+                label = footnote.group(1)
+                block = Block('footnote', number, label=label, marker_indent=0, content_indent=FOOTNOTE_INDENT)
+                document.footnotes.setdefault(label.lower(), block)
+                _add_block(stack, block)
+                rest = rest[footnote.end():]
+                continue
+
+            if quote:
+                leaf = None
+                _add_block(stack, Block('quote block', number))
+                rest = rest[quote.end():]
+                continue
+
+            if marker:
+                leaf = None
+                _open_list_item(stack, marker, rest, number)
+                rest = rest[stack[-1].content_indent:] if rest[marker.end():].strip() else ""
+                continue
+
+            break
+
+        # Step 7: Whatever is left of the line is a blank line or goes into a leaf block
+        if not rest.strip():
+            leaf = None
+            for container in stack:
+                container.last_line_blank = True
+            continue
+
+        heading = HEADING.match(rest)
+        fence = FENCE.match(rest)
+        # Includes are only recognized at the top level, where they replace a whole block
+        include = INCLUDE.match(rest)
+        if include and not _is_top_level(stack, len(stack)):
+            include = None
+
+        if include:
+            leaf = None
+            _add_block(stack, Block('include', number, path=include.group(1)))
+        elif heading:
+            leaf = None
+            _add_block(stack, Block('heading', number, level=len(heading.group(1)), lines=[_heading_text(heading.group(2))]))
+        elif fence:
+            leaf = Block('code block', number, fence=fence.group(2), language=fence.group(3), indent=len(fence.group(1)))
+            _add_block(stack, leaf)
+        else:
+            leaf = Block('paragraph', number)
+            leaf.lines.append(rest)
+            _add_block(stack, leaf)
+
+        for container in stack:
+            container.last_line_blank = False
+
+    document.children = []
+    yield from children
+
+
+def _starts_top_level_block(text, matched, stack):
+    """
+    Checks whether a line is an include or a footnote definition, which are
+    only recognized at the top level and end the paragraph or table before them.
+    """
+    # A line that continued no container is at the top level, even if it would
+    # otherwise be a lazy continuation line of a paragraph in a footnote
+    if INCLUDE.match(text):
+        return _is_top_level(stack, len(stack))
+    return FOOTNOTE.match(text) is not None and _is_top_level(stack, matched)
+
+
+def _is_top_level(stack, depth):
+    """
+    Checks whether a line inside the first depth open containers is at the top
+    level. A list stays open after its last item has been closed, for another
+    item to join it, but doesn't hold anything else.
+    """
+    return depth == 1 or (depth == 2 and stack[1].kind in ('unordered list', 'ordered list'))
+
+
+def _split_row(line):
+    """
+    Splits a table row into its cells, with the outer pipes optional.
+    """
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in TABLE_PIPE.split(line)]
+
+
+def _table_row(line, columns):
+    # Rows have as many cells as the header, missing ones are empty and extra ones dropped
+    cells = _split_row(line)
+    if len(cells) < columns:
+        cells.extend([""] * (columns - len(cells)))
+    return cells[:columns]
+
+
+def _start_table(header, delimiter, line):
+    """
+    Returns a 'table' Block if delimiter is a delimiter row (| --- | :-: |)
+    with as many cells as the header row, otherwise None.
+    """
+    # Most lines have other characters and are rejected right away
+    if "|" not in delimiter or "-" not in delimiter or delimiter.strip(" \t|:-"):
+        return None
+
+    alignments = []
+    for cell in _split_row(delimiter):
+        match = DELIMITER_CELL.match(cell)
+        if match is None:
+            return None
+        left, right = match.groups()
+        alignments.append('center' if left and right else 'left' if left else 'right' if right else None)
+
+    header_cells = _split_row(header)
+    if len(header_cells) != len(alignments):
+        return None
+
+    return Block('table', line, alignments=alignments, header=header_cells, rows=[])
+
+
+def _add_block(stack, block):
+    """
+    Appends a block to the innermost open container, opening it if it is a container.
+    """
+    # A list only holds list items, anything else ends it
+    if stack[-1].kind in ('unordered list', 'ordered list'):
+        stack.pop()
+
+    parent = stack[-1]
+
+    # Content following a blank line inside a list item makes the list loose
+    if parent.kind == 'list item' and parent.last_line_blank and parent.children:
+        parent.list.loose = True
+
+    parent.children.append(block)
+    if block.kind in CONTAINERS:
+        stack.append(block)
+
+
+def _open_list_item(stack, marker, rest, number):
+    """
+    Opens a list item for a line starting with a list marker, reusing the open
+    list if it has the same kind of marker.
+    """
+    marker_indent = len(marker.group(1))
+    bullet = marker.group(2)
+    ordered = marker.group(3) is not None
+    marker_type = bullet[-1]  # '*', '-', '+', '.' or ')'
+
+    # Content starts after the marker and 1-4 spaces; more than that belongs to the content
+    spaces = len(marker.group(4))
+    if spaces > 4 or not rest[marker.end():].strip():
+        spaces = 1
+    content_indent = marker_indent + len(bullet) + spaces
+
+    current = stack[-1]
+    if current.kind in ('unordered list', 'ordered list') and current.marker == marker_type:
+        if current.last_line_blank:
+            current.loose = True
+        list_block = current
+    else:
+        kind = 'ordered list' if ordered else 'unordered list'
+        list_block = Block(kind, number, marker=marker_type, start=int(marker.group(3)) if ordered else None, loose=False)
+        _add_block(stack, list_block)
+
+    item = Block('list item', number, list=list_block, marker_indent=marker_indent, content_indent=content_indent)
+    list_block.children.append(item)
+    list_block.last_line_blank = False
+    stack.append(item)
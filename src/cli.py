@@ -0,0 +1,175 @@
+# cli.py
+#
+# Kept free of heavy imports: the build pipeline is only imported once the
+# arguments have been parsed, so --help and argument errors return at once.
+import argparse
+import sys
+from config import STAGES, ConfigError, load_config
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="ssg",
+        description="Generate a static site from a directory of markdown files.",
+    )
+    parser.add_argument("-c", "--config", help="config file (default: ssg.toml or ssg.json in the root, if present)")
+    parser.add_argument("-p", "--profile", help="build profile, e.g. dev or production")
+    parser.add_argument("--root", help="directory relative paths are resolved against")
+    parser.add_argument("--content", dest="content_dir", help="directory holding the markdown files")
+    parser.add_argument("--static", dest="static_dir", help="directory copied as is to the output")
+    parser.add_argument("--template", help="HTML template for pages without a layout")
+    parser.add_argument("--partials", dest="partials_dir", help="directory the {{> path }} includes are read from")
+    parser.add_argument("--layouts", dest="layouts_dir", help="directory of the per-section layouts")
+    parser.add_argument("-o", "--output", dest="output_dir", help="directory the site is written to")
+    parser.add_argument("--cache-dir", help="directory for caches kept between builds")
+    parser.add_argument("--report-dir", help="directory the costs stage writes the per-page cost report to")
+    parser.add_argument("-j", "--workers", type=int, help="number of worker processes")
+    parser.add_argument("--memory-budget", type=int, metavar="MB", help="memory the whole build may use, in MB")
+    parser.add_argument("--plugin", action="append", dest="plugins", metavar="PLUGIN",
+                        help="render with a plugin, a module name or .py file (replaces the configured ones); can be repeated")
+    parser.add_argument("--site-url", help="URL the site is served at, for the sitemap and feed")
+    parser.add_argument("--base-url", help="path the site is served under, e.g. /docs/, which internal links are rewritten for")
+    parser.add_argument("--enable", action="append", default=[], choices=STAGES, metavar="STAGE",
+                        help=f"run an optional stage ({', '.join(STAGES)}); can be repeated")
+    parser.add_argument("--disable", action="append", default=[], choices=STAGES, metavar="STAGE",
+                        help="skip an optional stage; can be repeated")
+    parser.add_argument("--strict", action="store_true", help="exit with an error if broken links are found")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="log every file processed")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings and errors")
+    parser.add_argument("--daemon", metavar="SOCKET",
+                        help="build, then keep running and rebuild on request over this Unix socket")
+    parser.add_argument("--rebuild", metavar="SOCKET",
+                        help="ask the daemon on this Unix socket to rebuild for PATHS (default: everything)")
+    parser.add_argument("paths", nargs="*", metavar="PATHS", help="with --rebuild, the files that changed")
+    parser.add_argument("--log-format", choices=("text", "json", "progress"), default="text",
+                        help="text lines, JSON lines, or a progress bar with a summary")
+    return parser
+
+
+def config_from_args(args, default_root=None):
+    """
+    Builds the BuildConfig for parsed command line arguments.
+    """
+    return load_config(
+        path=args.config,
+        root=args.root or (None if args.config else default_root),
+        profile=args.profile,
+        enable=args.enable,
+        disable=args.disable,
+        content_dir=args.content_dir,
+        static_dir=args.static_dir,
+        template=args.template,
+        partials_dir=args.partials_dir,
+        layouts_dir=args.layouts_dir,
+        output_dir=args.output_dir,
+        cache_dir=args.cache_dir,
+        report_dir=args.report_dir,
+        workers=args.workers,
+        memory_budget=args.memory_budget,
+        plugins=args.plugins,
+        site_url=args.site_url,
+        base_url=args.base_url,
+    )
+
+
+def main(argv=None, default_root=None):
+    """
+    Runs a build from the command line.
+
+    Args:
+        argv (list): The arguments, defaults to sys.argv[1:].
+        default_root (str): Root used when neither --root nor --config is given.
+
+    Returns:
+        int: The exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.paths and not args.rebuild:
+        parser.error("PATHS are only accepted with --rebuild")
+    if args.rebuild:
+        return request_rebuild(args.rebuild, args.paths)
+
+    try:
+        config = config_from_args(args, default_root)
+    except ConfigError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    import logging
+    from log import logger, setup_logging
+    from main import build
+    from plugins import PluginError
+
+    level = logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO
+
+    if args.daemon:
+        from daemon import BuildDaemon
+
+        with setup_logging(level, args.log_format):
+            try:
+                BuildDaemon(config, args.daemon).serve()
+            except KeyboardInterrupt:
+                pass
+        return 0
+
+    with setup_logging(level, args.log_format):
+        try:
+            report = build(config)
+        except PluginError as e:
+            logger.error("%s", e, extra={"event": "plugin_error"})
+            return 2
+        logger.info("Built %d pages and copied %d static files to %s in %.2fs",
+                    report["pages"], report["static_files"], config.output_dir, report["duration"],
+                    extra={"event": "build", "pages": report["pages"], "static_files": report["static_files"],
+                           "duration": report["duration"]})
+
+        block_cache = report["block_cache"]
+        logger.info("Block cache: %d hits, %d misses (%.0f%% hit rate)",
+                    block_cache["hits"], block_cache["misses"], 100 * block_cache["hit_rate"],
+                    extra={"event": "block_cache", **block_cache})
+        logger.info("Parse tree cache: %d pages reused, %d parsed",
+                    report["node_cache"]["hits"], report["node_cache"]["misses"],
+                    extra={"event": "node_cache", **report["node_cache"]})
+
+        memory = report["memory"]
+        if memory["throttled"]:
+            logger.info("Waited for memory %d times, peak estimate %.0f MB in flight",
+                        memory["throttled"], memory["peak_in_flight"] / 1024 / 1024,
+                        extra={"event": "memory", **memory})
+
+        for name, seconds in report["plugins"].items():
+            logger.info("Plugin %s: %.3fs", name, seconds, extra={"event": "plugin", "plugin": name, "seconds": seconds})
+
+        if report["broken_links"]:
+            logger.warning("Found %d broken links", len(report["broken_links"]),
+                           extra={"event": "broken_links", "count": len(report["broken_links"])})
+
+    return 1 if report["broken_links"] and args.strict else 0
+
+
+def request_rebuild(socket_path, paths):
+    """
+    Asks a running daemon to rebuild and prints how long it took.
+    """
+    from daemon import request_rebuild as send_rebuild
+
+    try:
+        response = send_rebuild(socket_path, paths or None)
+    except OSError as e:
+        print(f"Error: can't reach the daemon on {socket_path}: {e}", file=sys.stderr)
+        return 2
+
+    if not response["ok"]:
+        print(f"Error: {response['error']}", file=sys.stderr)
+        return 1
+
+    kind = "full build" if response["full"] else "rebuild"
+    print(f"{kind} of {response['pages']} pages in {response['latency']:.3f}s "
+          f"({response['coalesced']} requests coalesced)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
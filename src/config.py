@@ -0,0 +1,157 @@
+import json
+import os
+
+
+# Optional stages that can be switched on and off
+STAGES = ("minify", "precompress", "sitemap", "feed", "listing", "links", "offline", "staged", "costs")
+DEFAULT_STAGES = ("sitemap", "feed", "links")
+
+# Built-in profiles, a config file's [profiles] table can add to or replace them
+PROFILES = {
+    "dev": {"stages": ["links"]},
+    "production": {"stages": ["minify", "precompress", "sitemap", "feed", "links"]},
+}
+
+CONFIG_FILES = ("ssg.toml", "ssg.json")
+
+
+class ConfigError(Exception):
+    pass
+
+
+class BuildConfig:
+    """
+    Everything a build needs to know: where to read from and write to, how
+    many workers to use and which optional stages to run.
+
+    partials_dir holds the files pages and the template pull in with {{> path }},
+    layouts_dir the per-section layouts used instead of the template.
+
+    memory_budget (in MB) caps the memory of the whole build: pages are only
+    rendered in parallel as far as they fit in it. Markdown files larger than
+    stream_threshold (in MB) are written while they are rendered.
+
+    plugins lists the plugins the pages are rendered with, as module names or
+    paths of .py files, each with a register(registry) function (see plugins.py).
+
+    base_url is the path the site is served under, which the internal links
+    of the pages and layouts are rewritten for; site_url should include it.
+
+    report_dir is where the costs stage writes what every page cost to build,
+    outside the output directory so it isn't deployed.
+
+    Relative paths are resolved against root.
+    """
+    def __init__(self, root=".", content_dir="content", static_dir="static",
+                 template="static/template.html", partials_dir="partials", layouts_dir="layouts",
+                 output_dir="public", cache_dir=".cache",
+                 workers=None, stages=DEFAULT_STAGES, site_url="http://localhost:8888",
+                 site_title="", listing_page_size=20, memory_budget=None, stream_threshold=64, plugins=(), base_url="/",
+                 report_dir="build-report"):
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise ConfigError(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+        self.root = os.path.abspath(root)
+        self.content_dir = self.path(content_dir)
+        self.static_dir = self.path(static_dir)
+        self.template = self.path(template)
+        self.partials_dir = self.path(partials_dir)
+        self.layouts_dir = self.path(layouts_dir)
+        self.output_dir = self.path(output_dir)
+        self.cache_dir = self.path(cache_dir) if cache_dir else None
+        self.workers = workers or os.cpu_count() or 1
+        self.stages = frozenset(stages)
+        self.site_url = site_url
+        self.site_title = site_title
+        self.listing_page_size = listing_page_size
+        self.memory_budget = memory_budget
+        self.stream_threshold = stream_threshold
+        self.base_url = base_url
+        self.report_dir = self.path(report_dir)
+        self.plugins = tuple(self.path(plugin) if plugin.endswith(".py") else plugin for plugin in plugins)
+
+    def path(self, path):
+        return os.path.normpath(os.path.join(self.root, path))
+
+    def enabled(self, stage):
+        return stage in self.stages
+
+    def cache_path(self, name):
+        """
+        Returns the directory a cache is kept in, or None when caching is off.
+        """
+        return os.path.join(self.cache_dir, name) if self.cache_dir else None
+
+    def __repr__(self):
+        return (f"BuildConfig(root={self.root!r}, content_dir={self.content_dir!r}, "
+                f"output_dir={self.output_dir!r}, workers={self.workers}, stages={sorted(self.stages)})")
+
+
+def read_config_file(path):
+    """
+    Reads the settings from a .toml or .json config file.
+    """
+    with open(path, 'rb') as config_file:
+        data = config_file.read()
+
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise ConfigError("TOML config files need Python 3.11 or newer, use a .json file instead")
+        return tomllib.loads(data.decode('utf-8'))
+
+    return json.loads(data)
+
+
+def find_config_file(directory):
+    for name in CONFIG_FILES:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def load_config(path=None, root=None, profile=None, enable=(), disable=(), **overrides):
+    """
+    Builds a BuildConfig from a config file, a profile and explicit overrides,
+    in increasing order of precedence.
+
+    Args:
+        path (str): The config file. Defaults to ssg.toml or ssg.json in root, if present.
+        root (str): The directory relative paths are resolved against. Defaults
+            to the config file's directory, or the current directory.
+        profile (str): A profile name, either built in or from the file's [profiles] table.
+        enable (list): Stages to run on top of the configured ones.
+        disable (list): Stages not to run.
+        overrides: BuildConfig arguments; None values are ignored.
+
+    Returns:
+        BuildConfig: The resulting configuration.
+    """
+    if path is None:
+        path = find_config_file(root or os.getcwd())
+
+    settings = read_config_file(path) if path else {}
+    profiles = {**PROFILES, **settings.pop("profiles", {})}
+
+    if profile is not None:
+        if profile not in profiles:
+            raise ConfigError(f"Unknown profile: {profile}")
+        settings.update(profiles[profile])
+
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+
+    if enable or disable:
+        stages = set(settings.get("stages", DEFAULT_STAGES))
+        settings["stages"] = sorted((stages | set(enable)) - set(disable))
+
+    if root is None:
+        root = os.path.dirname(os.path.abspath(path)) if path else os.getcwd()
+    settings["root"] = os.path.join(root, settings.get("root", "."))
+
+    try:
+        return BuildConfig(**settings)
+    except TypeError as e:
+        raise ConfigError(f"Invalid config: {e}")
@@ -1,21 +1,27 @@
 
+import filecmp
 import os
 import shutil
+from log import logger
 
 
 def clear_and_copy(src, dest):
     # Check if the destination directory exists, and if so, remove it
     if os.path.exists(dest):
-        print(f"Deleting all contents of {dest}")
+        logger.debug("Deleting all contents of %s", dest, extra={"event": "clear", "path": dest})
         shutil.rmtree(dest)
     
     # Recreate the destination directory
     os.makedirs(dest, exist_ok=True)
 
     # Recursively copy the source directory to the destination
-    recursive_copy(src, dest)
+    return recursive_copy(src, dest)
+
+def recursive_copy(src, dest, copied=None):
+    # Keep track of every file copied, so the caller knows what ended up in dest
+    if copied is None:
+        copied = []
 
-def recursive_copy(src, dest):
     # List all files and directories in the source directory
     for item in os.listdir(src):
         src_item = os.path.join(src, item)
@@ -23,16 +29,42 @@ def recursive_copy(src, dest):
 
         # If the item is a file, copy it
         if os.path.isfile(src_item):
-            print(f"Copying file: {src_item} -> {dest_item}")
+            logger.debug("Copying file: %s -> %s", src_item, dest_item, extra={"event": "copy", "source": src_item, "dest": dest_item})
             shutil.copy(src_item, dest_item)
+            copied.append(dest_item)
         
         # If the item is a directory, create the directory in the destination and recurse
         elif os.path.isdir(src_item):
-            print(f"Creating directory: {dest_item}")
+            logger.debug("Creating directory: %s", dest_item, extra={"event": "mkdir", "path": dest_item})
             os.makedirs(dest_item, exist_ok=True)
-            recursive_copy(src_item, dest_item)
+            recursive_copy(src_item, dest_item, copied)
 
+    return copied
 
+def list_files(src, dest):
+    """
+    Returns (source path, destination path) pairs for every file under src,
+    as recursive_copy would copy them to dest.
+    """
+    pairs = []
+    for root, dirs, files in os.walk(src):
+        dirs.sort()
+        for file in sorted(files):
+            src_item = os.path.join(root, file)
+            pairs.append((src_item, os.path.join(dest, os.path.relpath(src_item, src))))
+    return pairs
 
+def copy_if_changed(src_item, dest_item):
+    # Leave identical files alone, so they keep their mtime and sync tools skip them
+    if os.path.isfile(dest_item) and os.path.getsize(src_item) == os.path.getsize(dest_item) \
+            and filecmp.cmp(src_item, dest_item, shallow=False):
+        return False
 
+    logger.debug("Copying file: %s -> %s", src_item, dest_item, extra={"event": "copy", "source": src_item, "dest": dest_item})
+    os.makedirs(os.path.dirname(dest_item), exist_ok=True)
 
+    # Replace the file rather than write into it, it may be hardlinked from the live site
+    temp_path = f"{dest_item}.{os.getpid()}.tmp"
+    shutil.copy(src_item, temp_path)
+    os.replace(temp_path, dest_item)
+    return True
@@ -0,0 +1,166 @@
+import json
+import os
+from htmlnode import escape_attribute, escape_text
+from log import logger
+from minify import write_output
+
+
+COSTS_FILE = "costs.json"
+DASHBOARD_FILE = "index.html"
+
+# Numeric columns of the dashboard: (key of a row, heading)
+COLUMNS = (
+    ("seconds", "Render time (ms)"),
+    ("input_bytes", "Markdown bytes"),
+    ("output_bytes", "HTML bytes"),
+    ("block_total", "Blocks"),
+    ("inline_total", "Inline matches"),
+)
+
+# Self-contained page: the rows are rendered slowest first, and clicking a
+# column heading sorts by it, most expensive first, then cheapest first.
+DASHBOARD_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Build cost report</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ border-bottom: 1px solid #ddd; padding: 0.3em 0.6em; text-align: right; }}
+th:first-child, td:first-child, td.detail {{ text-align: left; }}
+th[data-column] {{ cursor: pointer; white-space: nowrap; }}
+td.detail {{ color: #555; font-size: 0.9em; }}
+</style>
+</head>
+<body>
+<h1>Build cost report</h1>
+<p>{summary}</p>
+<p>Render times of pages whose parse tree was reused from an earlier build leave out parsing.
+Click a column to sort by it.</p>
+<table>
+<thead>
+<tr><th>Page</th>{headings}<th>Parsed</th><th>Blocks by kind</th><th>Inline matches by rule</th></tr>
+</thead>
+<tbody>
+{rows}
+</tbody>
+</table>
+<script>
+document.querySelectorAll("th[data-column]").forEach(heading => {{
+  heading.addEventListener("click", () => {{
+    const column = Number(heading.dataset.column);
+    const descending = heading.dataset.order !== "descending";
+    heading.dataset.order = descending ? "descending" : "ascending";
+    const body = document.querySelector("tbody");
+    const rows = Array.from(body.rows);
+    rows.sort((a, b) => {{
+      const difference = Number(a.cells[column].dataset.value) - Number(b.cells[column].dataset.value);
+      return descending ? -difference : difference;
+    }});
+    rows.forEach(row => body.appendChild(row));
+  }});
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def page_costs(pages, content_dir):
+    """
+    Returns a row per page with what it cost to build, the slowest first.
+
+    Args:
+        pages (list): The results of generate_page, with their "url".
+        content_dir (str): The content directory the sources are listed relative to.
+
+    Returns:
+        list: Dicts with the page's source, url and title, its "cost" (input
+        and output bytes, blocks by kind, inline matches by rule, seconds),
+        their "block_total" and "inline_total" and whether it was "parsed".
+    """
+    rows = []
+    for page in pages:
+        cost = page["cost"]
+        rows.append({
+            "source": os.path.relpath(page["source"], content_dir).replace(os.sep, "/"),
+            "url": page["url"],
+            "title": page["title"],
+            "parsed": page["parsed"],
+            **cost,
+            "block_total": sum(cost["blocks"].values()),
+            "inline_total": sum(cost["inline"].values()),
+        })
+
+    rows.sort(key=lambda row: row["seconds"], reverse=True)
+    return rows
+
+
+def cost_totals(rows):
+    """
+    Adds up the costs of every page, with the blocks by kind and inline matches by rule.
+    """
+    totals = {"pages": len(rows), "seconds": 0.0, "input_bytes": 0, "output_bytes": 0, "blocks": {}, "inline": {}}
+    for row in rows:
+        for key in ("seconds", "input_bytes", "output_bytes"):
+            totals[key] += row[key]
+        for key in ("blocks", "inline"):
+            for name, count in row[key].items():
+                totals[key][name] = totals[key].get(name, 0) + count
+    return totals
+
+
+def _counts_text(counts):
+    # "paragraph 12, heading 3", largest first
+    return ", ".join(f"{name} {count}" for name, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def render_dashboard(rows, totals):
+    """
+    Returns the HTML of the cost dashboard for the rows of page_costs.
+    """
+    headings = "".join(f'<th data-column="{index}">{heading}</th>' for index, (_, heading) in enumerate(COLUMNS, start=1))
+
+    lines = []
+    for row in rows:
+        cells = [f'<td title="{escape_attribute(row["url"])}">{escape_text(row["source"])}</td>']
+        for key, _ in COLUMNS:
+            text = f"{row[key] * 1000:.1f}" if key == "seconds" else str(row[key])
+            cells.append(f'<td data-value="{row[key]}">{text}</td>')
+        cells.append(f'<td>{"yes" if row["parsed"] else "no"}</td>')
+        cells.append(f'<td class="detail">{escape_text(_counts_text(row["blocks"]))}</td>')
+        cells.append(f'<td class="detail">{escape_text(_counts_text(row["inline"]))}</td>')
+        lines.append(f"<tr>{''.join(cells)}</tr>")
+
+    summary = (f"{totals['pages']} pages, {totals['seconds']:.2f}s of rendering, "
+               f"{totals['input_bytes']} bytes of markdown, {totals['output_bytes']} bytes of HTML")
+    return DASHBOARD_TEMPLATE.format(summary=summary, headings=headings, rows="\n".join(lines))
+
+
+def write_cost_report(report_dir, pages, content_dir):
+    """
+    Writes the per-page cost report as JSON, and as an HTML dashboard to sort
+    it by, to a directory of its own, outside the site.
+
+    Args:
+        report_dir (str): The directory to write costs.json and index.html to.
+        pages (list): The results of generate_page, with their "url".
+        content_dir (str): The content directory the sources are listed relative to.
+
+    Returns:
+        list: The paths of the files written.
+    """
+    rows = page_costs(pages, content_dir)
+    totals = cost_totals(rows)
+
+    os.makedirs(report_dir, exist_ok=True)
+    costs_path = os.path.join(report_dir, COSTS_FILE)
+    dashboard_path = os.path.join(report_dir, DASHBOARD_FILE)
+    write_output(costs_path, json.dumps({"totals": totals, "pages": rows}, indent=1) + "\n")
+    write_output(dashboard_path, render_dashboard(rows, totals))
+
+    if rows:
+        logger.info("Wrote the cost report to %s, slowest page %s (%.1f ms)", dashboard_path, rows[0]["source"],
+                    rows[0]["seconds"] * 1000, extra={"event": "cost_report", "path": dashboard_path, "pages": len(rows)})
+    return [costs_path, dashboard_path]
@@ -0,0 +1,200 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from log import logger
+from main import build, keep_worker_pools
+from site_index import SiteIndex
+
+
+class RebuildRequest:
+    def __init__(self, paths=None):
+        self.paths = paths  # Files that changed, or None for a full build
+        self.received = time.perf_counter()
+        self.done = threading.Event()
+        self.response = None
+
+
+class BuildDaemon:
+    """
+    Keeps a site built from one long-lived process, taking rebuild requests
+    over a Unix socket.
+
+    The modules, plugins, compiled layouts, partials, caches and worker
+    processes stay loaded between builds, and the SiteIndex of the last build
+    lets a request listing the files that changed render only the pages they
+    affect. Requests that arrive while a build runs are coalesced into the
+    next build, and every request is answered with its latency: the seconds
+    from its arrival to the end of the build that covered it.
+
+    The protocol is one JSON object per line each way. {"paths": [...]}
+    rebuilds for the given absolute paths, {} rebuilds everything and
+    {"stop": true} stops the daemon once the queued builds are done.
+    """
+    def __init__(self, config, socket_path):
+        self.config = config
+        self.socket_path = socket_path
+        self.index = SiteIndex()
+        self.pending = []  # RebuildRequests waiting for the next build
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.server = None
+
+    def request(self, paths=None):
+        """
+        Queues a rebuild and waits for the build that covers it.
+
+        Returns:
+            dict: Whether the build succeeded ("ok", or the "error" if not),
+            whether it was a "full" build, the number of "pages" generated and
+            "broken_links" found, how many requests it "coalesced", its
+            "duration" and this request's "latency", in seconds.
+        """
+        request = RebuildRequest(paths)
+        with self.condition:
+            if self.stopping:
+                return {"ok": False, "error": "The daemon is stopping"}
+            self.pending.append(request)
+            self.condition.notify()
+
+        request.done.wait()
+        return request.response
+
+    def run_builds(self):
+        """
+        Runs one build at a time, each for all the requests queued since the
+        previous one started, until the daemon stops.
+        """
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopping:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                batch, self.pending = self.pending, []
+            self._build(batch)
+
+    def _build(self, batch):
+        # One full build covers every request, otherwise rebuild for all the files listed
+        if any(request.paths is None for request in batch):
+            changed = None
+        else:
+            changed = sorted({path for request in batch for path in request.paths})
+
+        try:
+            report = build(self.config, self.index, changed)
+        except Exception as e:
+            logger.exception("Rebuild failed: %s", e, extra={"event": "rebuild_error"})
+            # Start over with a full build next time
+            self.index = SiteIndex()
+            result = {"ok": False, "error": str(e)}
+        else:
+            result = {
+                "ok": True,
+                "full": report["full"],
+                "pages": report["pages"],
+                "broken_links": len(report["broken_links"]),
+                "duration": report["duration"],
+            }
+
+        finished = time.perf_counter()
+        for request in batch:
+            request.response = {**result, "coalesced": len(batch), "latency": finished - request.received}
+            request.done.set()
+
+        latencies = [request.response["latency"] for request in batch]
+        logger.info("Rebuilt %d pages for %d requests, latency %.3fs to %.3fs",
+                    result.get("pages", 0), len(batch), min(latencies), max(latencies),
+                    extra={"event": "rebuild", "requests": len(batch), "pages": result.get("pages", 0),
+                           "full": result.get("full"), "max_latency": max(latencies)})
+
+    def serve(self):
+        """
+        Builds the site, then serves rebuild requests until stopped.
+        """
+        # A socket left behind by a daemon that didn't exit cleanly
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        keep_worker_pools()
+        builder = threading.Thread(target=self.run_builds, name="builder")
+        builder.start()
+        with self.condition:
+            self.pending.append(RebuildRequest())
+            self.condition.notify()
+
+        try:
+            with _Server(self.socket_path, _Handler) as server:
+                server.build_daemon = self
+                self.server = server
+                logger.info("Listening on %s", self.socket_path, extra={"event": "listening", "path": self.socket_path})
+                server.serve_forever()
+        finally:
+            with self.condition:
+                self.stopping = True
+                self.condition.notify()
+            builder.join()
+            keep_worker_pools(False)
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        if self.server is not None:
+            self.server.shutdown()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.build_daemon
+        for line in self.rfile:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                message = None
+
+            # A request is an object, with the list of the paths that changed if any
+            paths = message.get("paths") if isinstance(message, dict) else None
+            valid_paths = paths is None or (isinstance(paths, list) and all(isinstance(path, str) for path in paths))
+            if not isinstance(message, dict) or not valid_paths:
+                response = {"ok": False, "error": "Invalid request"}
+            elif message.get("stop"):
+                response = {"ok": True}
+                # shutdown() waits for serve_forever, which runs in another thread
+                threading.Thread(target=daemon.stop).start()
+            else:
+                response = daemon.request(paths)
+            self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+
+
+def send_request(socket_path, message, timeout=None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(message) + "\n").encode('utf-8'))
+        with sock.makefile('rb') as response:
+            return json.loads(response.readline())
+
+
+def request_rebuild(socket_path, paths=None, timeout=None):
+    """
+    Asks the daemon listening on socket_path to rebuild the site, for the
+    files that changed or everything, and waits for the build to finish.
+
+    Returns:
+        dict: The daemon's response, see BuildDaemon.request.
+    """
+    message = {} if paths is None else {"paths": [os.path.abspath(path) for path in paths]}
+    return send_request(socket_path, message, timeout)
+
+
+def stop_daemon(socket_path, timeout=None):
+    return send_request(socket_path, {"stop": True}, timeout)
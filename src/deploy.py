@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+from log import logger
+
+
+def file_entry(path, previous=None):
+    """
+    Returns the manifest entry of a file: its size, SHA-256 and mtime.
+
+    If the previous build's entry has the same size and mtime, the file
+    wasn't written since, and its hash is reused instead of being computed again.
+    """
+    stat = os.stat(path)
+    if previous is not None and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+        return previous
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return {"size": stat.st_size, "sha256": digest.hexdigest(), "mtime_ns": stat.st_mtime_ns}
+
+
+def build_manifest(output_dir, previous=None):
+    """
+    Lists every file of the output directory with its size and content hash.
+
+    Args:
+        output_dir (str): The directory the site was written to.
+        previous (dict): The previous build's manifest, whose hashes are
+            reused for the files that weren't written since.
+
+    Returns:
+        dict: Paths relative to output_dir, with "/" separators, mapped to their entries.
+    """
+    previous = previous or {}
+    manifest = {}
+
+    for root, dirs, files in os.walk(output_dir):
+        for file in files:
+            path = os.path.join(root, file)
+            relative_path = os.path.relpath(path, output_dir).replace(os.sep, "/")
+            manifest[relative_path] = file_entry(path, previous.get(relative_path))
+
+    return dict(sorted(manifest.items()))
+
+
+def diff_manifests(old, new):
+    """
+    Compares two manifests.
+
+    Returns:
+        dict: The sorted "added", "changed" and "removed" paths.
+    """
+    return {
+        "added": sorted(path for path in new if path not in old),
+        "changed": sorted(path for path in new if path in old and new[path]["sha256"] != old[path]["sha256"]),
+        "removed": sorted(path for path in old if path not in new),
+    }
+
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)["files"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}
+
+
+def save_json(path, data):
+    """
+    Writes data as JSON, through a temporary file so readers never see a partial file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1)
+    os.replace(temp_path, path)
+
+
+def remove_stale_files(output_dir, keep):
+    """
+    Removes the files of the output directory that the build didn't produce,
+    and the directories left empty.
+
+    Args:
+        output_dir (str): The directory the site was written to.
+        keep (set): Paths of the files the build produced.
+
+    Returns:
+        list: The paths removed.
+    """
+    keep = {os.path.normpath(path) for path in keep}
+    removed = []
+
+    for root, dirs, files in os.walk(output_dir, topdown=False):
+        for file in files:
+            path = os.path.join(root, file)
+            if os.path.normpath(path) not in keep:
+                logger.debug("Removing stale file: %s", path, extra={"event": "remove", "path": path})
+                os.remove(path)
+                removed.append(path)
+
+        if root != output_dir and not os.listdir(root):
+            os.rmdir(root)
+
+    return removed
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+from log import logger
+
+
+# Directories modified less than this many seconds before being listed are
+# listed again next time: on filesystems with a coarse mtime, a change made
+# right after the listing could leave the mtime as it was.
+RACY_SECONDS = 2
+
+
+class DirectorySnapshot:
+    """
+    The entries of every directory scanned, with the directory's mtime, kept
+    between builds so unchanged directories don't have to be listed again.
+
+    Adding, removing or renaming an entry changes the mtime of the directory
+    holding it, so a directory whose mtime is the one recorded still holds
+    the entries recorded. Every directory is still stat'ed, since a change
+    deep in a tree doesn't change the mtime of the directories above it, but
+    on network filesystems a stat costs far less than a listing.
+    """
+    def __init__(self, directories=None):
+        self.previous = directories or {}  # Directory path -> [mtime_ns, files, subdirectories]
+        self.directories = {}  # The same, for the directories scanned since this snapshot was loaded
+
+    @property
+    def reused(self):
+        """
+        The number of directories scanned whose entries came from the snapshot.
+        """
+        return sum(1 for directory, entries in self.directories.items() if self.previous.get(directory) is entries)
+
+    def scan(self, root, threads=1):
+        """
+        Lists the files under root, like os.walk without following symbolic
+        links to directories, sorted by directory and then by name.
+
+        Args:
+            root (str): The directory to scan. A missing directory has no files.
+            threads (int): Number of threads scanning the subdirectories of root
+                in parallel, each its own subtree.
+
+        Returns:
+            list: The paths of the files.
+        """
+        files, subdirs = self._entries(root, self.directories)
+        paths = [os.path.join(root, name) for name in files]
+        subtrees = [os.path.join(root, name) for name in subdirs]
+
+        if threads > 1 and len(subtrees) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                results = list(pool.map(self._scan_subtree, subtrees))
+        else:
+            results = [self._scan_subtree(subtree) for subtree in subtrees]
+
+        for subtree_paths, directories in results:
+            paths.extend(subtree_paths)
+            self.directories.update(directories)
+        return paths
+
+    def _scan_subtree(self, root):
+        # Every thread records the directories it scans apart, they're merged once it's done
+        directories = {}
+        paths = []
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            files, subdirs = self._entries(directory, directories)
+            paths.extend(os.path.join(directory, name) for name in files)
+            stack.extend(os.path.join(directory, name) for name in reversed(subdirs))
+        return paths, directories
+
+    def _entries(self, directory, directories):
+        # Stat before listing: if the directory changes in between, its mtime won't match next time
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            return [], []
+
+        recorded = self.previous.get(directory)
+        if recorded is not None and recorded[0] == mtime:
+            directories[directory] = recorded
+            return recorded[1], recorded[2]
+
+        logger.debug("Exploring directory: %s", directory, extra={"event": "scan", "path": directory})
+        files = []
+        subdirs = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file():
+                    files.append(entry.name)
+
+        if time.time_ns() - mtime < RACY_SECONDS * 10**9:
+            mtime = -1
+        directories[directory] = [mtime, sorted(files), sorted(subdirs)]
+        return directories[directory][1], directories[directory][2]
+
+    def save(self, path):
+        """
+        Saves the directories scanned since the snapshot was loaded, and only those.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.directories, f, separators=(",", ":"))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (FileNotFoundError, ValueError):
+            return cls()
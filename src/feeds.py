@@ -0,0 +1,212 @@
+import heapq
+import os
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+from htmlnode import LeafNode, ParentNode, escape_text
+from minify import replace_if_changed, write_output
+
+
+def format_timestamp(mtime):
+    return datetime.fromtimestamp(mtime, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class PageGenerator:
+    """
+    Base class for generators fed by generate_pages_recursive.
+
+    add_page is called once per generated page, as soon as it is produced, with
+    its metadata: "url", "title", "mtime", "source" and "dest". close is called
+    once every page has been added.
+
+    Files whose content didn't change since the last build are left as they
+    are, and every file a generator produced is listed in its outputs.
+    """
+    outputs = ()
+
+    def add_page(self, page):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SitemapWriter(PageGenerator):
+    """
+    Streams page URLs into sitemap.xml, switching to numbered shards and a
+    sitemap index once more than max_urls pages have been added.
+    """
+    def __init__(self, dest_dir, site_url, max_urls=50000):
+        self.dest_dir = dest_dir
+        self.site_url = site_url.rstrip("/")
+        self.max_urls = max_urls
+        self.shards = []  # Temporary files, moved into place by close
+        self.count = 0
+        self.file = None
+        self.outputs = []
+
+    def add_page(self, page):
+        if self.file is None or self.count == self.max_urls:
+            self._open_shard()
+
+        self.file.write(
+            f"<url><loc>{escape(self.site_url + page['url'])}</loc>"
+            f"<lastmod>{format_timestamp(page['mtime'])}</lastmod></url>\n"
+        )
+        self.count += 1
+
+    def _open_shard(self):
+        self._close_shard()
+        path = os.path.join(self.dest_dir, f"sitemap-{len(self.shards) + 1}.xml.tmp")
+        self.shards.append(path)
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.file.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        self.count = 0
+
+    def _close_shard(self):
+        if self.file is not None:
+            self.file.write('</urlset>\n')
+            self.file.close()
+            self.file = None
+
+    def close(self):
+        if not self.shards:
+            self._open_shard()
+        self._close_shard()
+
+        sitemap_path = os.path.join(self.dest_dir, "sitemap.xml")
+        self.outputs.append(sitemap_path)
+
+        # A single shard is the sitemap itself
+        if len(self.shards) == 1:
+            replace_if_changed(self.shards[0], sitemap_path)
+            return
+
+        index = [
+            '<?xml version="1.0" encoding="UTF-8"?>\n',
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n',
+        ]
+        for shard in self.shards:
+            shard_path = shard[:-len(".tmp")]
+            replace_if_changed(shard, shard_path)
+            self.outputs.append(shard_path)
+
+            loc = f"{self.site_url}/{os.path.basename(shard_path)}"
+            index.append(f"<sitemap><loc>{escape(loc)}</loc></sitemap>\n")
+        index.append('</sitemapindex>\n')
+
+        write_output(sitemap_path, "".join(index))
+
+
+class AtomFeedWriter(PageGenerator):
+    """
+    Writes an Atom feed of the most recently modified pages. Only the
+    metadata of the newest max_entries pages is kept while pages are added.
+    """
+    def __init__(self, dest_dir, site_url, title, max_entries=20, filename="feed.xml"):
+        self.path = os.path.join(dest_dir, filename)
+        self.site_url = site_url.rstrip("/")
+        self.title = title
+        self.max_entries = max_entries
+        self.entries = []  # min-heap on mtime, so the oldest entry is dropped first
+        self.counter = 0
+        self.outputs = [self.path]
+
+    def add_page(self, page):
+        # The counter breaks mtime ties without comparing the dicts
+        entry = (page["mtime"], self.counter, page["url"], page["title"])
+        self.counter += 1
+
+        if len(self.entries) < self.max_entries:
+            heapq.heappush(self.entries, entry)
+        elif entry > self.entries[0]:
+            heapq.heapreplace(self.entries, entry)
+
+    def close(self):
+        entries = sorted(self.entries, reverse=True)
+        updated = entries[0][0] if entries else 0
+
+        feed = [
+            '<?xml version="1.0" encoding="utf-8"?>\n',
+            '<feed xmlns="http://www.w3.org/2005/Atom">\n',
+            f"<title>{escape(self.title)}</title>\n",
+            f"<id>{escape(self.site_url + '/')}</id>\n",
+            f"<link href={quoteattr(self.site_url + '/')}/>\n",
+            f"<updated>{format_timestamp(updated)}</updated>\n",
+        ]
+
+        for mtime, _, url, title in entries:
+            link = self.site_url + url
+            feed.append(
+                f"<entry><title>{escape(title)}</title>"
+                f"<id>{escape(link)}</id><link href={quoteattr(link)}/>"
+                f"<updated>{format_timestamp(mtime)}</updated></entry>\n"
+            )
+
+        feed.append('</feed>\n')
+        write_output(self.path, "".join(feed))
+
+
+class ListingWriter(PageGenerator):
+    """
+    Writes paginated listing pages (listing_dir/1/index.html, listing_dir/2/index.html, ...)
+    linking to every page, in the order the pages are produced. At most one
+    listing page worth of metadata is held at a time.
+    """
+    def __init__(self, dest_dir, template_path, title="All pages", listing_dir="pages", page_size=20, routes=None, minify=False):
+        self.dest_dir = os.path.join(dest_dir, listing_dir)
+        self.url_prefix = "/" + listing_dir.strip("/") + "/"
+        self.routes = routes  # Resolves the links for a site served under a base URL
+        self.title = title
+        self.page_size = page_size
+        self.minify = minify
+        self.pending = []
+        self.number = 0
+        self.outputs = []
+
+        with open(template_path, 'r') as template_file:
+            self.template = template_file.read()
+        if routes is not None:
+            self.template = routes.rewrite_attributes(self.template)
+
+    def add_page(self, page):
+        # A full listing page is only written once we know another one follows it
+        if len(self.pending) == self.page_size:
+            self._write(has_next=True)
+        self.pending.append((page["url"], page["title"]))
+
+    def close(self):
+        if self.pending or self.number == 0:
+            self._write(has_next=False)
+
+    def _resolve(self, url):
+        return self.routes.resolve(url) if self.routes is not None else url
+
+    def _write(self, has_next):
+        self.number += 1
+
+        items = [
+            ParentNode(children=[LeafNode(value=escape_text(title), tag="a", props={"href": self._resolve(url)})], tag="li")
+            for url, title in self.pending
+        ]
+        children = [ParentNode(children=items, tag="ul")] if items else [LeafNode(value="No pages yet.", tag="p")]
+
+        navigation = []
+        if self.number > 1:
+            navigation.append(LeafNode(value="Previous", tag="a", props={"href": self._resolve(f"{self.url_prefix}{self.number - 1}/")}))
+        if has_next:
+            navigation.append(LeafNode(value="Next", tag="a", props={"href": self._resolve(f"{self.url_prefix}{self.number + 1}/")}))
+        if navigation:
+            children.append(ParentNode(children=navigation, tag="nav"))
+
+        content = ParentNode(children=children, is_root=True).to_html()
+        title = f"{self.title} ({self.number})"
+        final_html = self.template.replace("{{ Title }}", escape_text(title)).replace("{{ Content }}", content)
+
+        page_dir = os.path.join(self.dest_dir, str(self.number))
+        os.makedirs(page_dir, exist_ok=True)
+        path = os.path.join(page_dir, "index.html")
+        write_output(path, final_html, minify=self.minify)
+        self.outputs.append(path)
+
+        self.pending = []
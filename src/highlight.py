@@ -0,0 +1,198 @@
+import hashlib
+import os
+import re
+from htmlnode import escape_text
+
+
+# Bump when the token patterns change, so highlighted code cached by older
+# builds isn't reused
+HIGHLIGHT_VERSION = 2
+
+
+def _language(**patterns):
+    """
+    Compiles the token patterns of a language into one regex with a named group per token type.
+    Earlier patterns win when several could match at the same position.
+    """
+    return re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in patterns.items()), re.MULTILINE)
+
+
+def _keywords(words):
+    return r'\b(?:' + "|".join(words.split()) + r')\b'
+
+
+# Strings and comments that aren't closed run to the end of their line (or of
+# the code, for those that can span lines) instead of not matching at all,
+# so an unclosed one isn't scanned again from every position after it
+C_COMMENT = r'//[^\n]*|/\*(?:.|\n)*?(?:\*/|\Z)'
+C_STRING = r'"(?:\\.?|[^"\\\n])*(?:"|$)|\'(?:\\.?|[^\'\\\n])*(?:\'|$)'
+NUMBER = r'\b(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)\b'
+
+LANGUAGES = {
+    "python": _language(
+        comment=r'#[^\n]*',
+        string=r'(?:[rbuf]|rb|br|fr|rf)?(?:"""(?:.|\n)*?"""|\'\'\'(?:.|\n)*?\'\'\'|' + C_STRING + ')',
+        keyword=_keywords(
+            "and as assert async await break class continue def del elif else except finally for "
+            "from global if import in is lambda nonlocal not or pass raise return try while with yield "
+            "None True False"
+        ),
+        number=NUMBER,
+    ),
+    "javascript": _language(
+        comment=C_COMMENT,
+        string=C_STRING + r'|`(?:\\[\s\S]?|[^`\\])*(?:`|\Z)',
+        keyword=_keywords(
+            "async await break case catch class const continue default delete do else export extends "
+            "finally for function if import in instanceof let new of return switch this throw try typeof "
+            "var void while yield null undefined true false"
+        ),
+        number=NUMBER,
+    ),
+    "go": _language(
+        comment=C_COMMENT,
+        string=C_STRING + r'|`[^`]*(?:`|\Z)',
+        keyword=_keywords(
+            "break case chan const continue default defer else fallthrough for func go goto if import "
+            "interface map package range return select struct switch type var nil true false"
+        ),
+        number=NUMBER,
+    ),
+    "bash": _language(
+        comment=r'(?<![\w$])#[^\n]*',
+        string=r'"(?:\\[\s\S]?|[^"\\])*(?:"|\Z)|\'[^\']*(?:\'|\Z)',
+        keyword=_keywords("if then else elif fi for while until do done case esac function in return local export"),
+        variable=r'\$(?:\{[^{}\n]*\}|\w+|[@*#?$!])',
+        number=NUMBER,
+    ),
+    "json": _language(
+        key=r'"(?:\\.|[^"\\\n])*"(?=\s*:)',
+        string=r'"(?:\\.?|[^"\\\n])*(?:"|$)',
+        keyword=_keywords("true false null"),
+        number=r'-?' + NUMBER,
+    ),
+    "css": _language(
+        comment=r'/\*(?:.|\n)*?(?:\*/|\Z)',
+        string=C_STRING,
+        # A name starts a property if a ";" follows before any other ":", except in url(...)
+        property=r'(?<![\w-])[\w-]+(?=\s*:(?:[^{};:()]|\([^()]*\))*;)',
+        number=r'#[0-9a-fA-F]{3,8}\b|-?\d+(?:\.\d+)?(?:%|[a-z]+)?\b',
+    ),
+}
+
+ALIASES = {
+    "py": "python",
+    "python3": "python",
+    "js": "javascript",
+    "golang": "go",
+    "sh": "bash",
+    "shell": "bash",
+    "zsh": "bash",
+}
+
+
+def normalize_language(language):
+    """
+    Returns the canonical name of a fence's language tag, e.g. "py" -> "python".
+    """
+    language = language.strip().lower()
+    return ALIASES.get(language, language)
+
+
+def highlight(code, language):
+    """
+    Tokenizes code and returns it as escaped HTML, with each token wrapped in
+    a <span class="tok-TYPE">. Unknown languages are only escaped.
+    """
+    pattern = LANGUAGES.get(normalize_language(language))
+    if pattern is None:
+        return escape_text(code)
+
+    parts = []
+    position = 0
+    for match in pattern.finditer(code):
+        if not match.group():
+            continue
+        if match.start() > position:
+            parts.append(escape_text(code[position:match.start()]))
+        parts.append(f'<span class="tok-{match.lastgroup}">{escape_text(match.group())}</span>')
+        position = match.end()
+    parts.append(escape_text(code[position:]))
+
+    return "".join(parts)
+
+
+class Highlighter:
+    """
+    Memoizes highlight() by (language, code hash).
+
+    Results live in memory for the rest of the build and, if a cache_dir is
+    given, on disk, so other worker processes and later builds reuse them.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def highlight(self, code, language):
+        language = normalize_language(language)
+        key = (language, hashlib.sha256(code.encode('utf-8')).hexdigest())
+
+        result = self.cache.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        result = self._load(key)
+        if result is None:
+            self.misses += 1
+            result = highlight(code, language)
+            self._store(key, result)
+        else:
+            self.hits += 1
+
+        self.cache[key] = result
+        return result
+
+    def _path(self, key):
+        language, digest = key
+        # The language comes from the markdown, keep it out of the path itself
+        language_digest = hashlib.sha256(language.encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.cache_dir, f"v{HIGHLIGHT_VERSION}-{language_digest}-{digest}.html")
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _store(self, key, result):
+        if not self.cache_dir:
+            return
+
+        # Write to a temporary file first so another process never reads a partial entry
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(result)
+        os.replace(temp_path, path)
+
+
+_highlighters = {}
+
+
+def get_highlighter(cache_dir=None):
+    """
+    Returns the Highlighter of this process for a cache directory, so every
+    page a worker process renders shares the same in-memory cache.
+    """
+    if cache_dir not in _highlighters:
+        _highlighters[cache_dir] = Highlighter(cache_dir)
+    return _highlighters[cache_dir]
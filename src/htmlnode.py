@@ -1,3 +1,52 @@
+# Characters that can't appear as is in text and in double-quoted attribute values
+_TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_ATTRIBUTE_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+
+def escape_text(text):
+	"""
+	Escapes text for use between tags.
+	"""
+	# Fast path: most text has nothing to escape, and these checks are far cheaper than translate
+	if "&" not in text and "<" not in text and ">" not in text:
+		return text
+	return text.translate(_TEXT_ESCAPES)
+
+
+def escape_attribute(value):
+	"""
+	Escapes a value for use inside a double-quoted attribute.
+	"""
+	if value.__class__ is not str:
+		value = str(value)
+	if "&" in value or "<" in value or ">" in value or '"' in value:
+		return value.translate(_ATTRIBUTE_ESCAPES)
+	return value
+
+
+def attributes_to_html(props):
+	"""
+	Serializes a dict of attributes as ' key="value" key2="value2"', with the values escaped.
+	True renders just the attribute name, None and False leave the attribute out.
+	"""
+	parts = []
+	for key, value in props.items():
+		if value.__class__ is not str:
+			if value is None or value is False:
+				continue
+			if value is True:
+				parts.append(key)
+				continue
+			value = str(value)
+
+		# Same as escape_attribute, inlined: this runs for every attribute of every node
+		if "&" in value or "<" in value or ">" in value or '"' in value:
+			value = value.translate(_ATTRIBUTE_ESCAPES)
+		parts.append(f'{key}="{value}"')
+
+	return " " + " ".join(parts) if parts else ""
+
+
 class HTMLNode:
 	def __init__(self, tag = None, value = None , children = None, props = None):
 		self.tag = tag
@@ -13,15 +62,10 @@ class HTMLNode:
 		raise NotImplementedError
 	
 	def props_to_html(self):
-		if self.props == None:
+		if not self.props:
 			return ""
-		
-		final = ""
-		for key,values in self.props.items():
-			final += f'{key}="{values}" '
-
 
-		return f" {final.strip()}" if final else ""
+		return attributes_to_html(self.props)
 	
 
 class LeafNode(HTMLNode):
@@ -54,10 +98,10 @@ class ParentNode(HTMLNode):
 
         # If this ParentNode is the root node (is_root=True), it doesn't need a tag
         if self.is_root and self.tag is None:
-            children_html = "".join(
+            children_html = "".join([
                 child.to_html() if isinstance(child, HTMLNode) else str(child)
                 for child in self.children
-            )
+            ])
             return children_html
 
         # If it's a non-root ParentNode, it must have a tag
@@ -65,15 +109,11 @@ class ParentNode(HTMLNode):
             raise ValueError("ParentNode must have a tag")
 
         # Concatenate the HTML for all child nodes
-        children_html = "".join(
+        children_html = "".join([
             child.to_html() if isinstance(child, HTMLNode) else str(child)
             for child in self.children
-        )
+        ])
 
         # Return the parent tag with its children rendered inside
-        props_str = (
-            " ".join(f'{key}="{value}"' for key, value in self.props.items())
-            if self.props
-            else ""
-        )
-        return f"<{self.tag}{(' ' + props_str) if props_str else ''}>{children_html}</{self.tag}>"
+        props_str = self.props_to_html()
+        return f"<{self.tag}{props_str}>{children_html}</{self.tag}>"
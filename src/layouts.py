@@ -0,0 +1,162 @@
+import os
+import re
+from partials import file_mtimes, files_unchanged
+
+
+# {{ extends name }} on the first line of a layout makes it fill the {{ Content }} of layouts/name.html
+EXTENDS = re.compile(r'\s*\{\{ extends ([\w./-]+) \}\}[ \t]*\n?')
+SLOT = re.compile(r'\{\{ (\w+) \}\}')
+
+
+class LayoutError(Exception):
+    pass
+
+
+class Layout:
+    """
+    A layout with its inheritance chain resolved, compiled into the literal
+    text between its slots ({{ Title }}, {{ Content }}, ...) and the slot
+    names, so rendering it is a single join.
+    """
+    def __init__(self, text, files):
+        self.segments = SLOT.split(text)  # literal, slot name, literal, ..., literal
+        self.slots = set(self.segments[1::2])
+        self.files = files
+
+    def render(self, values):
+        """
+        Fills the slots with values. Slots without a value are left as written.
+        """
+        parts = self.segments[:]
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            value = values.get(name)
+            parts[i] = value if value is not None else f"{{{{ {name} }}}}"
+        return "".join(parts)
+
+    def render_parts(self, values):
+        """
+        Same as render, but yields the page piece by piece. A value can also be
+        an iterable of strings, which is only consumed as the page is written.
+        """
+        for i, segment in enumerate(self.segments):
+            if i % 2 == 0:
+                yield segment
+                continue
+
+            value = values.get(segment)
+            if value is None:
+                yield f"{{{{ {segment} }}}}"
+            elif isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+
+class Layouts:
+    """
+    Finds, resolves and compiles the layouts of a layouts directory.
+
+    A page's layout is the one named in its front matter, otherwise the one
+    named after the nearest directory it is in (layouts/blog/2024.html, then
+    layouts/blog.html for content/blog/2024/post.md), otherwise
+    layouts/default.html, otherwise the default template.
+
+    Compiled layouts are kept until one of the files they were made of changes.
+    With routes, the root-relative URLs of their attributes are resolved as
+    they are compiled (see Routes.rewrite_attributes).
+    """
+    def __init__(self, layouts_dir, partials=None, routes=None):
+        self.layouts_dir = os.path.abspath(layouts_dir) if layouts_dir else None
+        self.partials = partials
+        self.routes = routes
+        self.compiled = {}  # path -> (mtimes, Layout)
+
+    def path(self, name):
+        """
+        Returns the file of a layout name, or None if it would be outside the layouts directory.
+        """
+        if not self.layouts_dir:
+            return None
+        path = os.path.normpath(os.path.join(self.layouts_dir, f"{name}.html"))
+        if os.path.commonpath([path, self.layouts_dir]) != self.layouts_dir:
+            return None
+        return path
+
+    def find(self, section="", name=None, default=None):
+        """
+        Returns the path of the layout for a page in a section (its directory
+        relative to the content directory), or for an explicitly named layout.
+        """
+        if name:
+            path = self.path(name)
+            if path is None or not os.path.isfile(path):
+                raise LayoutError(f"Layout not found: {name}")
+            return path
+
+        candidates = []
+        while section and section != os.curdir:
+            candidates.append(section)
+            section = os.path.dirname(section)
+        candidates.append("default")
+
+        for candidate in candidates:
+            path = self.path(candidate)
+            if path is not None and os.path.isfile(path):
+                return path
+        return default
+
+    def get(self, path):
+        """
+        Returns the compiled Layout for a layout (or template) file.
+        """
+        cached = self.compiled.get(path)
+        if cached is not None and files_unchanged(cached[0]):
+            return cached[1]
+
+        text, files = self._resolve(path, ())
+        if self.routes is not None:
+            text = self.routes.rewrite_attributes(text)
+        layout = Layout(text, files)
+        self.compiled[path] = (file_mtimes(files), layout)
+        return layout
+
+    def _resolve(self, path, stack):
+        """
+        Returns the text of a layout with its parents filled in, and the files it was made of.
+        """
+        if path in stack:
+            chain = " -> ".join(os.path.basename(p) for p in stack + (path,))
+            raise LayoutError(f"Layout cycle: {chain}")
+
+        if self.partials is not None:
+            text, includes = self.partials.template(path)
+        else:
+            with open(path, 'r') as layout_file:
+                text, includes = layout_file.read(), []
+
+        extends = EXTENDS.match(text)
+        if extends is None:
+            return text, [path] + includes
+
+        parent_path = self.path(extends.group(1))
+        if parent_path is None or not os.path.isfile(parent_path):
+            raise LayoutError(f"Layout not found: {extends.group(1)} (extended by {path})")
+
+        parent_text, parent_files = self._resolve(parent_path, stack + (path,))
+        text = parent_text.replace("{{ Content }}", text[extends.end():])
+        return text, [path] + includes + parent_files
+
+
+_layouts = {}
+
+
+def get_layouts(layouts_dir, partials=None, routes=None):
+    """
+    Returns the Layouts of this process for a layouts directory, so every
+    page a worker process renders shares the compiled layouts.
+    """
+    key = (layouts_dir, partials, routes.fingerprint if routes is not None else None)
+    if key not in _layouts:
+        _layouts[key] = Layouts(layouts_dir, partials, routes)
+    return _layouts[key]
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import posixpath
+import re
+from urllib.parse import urlsplit
+
+
+# Root-relative URLs in the attributes of a template
+URL_ATTRIBUTE = re.compile(r'''(\s(?:href|src|action|poster)\s*=\s*)(["'])(/(?!/)[^"']*)\2''', re.IGNORECASE)
+
+
+class LinkIndex:
+    """
+    Site-wide index of the generated output paths and of every link and image
+    target found while the pages were parsed.
+    """
+    def __init__(self):
+        self.targets = set()
+        self.links = []
+
+    def add_output(self, relative_path):
+        """
+        Registers an output file, given relative to the output directory.
+        """
+        url = "/" + relative_path.replace("\\", "/").lstrip("/")
+        self.targets.add(url)
+
+        # Directories are served through their index.html
+        if posixpath.basename(url) == "index.html":
+            self.targets.add(posixpath.dirname(url))
+
+    def add_links(self, source_path, page_path, links):
+        """
+        Registers the links found in a page.
+
+        Args:
+            source_path (str): The markdown file the links were found in.
+            page_path (str): The page's output path, relative to the output directory.
+            links (list): (line, url, kind) tuples, as collected by RenderContext.
+        """
+        page_url = "/" + page_path.replace("\\", "/").lstrip("/")
+        for line, url, kind in links:
+            self.links.append((source_path, line, url, kind, page_url))
+
+    def broken_links(self):
+        """
+        Checks every internal link against the output paths in one pass.
+
+        Returns:
+            list: (source_path, line, url, kind) tuples, in the order they were found.
+        """
+        broken = []
+        for source_path, line, url, kind, page_url in self.links:
+            target = resolve_internal_url(url, page_url)
+            if target is not None and target not in self.targets:
+                broken.append((source_path, line, url, kind))
+        return broken
+
+
+def resolve_internal_url(url, page_url):
+    """
+    Resolves a link target against the URL of the page it appears on.
+
+    Returns:
+        str: The absolute path the link points to, or None for external
+        links and links to a fragment of the same page.
+    """
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+
+    path = parts.path
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(page_url), path)
+
+    normalized = posixpath.normpath(path)
+    return "/" + normalized.lstrip("/") if normalized != "/" else "/"
+
+
+def page_url(relative_path):
+    """
+    Returns the URL a page is served at, given its path relative to the output directory.
+    "majesty/index.html" -> "/majesty/", "blog/post.html" -> "/blog/post.html"
+    """
+    url = "/" + relative_path.replace("\\", "/").lstrip("/")
+    if url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return url
+
+
+class Routes:
+    """
+    Rewrites the internal links of a site served under a path prefix, as
+    they are rendered, so the output needs no extra pass.
+
+    Root-relative URLs are put under base_url, through a route table of the
+    site paths that aren't served as written: the section index pages
+    ("/blog" and "/blog/index.html" are served as "/blog/"). Every other
+    path maps to itself, so the table stays small and resolving a link is a
+    single lookup. Relative URLs work under any prefix and are left alone,
+    as are external links and fragments.
+    """
+    def __init__(self, base_url="/", table=None):
+        self.base_url = "/" + base_url.strip("/") + "/" if base_url.strip("/") else "/"
+        self.table = table or {}  # Site path -> the site path it is served at
+        digest = hashlib.sha256(json.dumps([self.base_url, self.table], sort_keys=True).encode('utf-8'))
+        self.fingerprint = digest.hexdigest()[:16]  # Changes with what links render to
+
+    @classmethod
+    def from_pages(cls, base_url, page_urls):
+        """
+        Builds the routes of a site from the URLs of its pages (see page_url).
+        """
+        table = {}
+        for url in page_urls:
+            if url.endswith("/"):
+                table[url + "index.html"] = url
+                if url != "/":
+                    table[url.rstrip("/")] = url
+        return cls(base_url, table)
+
+    def resolve(self, url):
+        """
+        Returns the URL a link to url points to from any page of the site.
+        """
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+
+        end = len(url)
+        for separator in "?#":
+            position = url.find(separator)
+            if position != -1 and position < end:
+                end = position
+
+        path = self.table.get(url[:end], url[:end])
+        return self.base_url + path[1:] + url[end:]
+
+    def rewrite_attributes(self, html):
+        """
+        Resolves the root-relative URLs of the href, src, action and poster
+        attributes of a template, e.g. the stylesheet it links to.
+        """
+        return URL_ATTRIBUTE.sub(lambda match: match.group(1) + match.group(2) + self.resolve(match.group(3)) + match.group(2), html)
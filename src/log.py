@@ -0,0 +1,185 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+
+logger = logging.getLogger("ssg")
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+MODES = ("text", "json", "progress")
+
+
+def record_fields(record):
+    """
+    Returns the structured fields passed to a logging call through extra=.
+    """
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line, structured fields included.
+    """
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "message": record.getMessage(),
+            **record_fields(record),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class ProgressHandler(logging.Handler):
+    """
+    Shows a single progress bar line instead of per-file messages.
+
+    A record with a "total" field sets the number of pages expected and
+    every "page" event moves the bar. Warnings and errors are still written
+    out in full, and other records at or above summary_level as well.
+    """
+    def __init__(self, stream, width=30, summary_level=logging.INFO):
+        super().__init__()
+        self.stream = stream
+        self.width = width
+        self.summary_level = summary_level
+        self.total = 0
+        self.done = 0
+        self.drawn = None
+
+    def emit(self, record):
+        fields = record_fields(record)
+
+        if "total" in fields:
+            self.total = fields["total"]
+            self.done = 0
+        elif fields.get("event") == "page":
+            self.done += 1
+            self._draw()
+            return
+
+        if record.levelno >= self.summary_level:
+            self._clear()
+            self.stream.write(self.format(record) + "\n")
+            self._draw(force=True)
+
+    def _draw(self, force=False):
+        if not self.total:
+            return
+
+        filled = self.width * self.done // self.total
+        # Only redraw when the bar itself changes, not for every page
+        if filled == self.drawn and not force and self.done != self.total:
+            return
+
+        self.drawn = filled
+        bar = "#" * filled + "-" * (self.width - filled)
+        self.stream.write(f"\r[{bar}] {self.done}/{self.total} pages")
+        if self.done == self.total:
+            self.stream.write("\n")
+            self.total = 0
+        self.stream.flush()
+
+    def _clear(self):
+        if self.total and self.drawn is not None:
+            self.stream.write("\r" + " " * (self.width + 24) + "\r")
+
+
+class _BuildQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread of the process that set up logging.
+    Worker processes forked from it don't run that thread, so they write
+    their (rare, warning level) records straight to stderr instead.
+    """
+    def __init__(self, log_queue, fallback):
+        super().__init__(log_queue)
+        self.pid = os.getpid()
+        self.fallback = fallback
+
+    def emit(self, record):
+        if os.getpid() == self.pid:
+            super().emit(record)
+        else:
+            self.fallback.handle(record)
+
+
+class LogSession:
+    """
+    Logging set up by setup_logging. close() flushes everything still buffered
+    and removes the handlers again.
+    """
+    def __init__(self, handler, listener, target):
+        self.handler = handler
+        self.listener = listener
+        self.target = target
+
+    def close(self):
+        logger.removeHandler(self.handler)
+        self.listener.stop()
+        self.target.flush()
+        self.target.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def setup_logging(level=logging.INFO, mode="text", stream=None, buffer_size=1000):
+    """
+    Sends the "ssg" logger's records to a stream without slowing the build down.
+
+    Records are put on a queue and formatted and written by a listener thread,
+    which buffers up to buffer_size of them between writes (warnings and
+    errors are written at once).
+
+    Args:
+        level (int): The lowest level logged. Per-file messages are DEBUG.
+        mode (str): "text", "json" (JSON lines) or "progress" (progress bar and summary).
+        stream: Where to write, defaults to sys.stderr.
+        buffer_size (int): Number of records buffered between writes.
+
+    Returns:
+        LogSession: Call close() (or use it as a context manager) at the end of the build.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown log mode: {mode}")
+
+    stream = stream or sys.stderr
+
+    if mode == "progress":
+        output = ProgressHandler(stream)
+        output.setFormatter(logging.Formatter("%(message)s"))
+    else:
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonLinesFormatter() if mode == "json" else logging.Formatter("%(message)s"))
+
+    # The progress bar has to be redrawn as pages are done, so it isn't buffered
+    if mode == "progress":
+        target = output
+    else:
+        target = logging.handlers.MemoryHandler(buffer_size, flushLevel=logging.WARNING, target=output)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, target)
+    handler = _BuildQueueHandler(log_queue, fallback=output)
+
+    if mode == "progress":
+        # Page events are DEBUG records; let those through for the bar, but nothing else below level
+        logger.setLevel(min(level, logging.DEBUG))
+        handler.addFilter(lambda record: record.levelno >= level or getattr(record, "event", None) == "page")
+    else:
+        logger.setLevel(level)
+    logger.propagate = False
+    logger.addHandler(handler)
+    listener.start()
+
+    return LogSession(handler, listener, target)
@@ -1,68 +1,302 @@
 # main.py
 import os
-from copy_static import clear_and_copy
-from utils import extract_title, markdown_to_html_node
+import time
+from block_cache import get_block_cache
+from copy_static import copy_if_changed, list_files
+from discovery import DirectorySnapshot
+from highlight import get_highlighter
+from htmlnode import escape_text
+from links import Routes, page_url
+from log import logger
+from layouts import LayoutError, get_layouts
+from minify import PRECOMPRESSED_TYPES, precompress_output, process_static_file, write_output, write_stream
+from node_cache import get_node_cache, markdown_digest
+from partials import IncludeError, get_partials
+from render_context import RenderContext
+from scheduler import MB, MemoryBudget, current_rss, estimate_page_memory
+from site_index import SiteIndex
+from utils import extract_title, get_registry, iter_markdown_html, markdown_to_html_node, read_markdown_lines, scan_markdown_file, split_front_matter, toc_to_html_node
+
+
+# Worker pools kept running between builds, by number of workers, see keep_worker_pools
+_pools = {}
+_keep_pools = False
+
+
+def keep_worker_pools(keep=True):
+    """
+    Keeps the worker processes running from one batch of jobs to the next,
+    instead of starting new ones every time, so the caches, partials and
+    layouts they hold stay warm between builds. Used by the build daemon;
+    keep_worker_pools(False) shuts the pools down.
+    """
+    global _keep_pools
+    _keep_pools = keep
+    if not keep:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
+
+
+def iter_jobs(func, jobs, workers=1, costs=None, budget=None):
+    """
+    Runs func(*job) for every job, in a process pool when workers > 1, and
+    yields each result as soon as it (and every job before it) is done.
+
+    Only a few jobs per worker are queued at a time, and with a budget, a
+    job is only started once its cost fits next to the jobs still running.
+
+    Args:
+        func (callable): A module-level function, so it can be sent to the workers.
+        jobs (list): A list of argument tuples.
+        workers (int): Number of worker processes.
+        costs (list): The approximate memory each job needs, in bytes.
+        budget (MemoryBudget): The memory the jobs in flight may use together.
+
+    Yields:
+        The results, in the same order as the jobs.
+    """
+    costs = costs or [0] * len(jobs)
+
+    if workers <= 1 or len(jobs) <= 1:
+        for job, cost in zip(jobs, costs):
+            if budget is not None:
+                budget.acquire(cost)
+            result = func(*job)
+            if budget is not None:
+                budget.release(cost)
+            yield result
+        return
+
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    from contextlib import nullcontext
+
+    if _keep_pools:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        pool_context = nullcontext(_pools[workers])
+    else:
+        pool_context = ProcessPoolExecutor(max_workers=workers)
+
+    with pool_context as pool:
+        pending = deque()  # (future, cost) of the jobs started, oldest first
+
+        for job, cost in zip(jobs, costs):
+            # Wait for the oldest jobs until this one fits
+            throttled = False
+            while pending and (len(pending) >= 2 * workers or (budget is not None and not budget.fits(cost))):
+                if not throttled and len(pending) < 2 * workers:
+                    throttled = True
+                    budget.throttled += 1
+                    logger.debug("Waiting for memory to start a job of about %d bytes", cost,
+                                 extra={"event": "throttle", "cost": cost, "in_flight": budget.in_flight})
+
+                future, done_cost = pending.popleft()
+                result = future.result()
+                if budget is not None:
+                    budget.release(done_cost)
+                yield result
+
+            if budget is not None:
+                budget.acquire(cost)
+            pending.append((pool.submit(func, *job), cost))
+
+        while pending:
+            future, done_cost = pending.popleft()
+            result = future.result()
+            if budget is not None:
+                budget.release(done_cost)
+            yield result
+
+
+
+def run_jobs(func, jobs, workers=1):
+    """
+    Same as iter_jobs, but returns all the results as a list.
+    """
+    return list(iter_jobs(func, jobs, workers))
 
 
 
-def generate_page(from_path, template_path, dest_path):
+def generate_page(from_path, template_path, dest_path, minify=False, highlight_cache_dir=None, block_cache_dir=None, partials_dir=None, layouts_dir=None, section="", node_cache_dir=None, stream=False, plugins=(), routes=None):
     """
-    Generates an HTML page from a markdown file using a template.
+    Generates an HTML page from a markdown file using its layout, or the template.
     
     Args:
         from_path (str): Path to the markdown file.
-        template_path (str): Path to the HTML template.
+        template_path (str): Path to the HTML template used when no layout applies.
         dest_path (str): Path where the generated HTML file will be written.
+        minify (bool): Minify the generated HTML.
+        highlight_cache_dir (str): Directory where highlighted code blocks are cached
+            between worker processes and builds.
+        block_cache_dir (str): Directory where rendered top-level blocks are cached
+            between worker processes and builds.
+        partials_dir (str): Directory the {{> path }} includes of the page and
+            the template are read from.
+        layouts_dir (str): Directory the layouts are read from.
+        section (str): The page's directory relative to the content directory,
+            which picks its layout unless the front matter names one.
+        node_cache_dir (str): Directory where the parse tree of every page is cached
+            between builds, so only pages whose markdown changed are parsed again.
+        stream (bool): Write the page while it is being rendered, one top-level
+            block at a time, for files too large to hold in memory several times
+            over. Its markdown is read a line at a time too, unless it has
+            footnotes or a plugin hooks into its markdown or parse tree. Streamed
+            pages aren't minified or cached and get an empty table of contents,
+            and pages aren't streamed while a plugin has post-render hooks.
+        plugins (tuple): The plugins to render with, as module names or .py paths.
+        routes (Routes): Resolves the internal links of the page and its layout
+            for a site served under a base URL.
+
+    Returns:
+        dict: The page's source and destination paths, title, source mtime, the
+        (line, url, kind) link targets found while parsing it, the layout files
+        and partials it is made of, its block cache hits and misses, whether
+        its markdown had to be parsed, the seconds spent in each plugin since
+        the previous page of this process and its "cost" (see costs.py), or
+        None if it couldn't be generated.
     """
-    print(f"Markdown file: {from_path}")
-    print(f"Template file: {template_path}")
-    print(f"Generating HTML at: {dest_path}")
+    start = time.perf_counter()
+    logger.debug("Generating %s from %s using %s", dest_path, from_path, template_path,
+                 extra={"event": "render", "source": from_path, "template": template_path, "dest": dest_path})
+
+    # Pages aren't streamed while a plugin has post-render hooks. A streamed page is
+    # read a line at a time as well, unless a plugin needs its whole markdown or it
+    # has footnotes, whose references can come before their definitions.
+    registry = get_registry(plugins)
+    stream = stream and not registry.post_render
+    read_lines = stream and not (registry.pre_render or registry.block_transforms)
 
     # Basic error handling for reading files
     try:
-        with open(from_path, 'r') as md_file:
-            markdown_content = md_file.read()
+        if read_lines:
+            metadata, front_matter_lines, footnotes = scan_markdown_file(from_path)
+            read_lines = not footnotes
+        if read_lines:
+            markdown_content = read_markdown_lines(from_path, front_matter_lines)
+        else:
+            with open(from_path, 'r') as md_file:
+                metadata, markdown_content = split_front_matter(md_file.read())
     except FileNotFoundError:
-        print(f"Error: Markdown file {from_path} not found.")
+        logger.error("Markdown file %s not found.", from_path, extra={"event": "missing_file", "path": from_path})
         return
 
+    # Let the plugins see the page first
+    page = {"source": from_path, "dest": dest_path, "metadata": metadata, "markdown": markdown_content}
+    for hook in registry.pre_render:
+        hook(page)
+    metadata, markdown_content = page["metadata"], page["markdown"]
+
+    # Plugins change what markdown renders to, and so do the routes when the site is
+    # served under a base URL, so what is rendered under them is cached apart, in
+    # memory as well as on disk
+    fingerprint = "-".join(part for part in (registry.fingerprint, routes.fingerprint if routes is not None else "") if part) or None
+    if fingerprint is not None and node_cache_dir:
+        node_cache_dir = os.path.join(node_cache_dir, fingerprint)
+
+    partials = get_partials(partials_dir, fingerprint) if partials_dir else None
+    block_cache = get_block_cache(block_cache_dir, fingerprint)
+    context = RenderContext(from_path, get_highlighter(highlight_cache_dir), block_cache, partials, registry, routes)
+
+    # Pick the layout, compiled with the layouts it extends the first time a page uses it
+    layouts = get_layouts(layouts_dir, partials, routes)
     try:
-        with open(template_path, 'r') as template_file:
-            template_content = template_file.read()
-    except FileNotFoundError:
-        print(f"Error: Template file {template_path} not found.")
+        layout_path = layouts.find(section, metadata.get("layout"), default=template_path)
+        layout = layouts.get(layout_path)
+    except FileNotFoundError as e:
+        logger.error("Template file %s not found.", e.filename, extra={"event": "missing_file", "path": e.filename})
+        return
+    except (IncludeError, LayoutError) as e:
+        logger.error("Error in the layout of %s: %s", from_path, e, extra={"event": "layout_error", "path": from_path})
         return
 
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
-
-
-
-
-    # Extract title
+    # Extract title, unless the front matter sets it
     try:
-        title = extract_title(markdown_content)
+        title = metadata.get("title") or extract_title(read_markdown_lines(from_path, front_matter_lines) if read_lines else markdown_content)
     except Exception as e:
-        print(f"Error extracting title: {e}")
+        logger.warning("Error extracting title from %s: %s", from_path, e, extra={"event": "no_title", "source": from_path})
         title = "Untitled"
 
-    # Replace placeholders
-    final_html = template_content.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", html_content)
-
     # Ensure destination directory exists
     os.makedirs(os.path.dirname(dest_path), exist_ok=True)
 
-    # Write the final HTML to dest_path
-    with open(dest_path, 'w') as output_file:
-        output_file.write(final_html)
-
-    print(f"Page generated successfully at {dest_path}")
-
-
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
+    cached = None
+    if stream:
+        # Write the page block by block, without holding its whole HTML in memory
+        content = iter_markdown_html(markdown_content, context)
+        if "Toc" in layout.slots:
+            # The headings are only known once the page has been written
+            logger.warning("Streamed page %s gets an empty table of contents", from_path,
+                           extra={"event": "toc_dropped", "source": from_path})
+        try:
+            values = {"Title": escape_text(title), "Content": content, "Toc": ""}
+            write_stream(dest_path, layout.render_parts(values))
+        except IncludeError as e:
+            logger.error("Error in %s: %s", from_path, e, extra={"event": "include_error", "path": from_path})
+            return
+    else:
+        # Convert markdown to HTML, unless an earlier build already parsed this markdown
+        node_cache = get_node_cache(node_cache_dir) if node_cache_dir else None
+        digest = markdown_digest(markdown_content)
+        cached = node_cache.get(from_path, digest) if node_cache is not None else None
+
+        if cached is not None:
+            html_node, links, includes, headings, counts = cached
+            context.links.extend(links)
+            context.add_includes(includes)
+            context.headings.extend(headings)
+            context.block_counts, context.inline_matches = counts["blocks"], counts["inline"]
+        else:
+            try:
+                html_node = markdown_to_html_node(markdown_content, context)
+            except IncludeError as e:
+                logger.error("Error in %s: %s", from_path, e, extra={"event": "include_error", "path": from_path})
+                return
+            if node_cache is not None:
+                node_cache.put(from_path, digest, html_node, context.links, context.includes, context.headings,
+                               {"blocks": context.block_counts, "inline": context.inline_matches})
+
+        # Fill the layout's slots, and the table of contents from the headings recorded while rendering
+        values = {"Title": escape_text(title), "Content": html_node.to_html()}
+        if "Toc" in layout.slots:
+            toc = toc_to_html_node(context.headings)
+            values["Toc"] = toc.to_html() if toc is not None else ""
+        final_html = layout.render(values)
+        if registry.post_render:
+            page["html"] = final_html
+            for hook in registry.post_render:
+                hook(page)
+            final_html = page["html"]
+
+        # Write the final HTML to dest_path, running the post-render stage if enabled
+        write_output(dest_path, final_html, minify=minify)
+
+    context.add_includes(layout.files)
+
+    return {
+        "source": from_path,
+        "dest": dest_path,
+        "title": title,
+        "mtime": os.path.getmtime(from_path),
+        "links": context.links,
+        "includes": context.includes,
+        "block_hits": context.block_hits,
+        "block_misses": context.block_misses,
+        "parsed": cached is None,
+        "plugin_times": registry.take_timings(),
+        "cost": {
+            "input_bytes": os.path.getsize(from_path),
+            "output_bytes": os.path.getsize(dest_path),
+            "blocks": context.block_counts,
+            "inline": context.inline_matches,
+            "seconds": time.perf_counter() - start,
+        },
+    }
+
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, workers=1, minify=False, generators=(), highlight_cache_dir=None, block_cache_dir=None, partials_dir=None, layouts_dir=None, node_cache_dir=None, budget=None, stream_threshold=None, plugins=(), sources=None, routes=None):
     """
     Recursively generates HTML pages from markdown files in the content directory.
     
@@ -70,62 +304,431 @@ def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
         dir_path_content (str): The root path to the content directory.
         template_path (str): The path to the HTML template file.
         dest_dir_path (str): The root path where the generated HTML files will be written.
+        workers (int): Number of worker processes used to generate the pages.
+        minify (bool): Minify the generated HTML.
+        generators (list): PageGenerator objects (sitemap, feed, listing pages) that
+            are given each page's metadata as soon as the page is generated.
+        highlight_cache_dir (str): Directory where highlighted code blocks are cached.
+        block_cache_dir (str): Directory where rendered top-level blocks are cached.
+        partials_dir (str): Directory the {{> path }} includes are read from.
+        layouts_dir (str): Directory the per-section and front matter layouts are read from.
+        node_cache_dir (str): Directory where the parse trees of the pages are cached.
+        budget (MemoryBudget): Limits how many pages are rendered at once by the
+            memory they need, estimated from the size of their markdown.
+        stream_threshold (int): Markdown files larger than this many bytes are
+            written while they are rendered instead of being held in memory whole.
+        plugins (tuple): The plugins to render with, as module names or .py paths.
+        sources (list): The markdown files to generate, instead of every one in
+            the content directory.
+        routes (Routes): Resolves the internal links for a site served under a base URL.
+
+    Returns:
+        list: The results of generate_page for the pages that were generated,
+        each with the "url" the page is served at added.
     """
-    # Walk through the content directory recursively
-    for root, dirs, files in os.walk(dir_path_content):
-        print(f"Exploring directory: {root}")  # Add this to see which directory you're in
+    jobs = []
+    costs = []
+    streamed = 0
 
-        for file in files:
-            if file.endswith(".md"):  # Only process markdown files
-                # Build full path for the markdown file
-                markdown_file_path = os.path.join(root, file)
-                
-                print(f"Processing markdown file: {markdown_file_path}")  # Add this to check the files being processed
-                
 
-                # Construct the corresponding output path in the destination directory
-                relative_path = os.path.relpath(markdown_file_path, dir_path_content)  # Get relative path from content root
-                output_file_path = os.path.join(dest_dir_path, os.path.splitext(relative_path)[0] + ".html")
-                
-                print(f"Output HTML file will be: {output_file_path}")  # Check the output path
-                
-                # Ensure the destination directory exists
-                os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+    # Walk through the content directory recursively, unless the pages are given
+    walked = sources is None
+    if walked:
+        sources = []
+        for root, dirs, files in os.walk(dir_path_content):
+            logger.debug("Exploring directory: %s", root, extra={"event": "scan", "path": root})
+            sources.extend(os.path.join(root, file) for file in files if file.endswith(".md"))  # Only process markdown files
 
-                # Call the generate_page function to generate the HTML for this markdown file
-                generate_page(markdown_file_path, template_path, output_file_path)
-                
-                print(f"Generated page from {markdown_file_path} -> {output_file_path}")
+    for markdown_file_path in sources:
+        # Construct the corresponding output path in the destination directory
+        relative_path = os.path.relpath(markdown_file_path, dir_path_content)  # Get relative path from content root
+        output_file_path = os.path.join(dest_dir_path, os.path.splitext(relative_path)[0] + ".html")
 
+        logger.debug("Queueing %s -> %s", markdown_file_path, output_file_path,
+                     extra={"event": "queue", "source": markdown_file_path, "dest": output_file_path})
 
+        # Ensure the destination directory exists
+        os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
 
+        # Very large files take the streaming path, which holds much less of them at once
+        size = os.path.getsize(markdown_file_path)
+        stream = stream_threshold is not None and size > stream_threshold
+        streamed += stream
+        costs.append(estimate_page_memory(size) if not stream else size * 2)
 
-def main():
+        # Queue the page so the pages can be generated in parallel
+        jobs.append((markdown_file_path, template_path, output_file_path, minify,
+                     highlight_cache_dir, block_cache_dir, partials_dir, layouts_dir, os.path.dirname(relative_path),
+                     node_cache_dir, stream, plugins, routes))
+
+    if walked:
+        logger.info("Found %d markdown files in %s", len(jobs), dir_path_content,
+                    extra={"event": "pages_found", "total": len(jobs)})
+    else:
+        logger.info("Generating %d pages", len(jobs), extra={"event": "pages_found", "total": len(jobs)})
+    if streamed:
+        logger.info("Streaming %d large markdown files", streamed, extra={"event": "streaming", "count": streamed})
+
+    # Call the generate_page function to generate the HTML for each markdown file
+    pages = []
+    for page in iter_jobs(generate_page, jobs, workers, costs, budget):
+        if page is None:
+            continue
+
+        logger.debug("Generated page from %s -> %s", page["source"], page["dest"],
+                     extra={"event": "page", "source": page["source"], "dest": page["dest"]})
+        page["url"] = page_url(os.path.relpath(page["dest"], dest_dir_path))
+        pages.append(page)
+
+        # Hand the page over to the generators while the rest are still being produced
+        for generator in generators:
+            generator.add_page(page)
+
+    for generator in generators:
+        generator.close()
+
+    return pages
+
+
+
+def check_links(dest_dir, static_files, pages):
+    """
+    Validates the internal links of the generated pages against everything
+    written to the output directory, and reports the broken ones.
+    
+    Args:
+        dest_dir (str): The output directory.
+        static_files (list): Paths of the files copied from the static directory.
+        pages (list): The results of generate_page.
+
+    Returns:
+        list: (source_path, line, url, kind) tuples for the broken links.
+    """
+    from links import LinkIndex
+
+    index = LinkIndex()
+
+    for path in static_files:
+        index.add_output(os.path.relpath(path, dest_dir))
+
+    for page in pages:
+        page_path = os.path.relpath(page["dest"], dest_dir)
+        index.add_output(page_path)
+        index.add_links(page["source"], page_path, page["links"])
+
+    broken = index.broken_links()
+    for source_path, line, url, kind in broken:
+        logger.warning("Broken %s in %s:%d: %s", kind, source_path, line, url,
+                       extra={"event": "broken_link", "source": source_path, "line": line, "url": url, "kind": kind})
+
+    return broken
+
+
+
+def process_static_files(static_dir, dest_dir, workers=1, minify=False, files=None):
+    """
+    Copies the static directory to the output directory, running the post-render
+    stage on the stylesheets and pages. Files that are already up to date are
+    left alone, so they keep their mtime.
+    
+    Args:
+        static_dir (str): The static directory.
+        dest_dir (str): The output directory.
+        workers (int): Number of worker processes.
+        minify (bool): Minify the CSS and HTML files.
+        files (list): The files of the static directory, if they're already known.
+
+    Returns:
+        list: The paths of the files written to (or kept in) the output directory.
+    """
+    outputs = []
+    jobs = []
+
+    if files is None:
+        pairs = list_files(static_dir, dest_dir)
+    else:
+        pairs = [(path, os.path.join(dest_dir, os.path.relpath(path, static_dir))) for path in files]
+
+    for src_path, dest_path in pairs:
+        outputs.append(dest_path)
+
+        if minify and dest_path.endswith((".css", ".html")):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            jobs.append((src_path, dest_path, minify))
+        else:
+            copy_if_changed(src_path, dest_path)
+
+    run_jobs(process_static_file, jobs, workers)
+    return outputs
 
-    # Change the working directory to the project root
-    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    # Define the source and destination directories
-    src_dir = "static"  # Your static source files should be here
-    dest_dir = "public"  # Your generated public files go here
-    content_file = "content" # The markdown file
-    template_file = "static/template.html"  # The HTML template
-    output_file = "public" # The generated HTML folder
 
+def precompress_outputs(paths, workers=1):
+    """
+    Writes .gz/.br siblings next to the text files of the output directory,
+    in parallel, leaving the ones that are still up to date alone.
+
+    Args:
+        paths (iterable): Every file written to (or kept in) the output directory.
+        workers (int): Number of worker processes.
+
+    Returns:
+        list: The paths of the compressed siblings.
+    """
+    jobs = [(path,) for path in sorted(paths) if path.endswith(PRECOMPRESSED_TYPES)]
+    return [sibling for siblings in run_jobs(precompress_output, jobs, workers) for sibling in siblings]
+
+
+
+def discover_files(config):
+    """
+    Scans the content and static directories once for the whole build, in
+    parallel per top-level directory, through the directory snapshot kept in
+    the cache directory (see DirectorySnapshot).
+
+    Returns:
+        tuple: The markdown files of the content directory and the files of
+        the static directory.
+    """
+    snapshot_path = config.cache_path("directories.json")
+    snapshot = DirectorySnapshot.load(snapshot_path) if snapshot_path else DirectorySnapshot()
+
+    markdown_files = [path for path in snapshot.scan(config.content_dir, config.workers) if path.endswith(".md")]
+    static_files = snapshot.scan(config.static_dir, config.workers)
+
+    if snapshot_path:
+        snapshot.save(snapshot_path)
+
+    logger.info("Found %d markdown files and %d static files, listing %d of %d directories",
+                len(markdown_files), len(static_files), len(snapshot.directories) - snapshot.reused,
+                len(snapshot.directories),
+                extra={"event": "discovery", "directories": len(snapshot.directories), "reused": snapshot.reused})
+    return markdown_files, static_files
+
+
+
+def write_deploy_manifest(config, outputs, known=None):
+    """
+    Removes what the previous build wrote but this one didn't, then lists the
+    output directory in a deploy manifest and compares it with the previous
+    build's manifest.
     
-    # content_file = "content/index.md" Just for one file
-    # template_file = "static/template.html" 
-    # output_file = "public/index.html"  Just for one file
+    Args:
+        config (BuildConfig): The build's config; the manifest and the changes
+            are saved as manifest.json and changes.json in its cache directory.
+        outputs (set): Paths of every file the build produced.
+        known (dict): Manifest entries this build already computed, reused
+            like the previous build's for the files that weren't written since.
+
+    Returns:
+        dict: The sorted "added", "changed" and "removed" output paths.
+    """
+    from deploy import build_manifest, diff_manifests, load_manifest, remove_stale_files, save_json
+
+    remove_stale_files(config.output_dir, outputs)
+
+    manifest_path = config.cache_path("manifest.json")
+    previous = load_manifest(manifest_path) if manifest_path else {}
+    manifest = build_manifest(config.output_dir, {**previous, **(known or {})})
+    changes = diff_manifests(previous, manifest)
+
+    if manifest_path:
+        save_json(manifest_path, {"files": manifest})
+        save_json(config.cache_path("changes.json"), changes)
+
+    logger.info("%d files added, %d changed, %d removed since the last build",
+                len(changes["added"]), len(changes["changed"]), len(changes["removed"]),
+                extra={"event": "changes", **{key: len(paths) for key, paths in changes.items()}})
+    return changes
+
+
+
+
+def build(config, index=None, changed=None):
+    """
+    Builds the site described by a BuildConfig.
+
+    Everything the build needs comes from the config, nothing from the working
+    directory or module state, so it can be called repeatedly, for different
+    trees, in the same process. The caches a process keeps between builds
+    (blocks, partials, layouts) are keyed by the directories they come from
+    and the fingerprint of the plugins and routes, so builds with another
+    config never share what was rendered. Optional stages are only imported when enabled.
+    With the staged stage, the build is published all at once (see StagedPublisher).
+
+    Args:
+        config (BuildConfig): Paths, worker count, cache directory and enabled stages.
+        index (SiteIndex): What the previous build in this process left behind,
+            updated with this build's pages.
+        changed (list): The files that changed since the previous build. With
+            an index, only the pages they affect are generated again, unless
+            that takes a full build (see SiteIndex.pages_to_rebuild).
+
+    Returns:
+        dict: The build report: whether it was a full build, the number of
+        pages generated and static files written, the broken links found, the
+        files added, changed and removed since the last build, the block and
+        parse tree cache statistics, the peak memory use and throttling, the
+        seconds spent in each plugin (slowest first) and the duration in seconds.
+    """
+    if not config.enabled("staged"):
+        return build_into(config, index, changed)
+
+    # Write a new generation of the output directory and publish it once it's complete
+    from copy import copy
+    from publish import StagedPublisher
+
+    publisher = StagedPublisher(config.output_dir)
+    staging_config = copy(config)
+    staging_config.output_dir = publisher.prepare()
+    try:
+        report = build_into(staging_config, index, changed)
+    except BaseException:
+        publisher.discard()
+        raise
+    publisher.publish()
+    return report
 
 
 
-    # Call the function to clear and copy static files to the public directory
-    clear_and_copy(src_dir, dest_dir)
+def build_into(config, index=None, changed=None):
+    """
+    Runs a build, writing to config.output_dir itself, see build.
+    """
+    start = time.perf_counter()
+    minify = config.enabled("minify")
+
+    # Load the plugins here first, so a broken one stops the build before any work is done
+    registry = get_registry(config.plugins)
+    precompress = config.enabled("precompress")
+
+    index = index if index is not None else SiteIndex()
+    index.move_to(config.output_dir)
+    sources = index.pages_to_rebuild(changed)
+    full = sources is None
+
+    if full:
+        # Find the pages and static files, listing only the directories that changed since the last build
+        sources, static_sources = discover_files(config)
+
+        # Copy the static files to the output directory, leaving the ones already there alone
+        index.static_files = process_static_files(config.static_dir, config.output_dir, config.workers, minify, static_sources)
+
+        # The route table the links are resolved through, for a site served under a base URL
+        index.routes = None
+        if config.base_url.strip("/"):
+            page_urls = (page_url(os.path.splitext(os.path.relpath(source, config.content_dir))[0] + ".html") for source in sources)
+            index.routes = Routes.from_pages(config.base_url, page_urls)
+    static_files = index.static_files
+    routes = index.routes
+
+    # Generators fed with every page as it is produced
+    generators = []
+    if config.enabled("sitemap") or config.enabled("feed") or config.enabled("listing"):
+        from feeds import AtomFeedWriter, ListingWriter, SitemapWriter
+
+        if config.enabled("sitemap"):
+            generators.append(SitemapWriter(config.output_dir, config.site_url))
+        if config.enabled("feed"):
+            generators.append(AtomFeedWriter(config.output_dir, config.site_url, config.site_title))
+        if config.enabled("listing"):
+            generators.append(ListingWriter(config.output_dir, config.template, config.site_title,
+                                            page_size=config.listing_page_size, routes=routes, minify=minify))
+
+    # Generate the pages, within the memory budget. What every process holds
+    # before rendering anything (roughly what this one holds now) is set aside.
+    budget = MemoryBudget(
+        config.memory_budget * MB if config.memory_budget else None,
+        reserved=(current_rss() or 0) * (config.workers + 1),
+    )
+    stream_threshold = config.stream_threshold * MB if config.stream_threshold else None
+
+    generated = generate_pages_recursive(
+        config.content_dir, config.template, config.output_dir, config.workers,
+        minify, generators if full else (), config.cache_path("highlight"), config.cache_path("blocks"),
+        config.partials_dir, config.layouts_dir, config.cache_path("nodes"), budget, stream_threshold,
+        config.plugins, sources, routes,
+    )
+    index.update(generated, full)
+    pages = list(index.pages.values())
+
+    # Pages that weren't generated again are fed to the generators from the index
+    if not full:
+        for generator in generators:
+            for page in pages:
+                generator.add_page(page)
+            generator.close()
+
+    # What each page cost to build, to find the pages that slow the build down
+    if config.enabled("costs"):
+        from costs import write_cost_report
+
+        write_cost_report(config.report_dir, pages, config.content_dir)
+
+    # Report internal links that point nowhere
+    broken_links = check_links(config.output_dir, static_files, pages) if config.enabled("links") else []
+
+    # Clean up, and list what changed for the deploy
+    outputs = set(static_files)
+    outputs.update(page["dest"] for page in pages)
+    for generator in generators:
+        outputs.update(generator.outputs)
+
+    # Precache every output in a service worker, by content hash
+    precached = {}
+    if config.enabled("offline"):
+        from deploy import load_manifest
+        from offline import precache_entries, write_offline_files
+
+        manifest_path = config.cache_path("manifest.json")
+        precached = precache_entries(config.output_dir, outputs, load_manifest(manifest_path) if manifest_path else {})
+        outputs.update(write_offline_files(config.output_dir, precached))
+
+    # Compress every text file of the site at once, whichever stage wrote it
+    if precompress:
+        outputs.update(precompress_outputs(outputs, config.workers))
+
+    changes = write_deploy_manifest(config, outputs, precached)
+
+    # Every worker process has its own block cache, so add up what each page saw
+    block_hits = sum(page["block_hits"] for page in generated)
+    block_misses = sum(page["block_misses"] for page in generated)
+    lookups = block_hits + block_misses
+    parsed = sum(1 for page in generated if page["parsed"])
+
+    # Every worker process times the plugins on its own as well
+    plugin_times = dict.fromkeys(registry.plugins, 0.0)
+    for page in generated:
+        for name, seconds in page["plugin_times"].items():
+            plugin_times[name] = plugin_times.get(name, 0.0) + seconds
+
+    return {
+        "full": full,
+        "pages": len(generated),
+        "static_files": len(static_files) if full else 0,
+        "broken_links": broken_links,
+        "changes": changes,
+        "block_cache": {
+            "hits": block_hits,
+            "misses": block_misses,
+            "hit_rate": block_hits / lookups if lookups else 0.0,
+        },
+        "node_cache": {"hits": len(generated) - parsed, "misses": parsed},
+        "memory": budget.report(),
+        "plugins": dict(sorted(plugin_times.items(), key=lambda item: item[1], reverse=True)),
+        "duration": time.perf_counter() - start,
+    }
+
+
+
+def main():
+    # Without a config file or --root, build the project this file belongs to
+    from cli import main as cli_main
 
-    # Generate the page
-    generate_pages_recursive(content_file, template_file, output_file)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return cli_main(default_root=project_root)
 
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,261 @@
+import gzip
+import hashlib
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, .br siblings are skipped without it
+    brotli = None
+
+
+# Elements whose contents must be written out untouched
+PRESERVED_HTML = re.compile(
+    r'(<(pre|code|textarea|script|style)\b.*?</\2\s*>)',
+    re.IGNORECASE | re.DOTALL,
+)
+HTML_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+
+# Outputs worth writing .gz/.br siblings of
+PRECOMPRESSED_TYPES = (".html", ".css", ".js", ".json", ".xml", ".svg", ".txt")
+
+CSS_STRING = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+
+def minify_html(html):
+    """
+    Minifies an HTML document.
+
+    Formatting whitespace between tags is removed, other whitespace runs are
+    collapsed to a single space, and comments are stripped. The contents of
+    <pre>, <code>, <textarea>, <script> and <style> are left as they are.
+    """
+    parts = PRESERVED_HTML.split(html)
+    result = []
+
+    # split() yields [text, preserved, tag name, text, preserved, tag name, ...]
+    for i in range(0, len(parts), 3):
+        text = parts[i]
+        text = HTML_COMMENT.sub('', text)
+        text = re.sub(r'>\s*\n\s*<', '><', text)  # Whitespace used only for layout
+
+        # Same for layout whitespace touching a preserved element
+        if i > 0:
+            text = re.sub(r'^\s*\n\s*(?=<|$)', '', text)
+        if i + 1 < len(parts):
+            text = re.sub(r'(^|>)\s*\n\s*$', r'\1', text)
+
+        text = re.sub(r'\s+', ' ', text)
+        result.append(text)
+
+        if i + 1 < len(parts):
+            result.append(parts[i + 1])
+
+    return "".join(result).strip()
+
+
+def minify_css(css):
+    """
+    Minifies a stylesheet by removing comments and redundant whitespace.
+    String literals are left untouched.
+    """
+    parts = CSS_STRING.split(css)
+    result = []
+
+    for i, part in enumerate(parts):
+        if i % 2:
+            # Odd parts are the quoted strings captured by the split
+            result.append(part)
+            continue
+
+        part = CSS_COMMENT.sub('', part)
+        part = re.sub(r'\s+', ' ', part)
+        part = re.sub(r'\s*([{};,>])\s*', r'\1', part)
+        part = re.sub(r':\s+', ':', part)
+        part = part.replace(';}', '}')
+        result.append(part)
+
+    return "".join(result).strip()
+
+
+def file_digest(path):
+    """
+    Returns the SHA-256 hex digest of a file, or None if it doesn't exist.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def write_atomic(path, data):
+    """
+    Writes a file through a temporary file moved over it, so readers never
+    see a partial file, and a file hardlinked from another directory (see
+    publish.py) is replaced instead of written into.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def precompress_file(path, data):
+    """
+    Writes the .gz and (if brotli is installed) .br siblings of a file.
+    """
+    # mtime=0 keeps the gzip output byte-for-byte reproducible
+    write_atomic(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+
+    if brotli is not None:
+        write_atomic(path + ".br", brotli.compress(data, quality=11))
+
+
+def has_precompressed(path):
+    """
+    Checks whether all the compressed siblings of a file are present and
+    written after it. A file whose content didn't change keeps its mtime
+    (see write_output), so its siblings are still up to date.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+        return all(os.path.getmtime(sibling) >= mtime for sibling in compressed_siblings(path))
+    except FileNotFoundError:
+        return False
+
+
+def write_output(dest_path, content, minify=False, precompress=False):
+    """
+    Runs the post-render stage for a single output file and writes it.
+
+    Args:
+        dest_path (str): Path of the output file.
+        content (str): The rendered HTML or CSS.
+        minify (bool): Minify the content based on the file extension.
+        precompress (bool): Write .gz/.br siblings next to the output.
+
+    Returns:
+        str: The SHA-256 hex digest of the written content.
+    """
+    if minify:
+        if dest_path.endswith(".html"):
+            content = minify_html(content)
+        elif dest_path.endswith(".css"):
+            content = minify_css(content)
+
+    data = content.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+
+    # Leave the file and its siblings alone if the output hasn't changed
+    if file_digest(dest_path) == digest and (not precompress or has_precompressed(dest_path)):
+        return digest
+
+    write_atomic(dest_path, data)
+
+    if precompress:
+        precompress_file(dest_path, data)
+
+    return digest
+
+
+def write_stream(dest_path, parts, precompress=False):
+    """
+    Writes an output file from an iterable of strings, without joining them,
+    through a temporary file that only replaces dest_path if its content changed.
+
+    Args:
+        dest_path (str): Path of the output file.
+        parts (iterable): The strings the file is made of.
+        precompress (bool): Write .gz/.br siblings next to the output.
+    """
+    temp_path = f"{dest_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as output_file:
+            for part in parts:
+                output_file.write(part)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    if replace_if_changed(temp_path, dest_path) or (precompress and not has_precompressed(dest_path)):
+        if precompress:
+            precompress_stream(dest_path)
+
+
+def precompress_stream(path, chunk_size=1 << 20):
+    """
+    Same as precompress_file, but reads the file in chunks instead of taking its content.
+    """
+    compressor = brotli.Compressor(quality=11) if brotli is not None else None
+    gz_temp_path = f"{path}.gz.{os.getpid()}.tmp"
+    br_temp_path = f"{path}.br.{os.getpid()}.tmp"
+
+    with open(path, 'rb') as source, open(gz_temp_path, 'wb') as gz_file:
+        gz_output = gzip.GzipFile(fileobj=gz_file, mode='wb', compresslevel=9, mtime=0, filename="")
+        br_file = open(br_temp_path, 'wb') if compressor is not None else None
+        try:
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                gz_output.write(chunk)
+                if compressor is not None:
+                    br_file.write(compressor.process(chunk))
+            gz_output.close()
+            if compressor is not None:
+                br_file.write(compressor.finish())
+        finally:
+            if br_file is not None:
+                br_file.close()
+
+    # Like write_atomic, only moved into place once complete
+    os.replace(gz_temp_path, path + ".gz")
+    if compressor is not None:
+        os.replace(br_temp_path, path + ".br")
+
+
+def precompress_output(path):
+    """
+    Writes the compressed siblings of an output file, a chunk at a time,
+    unless they are up to date with it.
+
+    Returns:
+        list: The paths of the siblings.
+    """
+    if not has_precompressed(path):
+        precompress_stream(path)
+    return compressed_siblings(path)
+
+
+def process_static_file(path, dest_path=None, minify=False, precompress=False):
+    """
+    Runs the post-render stage on a file from the static directory, writing
+    the result to dest_path (in place if not given).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    return write_output(dest_path or path, content, minify=minify, precompress=precompress)
+
+
+def compressed_siblings(path):
+    """
+    Returns the paths of the compressed siblings precompress_file writes for a file.
+    """
+    return [path + ".gz"] + ([path + ".br"] if brotli is not None else [])
+
+
+def replace_if_changed(temp_path, dest_path):
+    """
+    Moves a finished temporary file over dest_path, unless dest_path already
+    has the same content, in which case it is kept (with its mtime) and the
+    temporary file removed.
+
+    Returns:
+        bool: Whether dest_path was replaced.
+    """
+    if file_digest(temp_path) == file_digest(dest_path):
+        os.remove(temp_path)
+        return False
+
+    os.replace(temp_path, dest_path)
+    return True
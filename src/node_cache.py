@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array
+from block_cache import RENDER_VERSION
+from htmlnode import LeafNode, ParentNode
+
+
+# File layout: MAGIC, then the string count, the int count and the byte length
+# of the UTF-8 string blob, then the string lengths, the ints and the blob
+MAGIC = b"SSGN\x01"
+HEADER = struct.Struct("<III")
+
+# Record types in the int stream
+_LEAF, _PARENT, _TEXT = 0, 1, 2
+
+# Types of attribute values
+_STR, _INT, _TRUE, _FALSE, _NONE = 0, 1, 2, 3, 4
+
+
+def _ints(values=()):
+    ints = array('I', values)
+    if ints.itemsize != 4:
+        ints = array('L', values)
+    return ints
+
+
+def dump_nodes(node):
+    """
+    Serializes an HTMLNode tree to bytes.
+
+    Every distinct string (tags, attribute names and values, leaf values, raw
+    HTML children) is stored once in a string table, and the tree itself is a
+    flat array of ints, written in preorder: a record type, then the node's
+    fields as string table indexes, with parents followed by their children.
+    """
+    strings = []
+    indexes = {}
+    ints = _ints()
+
+    def string(value):
+        index = indexes.get(value)
+        if index is None:
+            index = indexes[value] = len(strings)
+            strings.append(value)
+        return index
+
+    def optional_string(value):
+        # 0 is None, anything else is a string table index + 1
+        return 0 if value is None else string(value) + 1
+
+    def add_props(props):
+        ints.append(len(props) if props else 0)
+        for key, value in (props or {}).items():
+            ints.append(string(key))
+            if value is True:
+                ints.extend((_TRUE, 0))
+            elif value is False:
+                ints.extend((_FALSE, 0))
+            elif value is None:
+                ints.extend((_NONE, 0))
+            elif isinstance(value, int):
+                ints.extend((_INT, string(str(value))))
+            elif isinstance(value, str):
+                ints.extend((_STR, string(value)))
+            else:
+                raise ValueError(f"Can't serialize attribute value {value!r}")
+
+    def add(node):
+        # Nodes are told apart by their attributes, anything else is a raw HTML child
+        if isinstance(node, str) or not hasattr(node, "tag"):
+            ints.extend((_TEXT, string(str(node))))
+        elif hasattr(node, "is_root"):
+            ints.extend((_PARENT, optional_string(node.tag)))
+            add_props(node.props)
+            ints.extend((1 if node.is_root else 0, len(node.children)))
+            for child in node.children:
+                add(child)
+        else:
+            ints.extend((_LEAF, optional_string(node.tag)))
+            add_props(node.props)
+            ints.append(optional_string(node.value))
+
+    add(node)
+
+    lengths = _ints(len(value) for value in strings)
+    blob = "".join(strings).encode('utf-8', 'surrogatepass')
+
+    if sys.byteorder == 'big':
+        lengths.byteswap()
+        ints.byteswap()
+
+    return b"".join((
+        MAGIC,
+        HEADER.pack(len(strings), len(ints), len(blob)),
+        lengths.tobytes(),
+        ints.tobytes(),
+        blob,
+    ))
+
+
+def load_nodes(data):
+    """
+    Rebuilds the HTMLNode tree serialized by dump_nodes.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a serialized node tree")
+
+    position = len(MAGIC)
+    string_count, int_count, blob_size = HEADER.unpack_from(data, position)
+    position += HEADER.size
+
+    lengths = _ints()
+    lengths.frombytes(data[position:position + string_count * lengths.itemsize])
+    position += string_count * lengths.itemsize
+
+    ints = _ints()
+    ints.frombytes(data[position:position + int_count * ints.itemsize])
+    position += int_count * ints.itemsize
+
+    if sys.byteorder == 'big':
+        lengths.byteswap()
+        ints.byteswap()
+
+    # Decode the blob once and cut the strings out of it
+    text = data[position:position + blob_size].decode('utf-8', 'surrogatepass')
+    strings = []
+    offset = 0
+    for length in lengths:
+        strings.append(text[offset:offset + length])
+        offset += length
+
+    next_int = iter(ints).__next__
+
+    def optional_string():
+        index = next_int()
+        return None if index == 0 else strings[index - 1]
+
+    def read_props():
+        count = next_int()
+        if not count:
+            return None
+
+        props = {}
+        for _ in range(count):
+            key = strings[next_int()]
+            kind = next_int()
+            value = next_int()
+            if kind == _STR:
+                props[key] = strings[value]
+            elif kind == _INT:
+                props[key] = int(strings[value])
+            else:
+                props[key] = True if kind == _TRUE else False if kind == _FALSE else None
+        return props
+
+    def read():
+        kind = next_int()
+        if kind == _TEXT:
+            return strings[next_int()]
+
+        tag = optional_string()
+        props = read_props()
+        if kind == _LEAF:
+            return LeafNode(value=optional_string(), tag=tag, props=props)
+
+        is_root = next_int() == 1
+        children = [read() for _ in range(next_int())]
+        return ParentNode(children=children, tag=tag, props=props, is_root=is_root)
+
+    return read()
+
+
+def markdown_digest(markdown):
+    """
+    Returns the key a parse tree is cached under: a hash of the markdown and the renderer version.
+    """
+    return hashlib.sha256(f"{RENDER_VERSION}\n{markdown}".encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+class NodeCache:
+    """
+    Keeps the parse tree of every source file on disk, with the links,
+    headings, partials and block and inline rule counts recorded while it was
+    parsed, so a page whose markdown and partials didn't change is rendered
+    without running the markdown parser.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, source_path):
+        name = hashlib.sha256(os.path.abspath(source_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.node")
+
+    def get(self, source_path, digest):
+        """
+        Returns the (node, links, includes, headings, counts) cached for a source file, or None if
+        there is nothing cached for this markdown or one of its partials changed.
+        """
+        try:
+            with open(self._path(source_path), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            (meta_size,) = struct.unpack_from("<I", data)
+            meta = json.loads(data[4:4 + meta_size])
+        except (struct.error, ValueError):
+            return None
+
+        if meta["digest"] != digest:
+            return None
+        try:
+            if any(os.path.getmtime(path) != mtime for path, mtime in meta["includes"].items()):
+                return None
+        except FileNotFoundError:
+            return None
+
+        try:
+            node = load_nodes(data[4 + meta_size:])
+        except ValueError:
+            return None
+        return (node, [tuple(link) for link in meta["links"]], list(meta["includes"]),
+                [tuple(heading) for heading in meta["headings"]], meta["counts"])
+
+    def put(self, source_path, digest, node, links, includes, headings=(), counts=None):
+        """
+        Stores the parse tree of a source file. counts holds its "blocks" by
+        kind and "inline" matches by rule, for the cost report.
+        """
+        meta = json.dumps({
+            "digest": digest,
+            "links": links,
+            "includes": {path: os.path.getmtime(path) for path in includes},
+            "headings": list(headings),
+            "counts": counts or {"blocks": {}, "inline": {}},
+        }).encode('utf-8')
+
+        # Write to a temporary file first so another process never reads a partial entry
+        path = self._path(source_path)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(struct.pack("<I", len(meta)))
+            f.write(meta)
+            f.write(dump_nodes(node))
+        os.replace(temp_path, path)
+
+
+_node_caches = {}
+
+
+def get_node_cache(cache_dir):
+    """
+    Returns the NodeCache of this process for a cache directory.
+    """
+    if cache_dir not in _node_caches:
+        _node_caches[cache_dir] = NodeCache(cache_dir)
+    return _node_caches[cache_dir]
@@ -0,0 +1,129 @@
+import json
+import os
+from deploy import file_entry
+from minify import compressed_siblings, write_output
+
+
+SERVICE_WORKER = "sw.js"
+PRECACHE_MANIFEST = "precache-manifest.json"
+
+# Characters of the content hash kept as a file's revision
+REVISION_LENGTH = 16
+
+# Cache-first service worker. Every file is cached under its URL plus its
+# revision, so installing a new worker only downloads the files whose
+# revision changed, and activating it drops the entries no longer listed.
+SERVICE_WORKER_SCRIPT = """// Generated by the build from precache-manifest.json, don't edit
+const CACHE = "ssg-precache";
+const PRECACHE = %s;
+
+// Absolute URL -> cache key, resolved against the worker's scope so the site can live under any path
+const keys = new Map(PRECACHE.map(([path, revision]) => {
+  const url = new URL(path, self.registration.scope).href;
+  return [url, url + "?__revision=" + revision];
+}));
+
+self.addEventListener("install", event => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(CACHE);
+    const cached = new Set((await cache.keys()).map(request => request.url));
+    await Promise.all([...keys].filter(([, key]) => !cached.has(key)).map(async ([url, key]) => {
+      const response = await fetch(url, {cache: "no-cache"});
+      if (!response.ok) {
+        throw new Error(`Precaching ${url} failed with ${response.status}`);
+      }
+      await cache.put(key, response);
+    }));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener("activate", event => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(CACHE);
+    const current = new Set(keys.values());
+    await Promise.all((await cache.keys()).filter(request => !current.has(request.url)).map(request => cache.delete(request)));
+    await self.clients.claim();
+  })());
+});
+
+function cacheKey(href) {
+  const url = new URL(href);
+  url.search = "";
+  url.hash = "";
+  const path = url.href;
+  return keys.get(path) || keys.get(path.endsWith("/") ? path + "index.html" : path + ".html");
+}
+
+self.addEventListener("fetch", event => {
+  if (event.request.method !== "GET") {
+    return;
+  }
+  const key = cacheKey(event.request.url);
+  if (key !== undefined) {
+    event.respondWith(caches.open(CACHE)
+      .then(cache => cache.match(key))
+      .then(response => response || fetch(event.request)));
+  }
+});
+"""
+
+
+def precache_entries(output_dir, outputs, previous=None):
+    """
+    Hashes the files to precache: every output except the precompressed
+    siblings and the service worker files themselves.
+
+    Args:
+        output_dir (str): The directory the site was written to.
+        outputs (set): Paths of every file the build produced.
+        previous (dict): The previous build's deploy manifest, whose hashes
+            are reused for the files that weren't written since.
+
+    Returns:
+        dict: Paths relative to output_dir, with "/" separators, mapped to
+        their deploy manifest entries.
+    """
+    previous = previous or {}
+    skipped = {SERVICE_WORKER, PRECACHE_MANIFEST}
+    entries = {}
+
+    for path in outputs:
+        relative_path = os.path.relpath(path, output_dir).replace(os.sep, "/")
+        if relative_path in skipped or relative_path.endswith((".gz", ".br")):
+            continue
+        entries[relative_path] = file_entry(path, previous.get(relative_path))
+
+    return dict(sorted(entries.items()))
+
+
+def write_offline_files(output_dir, entries, precompress=False):
+    """
+    Writes the precache manifest and the service worker that precaches it.
+    Both are left alone when no revision changed.
+
+    Args:
+        output_dir (str): The directory the site was written to.
+        entries (dict): The files to precache, as returned by precache_entries.
+        precompress (bool): Write .gz/.br siblings next to both files.
+
+    Returns:
+        list: Paths of the files written, siblings included.
+    """
+    precache = [[path, entry["sha256"][:REVISION_LENGTH]] for path, entry in entries.items()]
+    precache_json = json.dumps(precache, separators=(",", ":"))
+
+    files = {
+        PRECACHE_MANIFEST: precache_json + "\n",
+        SERVICE_WORKER: SERVICE_WORKER_SCRIPT % precache_json,
+    }
+
+    outputs = []
+    for name, content in files.items():
+        path = os.path.join(output_dir, name)
+        write_output(path, content, precompress=precompress)
+        outputs.append(path)
+        if precompress:
+            outputs.extend(compressed_siblings(path))
+
+    return outputs
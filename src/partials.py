@@ -0,0 +1,163 @@
+import os
+import re
+from render_context import RenderContext
+from utils import markdown_to_html_node
+
+
+# An include anywhere in a template, e.g. <footer>{{> footer.html }}</footer>
+TEMPLATE_INCLUDE = re.compile(r'\{\{>[ \t]*(\S+?)[ \t]*\}\}')
+
+
+class IncludeError(Exception):
+    pass
+
+
+class Partials:
+    """
+    Renders the files pulled in with {{> path }}, from a partials directory.
+
+    Markdown partials (.md) are rendered to HTML, anything else is included
+    as is, with its own includes expanded. Each partial is rendered once and
+    kept, with the partials it includes and the links found in it, until it
+    or one of the partials it includes changes.
+    """
+    def __init__(self, partials_dir):
+        self.partials_dir = os.path.abspath(partials_dir)
+        self.cache = {}  # (path, routes fingerprint) -> (mtimes, html, includes, links)
+        self.templates = {}  # template path -> (mtimes, html, includes)
+
+    def resolve(self, name):
+        """
+        Returns the path of a partial, which has to be inside the partials directory.
+        """
+        path = os.path.normpath(os.path.join(self.partials_dir, name))
+        if os.path.commonpath([path, self.partials_dir]) != self.partials_dir:
+            raise IncludeError(f"Partial outside of {self.partials_dir}: {name}")
+        return path
+
+    def render(self, name, context=None):
+        """
+        Renders a partial for the page (or partial) being rendered with context.
+
+        Returns:
+            tuple: The HTML, the paths of the partials it pulled in (itself
+            first) and the (line, url, kind) links found in it.
+        """
+        path = self.resolve(name)
+        stack = context.include_stack if context is not None else ()
+
+        if path in stack:
+            chain = " -> ".join(os.path.relpath(p, self.partials_dir) for p in stack + (path,))
+            raise IncludeError(f"Include cycle: {chain}")
+
+        # Partials in templates are rendered without routes, their links are
+        # resolved with the rest of the template (see Layouts.get)
+        routes = context.routes if context is not None else None
+        key = (path, routes.fingerprint if routes is not None else None)
+        cached = self.cache.get(key)
+        if cached is not None and files_unchanged(cached[0]):
+            return cached[1:]
+
+        try:
+            with open(path, 'r', encoding='utf-8') as partial_file:
+                text = partial_file.read()
+        except FileNotFoundError:
+            raise IncludeError(f"Partial not found: {name}")
+
+        # Render it with a context of its own, which knows every partial on the way to it
+        partial_context = RenderContext(path, context.highlighter if context is not None else None, partials=self,
+                                        registry=context.registry if context is not None else None,
+                                        routes=context.routes if context is not None else None)
+        partial_context.include_stack = stack + (path,)
+
+        if path.endswith(".md"):
+            html = markdown_to_html_node(text, partial_context).to_html()
+        else:
+            html = self._expand(text, partial_context)
+
+        includes = [path] + partial_context.includes
+        result = (html, includes, partial_context.links)
+        self.cache[key] = (file_mtimes(includes),) + result
+        return result
+
+    def template(self, template_path, context=None):
+        """
+        Returns a template with its includes expanded, and the partials it pulled in.
+        """
+        cached = self.templates.get(template_path)
+        if cached is not None and files_unchanged(cached[0]):
+            return cached[1:]
+
+        with open(template_path, 'r') as template_file:
+            text = template_file.read()
+
+        template_context = RenderContext(template_path, context.highlighter if context is not None else None, partials=self,
+                                         registry=context.registry if context is not None else None)
+        html = self._expand(text, template_context)
+
+        self.templates[template_path] = (file_mtimes([template_path] + template_context.includes), html, template_context.includes)
+        return html, template_context.includes
+
+    def _expand(self, text, context):
+        def replace_include(match):
+            html, includes, links = self.render(match.group(1), context)
+            context.add_includes(includes)
+            return html
+
+        return TEMPLATE_INCLUDE.sub(replace_include, text)
+
+
+def file_mtimes(paths):
+    return {path: os.path.getmtime(path) for path in paths}
+
+
+def files_unchanged(mtimes):
+    try:
+        return all(os.path.getmtime(path) == mtime for path, mtime in mtimes.items())
+    except FileNotFoundError:
+        return False
+
+
+_partials = {}
+
+
+def get_partials(partials_dir, fingerprint=None):
+    """
+    Returns the Partials of this process for a partials directory, so every
+    page a worker process renders shares the rendered partials. Partials
+    render differently under other plugins and routes, so each fingerprint of
+    what they render to gets rendered partials of its own.
+    """
+    key = (partials_dir, fingerprint)
+    if key not in _partials:
+        _partials[key] = Partials(partials_dir)
+    return _partials[key]
+
+
+class IncludeGraph:
+    """
+    Which pages include which files (layouts, the template and partials),
+    directly or through other partials, and the other way around, so the
+    pages an edit to a file affects are a single lookup.
+    """
+    def __init__(self):
+        self.pages = {}  # page source -> paths it includes
+        self.users = {}  # included path -> sources of the pages including it
+
+    def add_page(self, source, includes):
+        self.remove_page(source)
+        self.pages[source] = sorted(set(includes))
+        for path in self.pages[source]:
+            self.users.setdefault(path, set()).add(source)
+
+    def remove_page(self, source):
+        for path in self.pages.pop(source, ()):
+            self.users[path].discard(source)
+            if not self.users[path]:
+                del self.users[path]
+
+    def dependents(self, path):
+        """
+        Returns the sources of the pages that include a file.
+        """
+        return sorted(self.users.get(path, ()))
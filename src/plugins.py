@@ -0,0 +1,154 @@
+import hashlib
+import importlib
+import importlib.util
+import os
+import time
+
+
+class PluginError(Exception):
+    pass
+
+
+class Registry:
+    """
+    The block renderers, block transforms, inline rules and page hooks the
+    render pipeline dispatches to.
+
+    Block renderers are looked up by block kind in a dict. Inline rules run
+    in order, each with the string the text must contain for the rule to
+    have anything to do (its trigger), so a rule is skipped on text that
+    can't contain its syntax instead of being run for nothing.
+
+    A plugin is a module with a register(registry) function that calls the
+    add_* methods. Everything a plugin adds is timed: the seconds spent in
+    each plugin's functions, including what they call, add up in timings.
+    """
+    def __init__(self):
+        self.block_renderers = {}  # block kind -> render(block, context, tight)
+        self.block_transforms = []  # transform(document, context), run on the parsed block tree
+        self.inline_rules = []  # (name, trigger, rule(text, context, line))
+        self.pre_render = []  # hook(page), before the markdown is rendered
+        self.post_render = []  # hook(page), before the page is written
+        self.plugins = []  # Names of the plugins loaded, in order
+        self.timings = {}  # Plugin name -> seconds spent in it by this process
+        self.fingerprint = ""  # Changes with the plugins loaded and their code
+        self._plugin = None  # Plugin whose register() is running
+
+    def copy(self):
+        registry = Registry()
+        registry.block_renderers = dict(self.block_renderers)
+        registry.block_transforms = list(self.block_transforms)
+        registry.inline_rules = list(self.inline_rules)
+        registry.pre_render = list(self.pre_render)
+        registry.post_render = list(self.post_render)
+        return registry
+
+    def _timed(self, function):
+        if self._plugin is None:
+            return function
+
+        name = self._plugin
+        timings = self.timings
+
+        def timed(*args):
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        return timed
+
+    def add_block_renderer(self, kind, render):
+        """
+        Renders the blocks of a kind to an HTMLNode (or an HTML string), in place
+        of the renderer registered for that kind so far.
+        """
+        self.block_renderers[kind] = self._timed(render)
+
+    def add_block_transform(self, transform):
+        """
+        Runs transform(document, context) on the tree of Blocks of every document
+        before it is rendered, e.g. to give some blocks a kind of their own.
+        """
+        self.block_transforms.append(self._timed(transform))
+
+    def add_inline_rule(self, name, rule, trigger=None, before=None):
+        """
+        Runs rule(text, context, line) on the HTML-escaped text of headings and
+        paragraphs, which starts on the given source line, and uses the text it returns.
+
+        Args:
+            name (str): The rule's name. A rule with the same name is replaced.
+            rule (callable): The rule.
+            trigger (str): The rule is only run on text containing this string.
+            before (str): Name of the rule to run this one before; by default it runs last.
+        """
+        entry = (name, trigger, self._timed(rule))
+        names = [existing for existing, _, _ in self.inline_rules]
+
+        if name in names:
+            self.inline_rules[names.index(name)] = entry
+        elif before is None:
+            self.inline_rules.append(entry)
+        elif before in names:
+            self.inline_rules.insert(names.index(before), entry)
+        else:
+            raise PluginError(f"Unknown inline rule: {before}")
+
+    def add_pre_render(self, hook):
+        """
+        Calls hook(page) before a page is rendered. page holds the "source" and
+        "dest" paths, the front matter "metadata" and the "markdown", which the
+        hook can change.
+        """
+        self.pre_render.append(self._timed(hook))
+
+    def add_post_render(self, hook):
+        """
+        Calls hook(page) before a page is written, with its full "html" added,
+        which the hook can change. Pages aren't streamed while there are post-render hooks.
+        """
+        self.post_render.append(self._timed(hook))
+
+    def load(self, plugin):
+        """
+        Loads a plugin, given as a module name or as the path of a .py file.
+        """
+        try:
+            if plugin.endswith(".py"):
+                name = os.path.splitext(os.path.basename(plugin))[0]
+                spec = importlib.util.spec_from_file_location(f"ssg_plugin_{name}", plugin)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+            else:
+                name = plugin
+                module = importlib.import_module(plugin)
+        except (ImportError, OSError) as e:
+            raise PluginError(f"Can't load plugin {plugin}: {e}")
+
+        register = getattr(module, "register", None)
+        if register is None:
+            raise PluginError(f"Plugin {plugin} has no register(registry) function")
+
+        self._plugin = name
+        try:
+            register(self)
+        finally:
+            self._plugin = None
+        self.plugins.append(name)
+
+        # Rendered output is cached per fingerprint, so it changes with the plugin's code
+        digest = hashlib.sha256(f"{self.fingerprint}\n{name}\n".encode('utf-8'))
+        path = getattr(module, "__file__", None)
+        if path:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        self.fingerprint = digest.hexdigest()[:16]
+
+    def take_timings(self):
+        """
+        Returns the plugin timings recorded since the last call, and starts over.
+        """
+        timings = dict(self.timings)
+        self.timings.clear()
+        return timings
@@ -0,0 +1,156 @@
+import ctypes
+import os
+import shutil
+import threading
+import time
+from log import logger
+
+
+# Generations kept besides the live one, for the requests still being served
+# from them and to roll back to
+KEEP_GENERATIONS = 1
+
+
+def link_tree(src, dest):
+    """
+    Recreates the directory tree src in dest with hard links to its files,
+    or copies where the filesystem doesn't support hard links.
+
+    The files are shared, so they must be replaced, never written into: the
+    output writers (write_atomic, replace_if_changed, copy_if_changed) only
+    ever move a new file over an old one.
+    """
+    for root, dirs, files in os.walk(src):
+        target = os.path.join(dest, os.path.relpath(root, src))
+        os.makedirs(target, exist_ok=True)
+        for file in files:
+            try:
+                os.link(os.path.join(root, file), os.path.join(target, file))
+            except OSError:
+                shutil.copy2(os.path.join(root, file), os.path.join(target, file))
+
+
+# renameat2() flag that swaps the two paths (Linux 3.15+, glibc 2.28+)
+RENAME_EXCHANGE = 2
+AT_FDCWD = -100
+
+
+def exchange_paths(path, other):
+    """
+    Swaps two paths in a single rename, where the system supports it.
+
+    Returns:
+        bool: Whether they were swapped.
+    """
+    try:
+        renameat2 = getattr(ctypes.CDLL(None, use_errno=True), "renameat2", None)
+    except (OSError, TypeError):  # No C library to look it up in, e.g. on Windows
+        renameat2 = None
+    if renameat2 is None:
+        return False
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    return renameat2(AT_FDCWD, os.fsencode(path), AT_FDCWD, os.fsencode(other), RENAME_EXCHANGE) == 0
+
+
+class StagedPublisher:
+    """
+    Publishes each build of an output directory at once, so the site is never
+    served half built.
+
+    The output directory is a symbolic link to the live generation, one of the
+    directories of <output_dir>.generations. A build writes into a new
+    generation that starts as hard links to the live one's files, so unchanged
+    files cost neither a copy nor a write, and publish() points the link at it
+    with a single rename, the first one included where the system can exchange
+    a directory and a link (see exchange_paths). The generations before it are then removed in the
+    background, but for the last KEEP_GENERATIONS.
+    """
+    def __init__(self, output_dir):
+        self.output_dir = output_dir.rstrip(os.sep)
+        self.generations_dir = self.output_dir + ".generations"
+        self.staging = None
+
+    def live_dir(self):
+        """
+        Returns the directory the site is served from, or None before the first build.
+        """
+        if os.path.islink(self.output_dir):
+            return os.path.realpath(self.output_dir)
+        return self.output_dir if os.path.isdir(self.output_dir) else None
+
+    def prepare(self):
+        """
+        Creates the generation the build writes into, holding the live files.
+
+        Returns:
+            str: The path of the new generation.
+        """
+        os.makedirs(self.generations_dir, exist_ok=True)
+        # Nanosecond names sort by age
+        self.staging = os.path.join(self.generations_dir, f"{time.time_ns():020d}")
+
+        live = self.live_dir()
+        if live is not None:
+            link_tree(live, self.staging)
+        else:
+            os.makedirs(self.staging)
+
+        logger.debug("Staging the build in %s", self.staging, extra={"event": "stage", "path": self.staging})
+        return self.staging
+
+    def publish(self):
+        """
+        Makes the staged generation the live one, and starts removing the old ones.
+
+        Returns:
+            threading.Thread: The thread removing the old generations.
+        """
+        temp_link = f"{self.output_dir}.{os.getpid()}.tmp"
+        os.symlink(os.path.relpath(self.staging, os.path.dirname(os.path.abspath(self.output_dir))), temp_link)
+
+        # The first staged build replaces a plain directory, which joins the
+        # generations, just older than the new one. A link can't be renamed over
+        # a directory, so the two are exchanged in one rename where the system
+        # can, and otherwise the directory is moved away right before the link
+        # takes its place.
+        if os.path.isdir(self.output_dir) and not os.path.islink(self.output_dir):
+            old_generation = os.path.join(self.generations_dir, f"{int(os.path.basename(self.staging)) - 1:020d}")
+            if exchange_paths(temp_link, self.output_dir):
+                os.replace(temp_link, old_generation)
+            else:
+                os.replace(self.output_dir, old_generation)
+                os.replace(temp_link, self.output_dir)
+        else:
+            # Renaming a link over the old one swaps them atomically
+            os.replace(temp_link, self.output_dir)
+
+        logger.info("Published %s", self.staging, extra={"event": "publish", "path": self.staging})
+        self.staging = None
+        return self.remove_old_generations()
+
+    def discard(self):
+        """
+        Removes the staged generation of a build that failed, leaving the live one as it was.
+        """
+        if self.staging is not None:
+            shutil.rmtree(self.staging, ignore_errors=True)
+            self.staging = None
+
+    def remove_old_generations(self):
+        live = self.live_dir()
+        generations = sorted(os.listdir(self.generations_dir))
+        if live is None or os.path.basename(live) not in generations:
+            return None
+
+        # Only generations older than the live one: the newer ones may be other builds' staging
+        older = generations[:generations.index(os.path.basename(live))]
+        old = [os.path.join(self.generations_dir, name) for name in older[:len(older) - KEEP_GENERATIONS]]
+
+        def remove():
+            for path in old:
+                logger.debug("Removing generation %s", path, extra={"event": "remove_generation", "path": path})
+                shutil.rmtree(path, ignore_errors=True)
+
+        thread = threading.Thread(target=remove, name="remove-generations")
+        thread.start()
+        return thread
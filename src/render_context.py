@@ -0,0 +1,79 @@
+class RenderContext:
+	"""
+	Per-page state collected while a markdown document is being rendered.
+	"""
+	def __init__(self, source_path=None, highlighter=None, block_cache=None, partials=None, registry=None, routes=None):
+		self.source_path = source_path
+		self.highlighter = highlighter
+		self.block_cache = block_cache
+		self.partials = partials
+		self.registry = registry  # Renderers and inline rules, the built-in ones if None
+		self.routes = routes  # Resolves the internal links, which are written as they are if None
+		self.links = []
+		self.includes = []
+		self.include_stack = ()  # Partials being rendered on the way to this document, outermost first
+		self.block_hits = 0
+		self.block_misses = 0
+		self.footnotes = {}  # Footnote definitions of the document, by lowercase label
+		self.footnote_numbers = {}  # Labels of the footnotes referenced so far -> their numbers
+		self.headings = []  # (level, id, text, slug) of the headings rendered so far, for the table of contents
+		self.heading_ids = {}  # Heading ids and slugs used so far -> how many times
+		self.block_counts = {}  # Block kind -> how many blocks of the document have it, nested ones included
+		self.inline_matches = {}  # Inline rule name -> how many times it matched
+
+	def add_link(self, url, line, kind="link"):
+		self.links.append((line, url, kind))
+
+	def resolve_url(self, url):
+		return self.routes.resolve(url) if self.routes is not None else url
+
+	def footnote_number(self, label):
+		"""
+		Returns the number of a footnote, numbering it if this is its first reference.
+		"""
+		return self.footnote_numbers.setdefault(label, len(self.footnote_numbers) + 1)
+
+	def heading_id(self, slug):
+		"""
+		Returns a page-unique id for a heading slug: the slug itself the first
+		time, then slug-1, slug-2, ... skipping ids other headings already have.
+		"""
+		count = self.heading_ids.get(slug, 0)
+		heading_id = f"{slug}-{count}" if count else slug
+		while heading_id in self.heading_ids:
+			count += 1
+			heading_id = f"{slug}-{count}"
+
+		self.heading_ids[slug] = count + 1
+		self.heading_ids.setdefault(heading_id, 1)
+		return heading_id
+
+	def add_heading(self, level, slug, text):
+		"""
+		Records a heading for the table of contents and returns its id.
+		"""
+		heading_id = self.heading_id(slug)
+		self.headings.append((level, heading_id, text, slug))
+		return heading_id
+
+	def count_blocks(self, blocks):
+		"""
+		Counts the blocks of a parsed document by kind, with the blocks nested in them.
+		"""
+		pending = list(blocks)
+		while pending:
+			block = pending.pop()
+			self.block_counts[block.kind] = self.block_counts.get(block.kind, 0) + 1
+			pending.extend(block.children)
+
+	def add_inline_matches(self, name, count):
+		if count:
+			self.inline_matches[name] = self.inline_matches.get(name, 0) + count
+
+	def add_includes(self, paths):
+		for path in paths:
+			if path not in self.includes:
+				self.includes.append(path)
+
+	def __repr__(self):
+		return f"RenderContext({self.source_path}, links={len(self.links)})"
@@ -0,0 +1,82 @@
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, peak memory isn't reported there
+    resource = None
+
+
+# Rendering a page peaks at roughly this many bytes per byte of markdown: the
+# markdown itself, the block tree, the HTML tree, the HTML and the final page
+PAGE_MEMORY_FACTOR = 32
+MB = 1024 * 1024
+
+
+def estimate_page_memory(size):
+    """
+    Returns the approximate memory needed to render a markdown file of size bytes.
+    """
+    return size * PAGE_MEMORY_FACTOR
+
+
+def current_rss():
+    """
+    Returns the resident set size of this process in bytes, or None where it can't be read.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss():
+    """
+    Returns the highest resident set size of this process and of its largest
+    (finished) worker process in bytes, or None where it can't be read.
+    """
+    if resource is None:
+        return None
+
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryBudget:
+    """
+    Tracks the approximate bytes held by the pages being rendered, so no more
+    of them are started than fit in a memory limit.
+
+    The limit is for the whole build. What the processes hold before any page
+    is rendered (reserved) is taken off it, the rest is shared by the pages
+    in flight. A page that doesn't fit waits for earlier pages to finish,
+    but a page is always started when nothing else is in flight, however
+    large it is.
+    """
+    def __init__(self, limit=None, reserved=0):
+        self.limit = limit
+        self.available = max(limit - reserved, 0) if limit else None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.throttled = 0
+
+    def fits(self, cost):
+        return self.available is None or self.in_flight == 0 or self.in_flight + cost <= self.available
+
+    def acquire(self, cost):
+        self.in_flight += cost
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def release(self, cost):
+        self.in_flight -= cost
+
+    def report(self):
+        return {
+            "budget": self.limit,
+            "peak_in_flight": self.peak_in_flight,
+            "throttled": self.throttled,
+            "peak_rss": peak_rss(),
+        }
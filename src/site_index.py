@@ -0,0 +1,76 @@
+import os
+from partials import IncludeGraph
+
+
+class SiteIndex:
+    """
+    What the last build left behind: the pages it generated, by source path,
+    and the static files it copied.
+
+    A process that builds the same site again and again (the build daemon)
+    keeps it, so a rebuild for a few changed files only renders the pages
+    they affect, and the sitemap, feed, link check and deploy manifest are
+    produced from the index instead of from a full build.
+    """
+    def __init__(self):
+        self.pages = {}  # source -> generate_page result
+        self.includes = IncludeGraph()  # Which pages use which layouts, partials and the template
+        self.static_files = []
+        self.output_dir = None  # The directory the pages and static files are in
+        self.routes = None  # The Routes the pages were rendered with
+
+    def pages_to_rebuild(self, changed):
+        """
+        Returns the sources of the pages affected by changes to the given files:
+        the pages themselves and the pages made of them (layouts, the template
+        and partials), or None when a full build is needed.
+
+        A full build is needed before the first one, when changed is None, and
+        when a changed file can't be traced to the pages in the index, e.g. a
+        page that was added or removed, a static file or a new layout.
+        """
+        if not self.pages or changed is None:
+            return None
+
+        changed = {os.path.abspath(path) for path in changed}
+        sources = set()
+
+        for path in changed:
+            if path in self.pages:
+                if not os.path.isfile(path):
+                    return None
+                sources.add(path)
+                continue
+
+            dependents = self.includes.dependents(path)
+            if not dependents:
+                return None
+            sources.update(dependents)
+
+        return sorted(sources)
+
+    def move_to(self, output_dir):
+        """
+        Points the paths of the outputs at another output directory, e.g. the
+        new generation a staged build writes to, holding the same files.
+        """
+        if self.output_dir is not None and output_dir != self.output_dir:
+            def moved(path):
+                return os.path.join(output_dir, os.path.relpath(path, self.output_dir))
+
+            for page in self.pages.values():
+                page["dest"] = moved(page["dest"])
+            self.static_files = [moved(path) for path in self.static_files]
+        self.output_dir = output_dir
+
+    def update(self, pages, full=True):
+        """
+        Records the pages a build generated. A full build replaces the pages
+        recorded so far; otherwise only the given pages are replaced.
+        """
+        if full:
+            self.pages = {}
+            self.includes = IncludeGraph()
+        for page in pages:
+            self.pages[page["source"]] = page
+            self.includes.add_page(page["source"], page["includes"])
@@ -0,0 +1,272 @@
+import unittest
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from src.block_parser import parse_blocks
+from src.htmlnode import LeafNode, ParentNode
+from src.main import process_static_files
+from src.utils import parse_inline_markdown, text_to_textnodes
+
+
+# The performance tier only runs when asked for: ./test.sh perf, or SSG_PERF=1.
+# SSG_PERF_UPDATE=1 records the current counts and timings as the new baseline,
+# which a workload missing from the baseline needs before it can be checked.
+ENABLED = os.environ.get("SSG_PERF") == "1"
+UPDATE = os.environ.get("SSG_PERF_UPDATE") == "1"
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Every workload runs at a small size and at SCALE times that size
+SCALE = 4
+REPEAT = 5
+
+# Function calls are deterministic, so they get a tight tolerance; timings are
+# compared after dividing by the time of a fixed calibration loop, which takes
+# out most of the difference between machines, and still get a loose one.
+CALL_TOLERANCE = 1.10
+TIME_TOLERANCE = 2
+
+# SCALE times the input may cost at most this many times more. Linear code
+# makes SCALE times the calls; calls aren't noisy, time is.
+CALL_GROWTH_LIMIT = SCALE * 1.10
+TIME_GROWTH_LIMIT = SCALE * 2
+
+# Below this many seconds, timings are mostly noise
+TIME_FLOOR = 0.002
+
+
+INLINE_SENTENCE = ("Some **bold {i}** and *italic* text with `code {i}`, a [link](/page-{i}.html), "
+                   "an ![image](/img/{i}.png) and a footnote[^{i}] & <markup>. ")
+
+BLOCKS = """## Section {i}
+
+A paragraph with **bold**, *italic* and a [link](/docs/{i}.html)
+that goes on to a second line.
+
+- First item
+- Second item
+  1. Nested
+  2. Items
+
+> A quote
+> over two lines
+
+```python
+def f{i}(x):
+    return x * {i}
+```
+"""
+
+
+def inline_parser(size):
+    text = "".join(INLINE_SENTENCE.format(i=i) for i in range(size))
+    return lambda: (parse_inline_markdown(text), text_to_textnodes(text))
+
+
+def block_splitter(size):
+    markdown = "\n".join(BLOCKS.format(i=i) for i in range(size))
+    return lambda: parse_blocks(markdown)
+
+
+def to_html(size):
+    tree = ParentNode(tag="div", children=[
+        ParentNode(tag="section", props={"id": f"s{i}"}, children=[
+            LeafNode(value=f"Heading {i}", tag="h2"),
+            ParentNode(tag="p", children=[
+                "Text with ",
+                LeafNode(value="a link", tag="a", props={"href": f"/page-{i}.html"}),
+                LeafNode(value=" & more", tag=None),
+            ]),
+        ])
+        for i in range(size)
+    ])
+    return tree.to_html
+
+
+def static_copy(size):
+    root = tempfile.mkdtemp()
+    static_dir = os.path.join(root, "static")
+    for i in range(size):
+        path = os.path.join(static_dir, f"dir{i % 10}", f"file{i}.txt")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(f"file {i}\n" * 10)
+
+    def run():
+        # Copy into an empty output directory every time
+        dest_dir = os.path.join(root, "public")
+        shutil.rmtree(dest_dir, ignore_errors=True)
+        process_static_files(static_dir, dest_dir)
+
+    run.cleanup = lambda: shutil.rmtree(root)
+    return run
+
+
+# Workload name -> (function building the workload for a size, small size,
+# whether its timings are checked). Filesystem time varies far more between
+# runs than the calibration loop can account for, so the static copy is only
+# held to its calls.
+WORKLOADS = {
+    "inline_parser": (inline_parser, 200, True),
+    "block_splitter": (block_splitter, 100, True),
+    "to_html": (to_html, 1000, True),
+    "static_copy": (static_copy, 50, False),
+}
+
+
+def count_calls(run):
+    """
+    Returns the number of Python and C function calls made by run().
+    """
+    calls = 0
+
+    def profile(frame, event, arg):
+        nonlocal calls
+        if event == "call" or event == "c_call":
+            calls += 1
+
+    sys.setprofile(profile)
+    try:
+        run()
+    finally:
+        sys.setprofile(None)
+    return calls
+
+
+def best_time(run, repeat=REPEAT):
+    """
+    Returns the fastest of repeat runs, with the garbage collector off as timeit does.
+    """
+    best = None
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        if enabled:
+            gc.enable()
+    return best
+
+
+def calibrate():
+    """
+    Times a fixed pure-Python loop, the unit the timings are compared in.
+    """
+    return best_time(lambda: sum(i * i % 7 for i in range(200000)))
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"workloads": {}}
+
+
+@unittest.skipUnless(ENABLED, "performance tier, run with ./test.sh perf or SSG_PERF=1")
+class TestPerformance(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.baseline = load_baseline()
+        cls.calibration = calibrate()
+        cls.measured = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        # Only an explicit update writes the baseline, a run checks against it
+        if not UPDATE:
+            return
+
+        # Workloads that weren't run this time keep their recorded units
+        workloads = {}
+        for name, entry in cls.baseline["workloads"].items():
+            scale = cls.calibration / cls.baseline["calibration"]
+            workloads[name] = {size: {**result, "seconds": result["seconds"] * scale} for size, result in entry.items()}
+
+        baseline = {"calibration": cls.calibration, "workloads": workloads}
+        for name, entry in cls.measured.items():
+            # Timings are kept in calibration units of the machine that recorded them
+            baseline["workloads"][name] = {size: {
+                "calls": result["calls"],
+                "seconds": result["units"] * cls.calibration,
+            } for size, result in entry.items()}
+
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+            f.write("\n")
+
+    def measure(self, name):
+        make, small, _ = WORKLOADS[name]
+        results = {}
+        for size in (small, small * SCALE):
+            run = make(size)
+            try:
+                # Calibrating next to each measurement follows the machine's load and clock speed
+                calibration = calibrate()
+                seconds = best_time(run)
+                results[str(size)] = {"calls": count_calls(run), "seconds": seconds, "units": seconds / calibration}
+            finally:
+                if hasattr(run, "cleanup"):
+                    run.cleanup()
+        self.measured[name] = results
+        return results
+
+    def check(self, name):
+        results = self.measure(name)
+        small, large = (results[size] for size in sorted(results, key=int))
+        timed = WORKLOADS[name][2]
+
+        # Super-linear scaling
+        self.assertLessEqual(large["calls"], small["calls"] * CALL_GROWTH_LIMIT,
+                             f"{name}: {small['calls']} calls, then {large['calls']} for {SCALE}x the input")
+        if timed:
+            self.assertLessEqual(large["seconds"], max(small["seconds"], TIME_FLOOR) * TIME_GROWTH_LIMIT,
+                                 f"{name}: {small['seconds']:.4f}s, then {large['seconds']:.4f}s for {SCALE}x the input")
+
+        # Regressions against the baseline
+        if UPDATE:
+            return
+        recorded = self.baseline["workloads"].get(name)
+        if recorded is None:
+            self.fail(f"{name} has no baseline, record one with SSG_PERF_UPDATE=1 ./test.sh perf")
+        calibration = self.baseline["calibration"]
+        for size, result in results.items():
+            if size not in recorded:
+                self.fail(f"{name} has no baseline at size {size}, record one with SSG_PERF_UPDATE=1 ./test.sh perf")
+            self.assertLessEqual(result["calls"], recorded[size]["calls"] * CALL_TOLERANCE,
+                                 f"{name} at size {size}: {result['calls']} calls, "
+                                 f"{recorded[size]['calls']} in the baseline")
+            if not timed:
+                continue
+            baseline_units = recorded[size]["seconds"] / calibration
+            self.assertLessEqual(result["units"], max(baseline_units, TIME_FLOOR / calibration) * TIME_TOLERANCE,
+                                 f"{name} at size {size}: {result['units']:.2f} calibration units, "
+                                 f"{baseline_units:.2f} in the baseline")
+
+    def test_inline_parser(self):
+        """Test that inline parsing neither regressed nor scales super-linearly."""
+        self.check("inline_parser")
+
+    def test_block_splitter(self):
+        """Test that splitting and parsing blocks neither regressed nor scales super-linearly."""
+        self.check("block_splitter")
+
+    def test_to_html(self):
+        """Test that serializing a node tree neither regressed nor scales super-linearly."""
+        self.check("to_html")
+
+    def test_static_copy(self):
+        """Test that copying the static files neither regressed nor scales super-linearly."""
+        self.check("static_copy")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.block_cache import BlockCache, block_key, get_block_cache
+from src.block_parser import parse_blocks
+from src.render_context import RenderContext
+from src.utils import markdown_to_html_node
+
+
+DISCLAIMER = "This page is provided **as is**, see the [license](/license)."
+
+
+class TestBlockKey(unittest.TestCase):
+
+    def test_same_block_anywhere_has_same_key(self):
+        """Test that the key doesn't depend on where the block is in the document."""
+        first = parse_blocks(f"{DISCLAIMER}\n").children[0]
+        second = parse_blocks(f"# Title\n\nIntro\n\n{DISCLAIMER}\n").children[2]
+
+        self.assertEqual(first.line, 1)
+        self.assertEqual(second.line, 5)
+        self.assertEqual(block_key(first), block_key(second))
+
+    def test_different_blocks_have_different_keys(self):
+        """Test that the kind and the attributes of a block are part of the key."""
+        unordered = parse_blocks("- a\n- b\n").children[0]
+        ordered = parse_blocks("1. a\n2. b\n").children[0]
+        ordered_from_three = parse_blocks("3. a\n4. b\n").children[0]
+
+        keys = {block_key(unordered), block_key(ordered), block_key(ordered_from_three)}
+        self.assertEqual(len(keys), 3)
+
+
+class TestBlockCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_evicts_least_recently_used(self):
+        """Test that the in-memory cache is bounded and drops the oldest entries first."""
+        cache = BlockCache(max_entries=2)
+        cache.put("a", "<p>a</p>", [])
+        cache.put("b", "<p>b</p>", [])
+        cache.get("a")
+        cache.put("c", "<p>c</p>", [])
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_reuses_disk_cache(self):
+        """Test that a new BlockCache, as in another worker process, reuses stored entries."""
+        BlockCache(self.cache_dir).put("ab12", "<h2 id=\"a\">a</h2>", [(0, "/a", "link")], [(2, "a", "a", "a")], {"link": 1})
+
+        cache = BlockCache(self.cache_dir)
+        self.assertEqual(cache.get("ab12"), ("<h2 id=\"a\">a</h2>", [(0, "/a", "link")], [[2, "a", "a", "a"]], {"link": 1}))
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_fingerprints_get_caches_of_their_own(self):
+        """Test that blocks rendered under other routes aren't shared, with or without a cache directory."""
+        self.assertIsNot(get_block_cache(None, "a"), get_block_cache(None, "b"))
+        self.assertIs(get_block_cache(None, "a"), get_block_cache(None, "a"))
+        self.assertEqual(get_block_cache(self.cache_dir, "a").cache_dir, os.path.join(self.cache_dir, "a"))
+
+
+class TestCachedRendering(unittest.TestCase):
+
+    def test_cached_blocks_render_the_same(self):
+        """Test that rendering through the cache gives the same HTML as rendering directly."""
+        markdown = f"# Title\n\n{DISCLAIMER}\n\n- one\n- two\n\n```python\nx = 1\n```\n\n{DISCLAIMER}\n"
+        context = RenderContext(block_cache=BlockCache())
+
+        self.assertEqual(
+            markdown_to_html_node(markdown, context).to_html(),
+            markdown_to_html_node(markdown).to_html(),
+        )
+        self.assertEqual((context.block_hits, context.block_misses), (1, 4))
+
+    def test_links_keep_their_lines(self):
+        """Test that links of a cached block are recorded at the line it appears on."""
+        cache = BlockCache()
+        markdown_to_html_node(f"{DISCLAIMER}\n", RenderContext(block_cache=cache))
+
+        context = RenderContext(block_cache=cache)
+        markdown_to_html_node(f"# Title\n\nIntro\n\n{DISCLAIMER}\n", context)
+
+        self.assertEqual(context.links, [(5, "/license", "link")])
+        self.assertEqual(context.block_hits, 1)
+
+    def test_cached_blocks_count_inline_matches(self):
+        """Test that a cached block adds the inline matches it was rendered with to every page using it."""
+        cache = BlockCache()
+        first = RenderContext(block_cache=cache)
+        markdown_to_html_node(f"{DISCLAIMER}\n", first)
+
+        context = RenderContext(block_cache=cache)
+        markdown_to_html_node(f"{DISCLAIMER}\n", context)
+
+        self.assertEqual(context.block_hits, 1)
+        self.assertEqual(context.inline_matches, first.inline_matches)
+        self.assertTrue(context.inline_matches)
+
+
+if __name__ == "__main__":
+    unittest.main()
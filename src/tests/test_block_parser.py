@@ -0,0 +1,161 @@
+import unittest
+from src.block_parser import MAX_NESTING, parse_blocks
+from src.utils import markdown_to_html_node
+
+
+class TestParseBlocks(unittest.TestCase):
+
+    def test_block_kinds_and_lines(self):
+        """Test the top-level blocks and the lines they start on."""
+        markdown = "# Title\n\nSome text\nmore text\n\n* item\n\n```\ncode\n```"
+        document = parse_blocks(markdown)
+
+        self.assertEqual(
+            [(block.kind, block.line) for block in document.children],
+            [('heading', 1), ('paragraph', 3), ('unordered list', 6), ('code block', 8)],
+        )
+        self.assertEqual(document.children[1].lines, ["Some text", "more text"])
+
+    def test_fenced_code_with_blank_lines(self):
+        """Test that blank lines don't end a fenced code block."""
+        document = parse_blocks("```python\nx = 1\n\n\n    y = 2\n```\nafter")
+        code = document.children[0]
+
+        self.assertEqual(code.kind, 'code block')
+        self.assertEqual(code.language, 'python')
+        self.assertEqual(code.lines, ["x = 1", "", "", "    y = 2"])
+        self.assertEqual(document.children[1].kind, 'paragraph')
+
+    def test_nested_list_structure(self):
+        """Test that indented list items nest inside the previous item."""
+        document = parse_blocks("* a\n  1. b\n  2. c\n* d")
+        outer = document.children[0]
+
+        self.assertEqual(outer.kind, 'unordered list')
+        self.assertEqual(len(outer.children), 2)
+        self.assertEqual([child.kind for child in outer.children[0].children], ['paragraph', 'ordered list'])
+
+    def test_loose_list(self):
+        """Test that blank lines between items make the list loose."""
+        self.assertTrue(parse_blocks("* a\n\n* b").children[0].loose)
+        self.assertFalse(parse_blocks("* a\n* b\n\nafter").children[0].loose)
+
+    def test_heading_closing_sequence(self):
+        """Test that closing #s are stripped only when separated from the text."""
+        headings = ["# a #", "# a ##   ", "# a#", "# a # #", "# #", "# a" + " " * 50]
+        self.assertEqual([parse_blocks(heading).children[0].lines[0] for heading in headings],
+                         ["a", "a", "a#", "a #", "#", "a"])
+
+    def test_nesting_limit(self):
+        """Test that markers nested deeper than MAX_NESTING are kept as text."""
+        document = parse_blocks(">" * (MAX_NESTING + 5) + " a")
+
+        depth = 0
+        block = document
+        while block.children and block.children[0].kind == 'quote block':
+            block = block.children[0]
+            depth += 1
+
+        self.assertEqual(depth, MAX_NESTING)
+        self.assertEqual(block.children[0].lines, [">>>>> a"])
+
+
+class TestNestedMarkdownToHtml(unittest.TestCase):
+
+    def test_nested_lists(self):
+        """Test nested unordered and ordered lists."""
+        markdown = "* a\n  * b\n  * c\n* d\n  1. e"
+        self.assertEqual(
+            markdown_to_html_node(markdown).to_html(),
+            '<ul><li>a<ul><li>b</li><li>c</li></ul></li><li>d<ol><li>e</li></ol></li></ul>',
+        )
+
+    def test_multi_paragraph_list_item(self):
+        """Test that list items can hold several paragraphs."""
+        markdown = "1. first\n\n   still first\n2. second"
+        self.assertEqual(
+            markdown_to_html_node(markdown).to_html(),
+            '<ol><li><p>first</p><p>still first</p></li><li><p>second</p></li></ol>',
+        )
+
+    def test_quote_with_list_and_code(self):
+        """Test a block quote containing a list and fenced code."""
+        markdown = "> Intro\n> - one\n> - two\n>\n> ```\n> a\n>\n> b\n> ```"
+        self.assertEqual(
+            markdown_to_html_node(markdown).to_html(),
+            '<blockquote><p>Intro</p><ul><li>one</li><li>two</li></ul><pre>a\n\nb</pre></blockquote>',
+        )
+
+    def test_ordered_list_start(self):
+        """Test that an ordered list keeps its starting number."""
+        self.assertEqual(
+            markdown_to_html_node("3. three\n4. four").to_html(),
+            '<ol start="3"><li>three</li><li>four</li></ol>',
+        )
+
+
+
+class TestTables(unittest.TestCase):
+
+    def test_table_structure(self):
+        """Test that a delimiter row turns the paragraph line above it into a table header."""
+        document = parse_blocks("Intro\n| a | b | c |\n|:--|:-:|--:|\n| 1 | 2 \\| x |\n3\n\nafter")
+        paragraph, table, after = document.children
+
+        self.assertEqual(paragraph.lines, ["Intro"])
+        self.assertEqual((table.kind, table.line), ('table', 2))
+        self.assertEqual(table.alignments, ['left', 'center', 'right'])
+        self.assertEqual(table.header, ["a", "b", "c"])
+        # Rows are cut or padded to the number of columns, \| is a pipe in a cell
+        self.assertEqual(table.rows, [["1", "2 | x", ""], ["3", "", ""]])
+        self.assertEqual(after.kind, 'paragraph')
+
+    def test_not_a_table(self):
+        """Test that a delimiter row needs as many cells as the header, and pipes."""
+        for markdown in ("| a | b |\n|---|", "a\n---", "| a |\n| -x- |"):
+            self.assertEqual([block.kind for block in parse_blocks(markdown).children], ['paragraph'], markdown)
+
+    def test_table_html(self):
+        """Test that cells are aligned and go through the inline parser."""
+        markdown = "| a | *b* |\n| :-: | --- |\n| [x](/x) | |"
+        self.assertEqual(
+            markdown_to_html_node(markdown).to_html(),
+            '<table><thead><tr><th align="center">a</th><th><i>b</i></th></tr></thead>'
+            '<tbody><tr><td align="center"><a href="/x">x</a></td><td></td></tr></tbody></table>',
+        )
+
+
+class TestFootnotes(unittest.TestCase):
+
+    def test_definitions(self):
+        """Test that footnote definitions are containers collected on the document."""
+        document = parse_blocks("Text[^a]\n\n[^A]: first\n    more\n[^b]: second\n\n    - item")
+
+        self.assertEqual(list(document.footnotes), ["a", "b"])
+        self.assertEqual(document.footnotes["a"].children[0].lines, ["first", "more"])
+        self.assertEqual([child.kind for child in document.footnotes["b"].children], ['paragraph', 'unordered list'])
+
+    def test_footnote_html(self):
+        """Test that references are numbered in order and the footnotes listed at the end."""
+        markdown = "One[^x] two[^y] again[^x] missing[^z]\n\n[^y]: Why\n[^x]: Ex"
+        self.assertEqual(
+            markdown_to_html_node(markdown).to_html(),
+            '<p>One<sup class="footnote-ref"><a href="#fn-1" id="fnref-1">1</a></sup>'
+            ' two<sup class="footnote-ref"><a href="#fn-2" id="fnref-2">2</a></sup>'
+            ' again<sup class="footnote-ref"><a href="#fn-1">1</a></sup> missing[^z]</p>'
+            '<section class="footnotes"><ol>'
+            '<li id="fn-1"><p>Ex <a href="#fnref-1" class="footnote-backref">&#8617;</a></p></li>'
+            '<li id="fn-2"><p>Why <a href="#fnref-2" class="footnote-backref">&#8617;</a></p></li>'
+            '</ol></section>',
+        )
+
+    def test_definitions_after_containers(self):
+        """Test that a definition right after a list or a block quote is still at the top level."""
+        for container in ("- a\n- b", "1. a\n2. b", "> quote"):
+            with self.subTest(container=container):
+                document = parse_blocks(f"Text[^1]\n\n{container}\n\n[^1]: The note")
+                self.assertEqual(list(document.footnotes), ["1"])
+                self.assertEqual(document.children[-1].kind, 'footnote')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from src.config import ConfigError, load_config
+
+
+class TestLoadConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write_config(self, name, settings):
+        path = os.path.join(self.root, name)
+        with open(path, 'w') as f:
+            f.write(settings if isinstance(settings, str) else json.dumps(settings))
+        return path
+
+    def test_defaults(self):
+        """Test the defaults, with paths resolved against the root."""
+        config = load_config(root=self.root)
+
+        self.assertEqual(config.content_dir, os.path.join(self.root, "content"))
+        self.assertEqual(config.template, os.path.join(self.root, "static", "template.html"))
+        self.assertEqual(config.cache_path("highlight"), os.path.join(self.root, ".cache", "highlight"))
+        self.assertTrue(config.enabled("sitemap"))
+        self.assertFalse(config.enabled("minify"))
+
+    def test_config_file_and_overrides(self):
+        """Test that explicit overrides win over the config file."""
+        path = self.write_config("site.json", {"output_dir": "dist", "workers": 3, "site_title": "Docs"})
+        config = load_config(path, workers=8, site_title=None)
+
+        self.assertEqual(config.output_dir, os.path.join(self.root, "dist"))
+        self.assertEqual(config.workers, 8)
+        self.assertEqual(config.site_title, "Docs")
+
+    def test_toml_profiles(self):
+        """Test that a profile from a TOML file is found automatically and applied."""
+        self.write_config("ssg.toml", 'stages = ["links"]\n\n[profiles.fast]\nstages = []\nworkers = 1\n')
+        config = load_config(root=self.root, profile="fast", enable=["minify"])
+
+        self.assertEqual(config.stages, {"minify"})
+        self.assertEqual(config.workers, 1)
+
+    def test_errors(self):
+        """Test that unknown profiles, stages and settings are rejected."""
+        with self.assertRaises(ConfigError):
+            load_config(root=self.root, profile="missing")
+        with self.assertRaises(ConfigError):
+            load_config(root=self.root, stages=["missing"])
+        with self.assertRaises(ConfigError):
+            load_config(self.write_config("bad.json", {"colour": "blue"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
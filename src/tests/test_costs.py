@@ -0,0 +1,104 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from src.config import BuildConfig
+from src.costs import COSTS_FILE, DASHBOARD_FILE, cost_totals, page_costs, render_dashboard
+from src.main import build
+from src.render_context import RenderContext
+from src.utils import markdown_to_html_node
+
+
+def page(source, seconds, blocks=None, inline=None):
+    return {
+        "source": source,
+        "url": "/" + os.path.basename(source).replace(".md", ".html"),
+        "title": source,
+        "parsed": True,
+        "cost": {"input_bytes": 10, "output_bytes": 20, "blocks": blocks or {}, "inline": inline or {}, "seconds": seconds},
+    }
+
+
+class TestCostCounts(unittest.TestCase):
+
+    def test_blocks_and_inline_matches(self):
+        """Test that blocks are counted by kind, nested ones included, and inline matches by rule."""
+        context = RenderContext()
+        markdown_to_html_node("# **Title**\n\n- a [link](/a) and *b*\n- `c` and *d*\n\n> quote\n", context)
+
+        self.assertEqual(context.block_counts,
+                         {"heading": 1, "unordered list": 1, "list item": 2, "paragraph": 3, "quote block": 1})
+        self.assertEqual(context.inline_matches, {"bold": 1, "link": 1, "italic": 2, "code": 1})
+
+
+class TestCostReport(unittest.TestCase):
+
+    def test_rows_slowest_first(self):
+        """Test that the rows are sorted by render time, with the totals of their counts."""
+        rows = page_costs([
+            page("/content/a.md", 0.1, {"paragraph": 2}),
+            page("/content/blog/b.md", 0.3, {"paragraph": 1, "heading": 1}, {"link": 4}),
+        ], "/content")
+
+        self.assertEqual([row["source"] for row in rows], ["blog/b.md", "a.md"])
+        self.assertEqual((rows[0]["block_total"], rows[0]["inline_total"]), (2, 4))
+
+        totals = cost_totals(rows)
+        self.assertEqual(totals["blocks"], {"paragraph": 3, "heading": 1})
+        self.assertEqual(totals["input_bytes"], 20)
+        self.assertAlmostEqual(totals["seconds"], 0.4)
+
+    def test_dashboard_escapes_sources(self):
+        """Test that the dashboard lists every page, with sortable values, and escapes names."""
+        rows = page_costs([page("/content/<a>.md", 0.25)], "/content")
+        html = render_dashboard(rows, cost_totals(rows))
+
+        self.assertIn("&lt;a&gt;.md", html)
+        self.assertNotIn("<a>.md", html)
+        self.assertIn('data-value="0.25">250.0</td>', html)
+
+
+class TestCostStage(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write("static/template.html", "{{ Content }}")
+        self.write("content/index.md", "# Home\n\nA **bold** [link](/blog/post.html)")
+        self.write("content/blog/post.md", "# Post")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read_costs(self):
+        with open(os.path.join(self.root, "build-report", COSTS_FILE)) as f:
+            return json.load(f)
+
+    def test_report_survives_cached_builds(self):
+        """Test that the report is written outside the site, with the same counts when the pages come from the caches."""
+        config = BuildConfig(root=self.root, workers=1, stages=("costs",))
+        build(config)
+        first = {row["source"]: row for row in self.read_costs()["pages"]}
+
+        self.assertEqual(sorted(first), ["blog/post.md", "index.md"])
+        self.assertEqual(first["index.md"]["inline"], {"bold": 1, "link": 1})
+        self.assertEqual(first["index.md"]["input_bytes"], os.path.getsize(os.path.join(self.root, "content", "index.md")))
+        self.assertEqual(first["index.md"]["output_bytes"], os.path.getsize(os.path.join(self.root, "public", "index.html")))
+        self.assertTrue(os.path.isfile(os.path.join(self.root, "build-report", DASHBOARD_FILE)))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "public", COSTS_FILE)))
+
+        build(config)
+        second = {row["source"]: row for row in self.read_costs()["pages"]}
+        self.assertFalse(second["index.md"]["parsed"])
+        self.assertEqual(second["index.md"]["blocks"], first["index.md"]["blocks"])
+        self.assertEqual(second["index.md"]["inline"], first["index.md"]["inline"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from src.config import BuildConfig
+from src.daemon import BuildDaemon, request_rebuild, send_request, stop_daemon
+from src.site_index import SiteIndex
+
+
+class TestBuildDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write("static/template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("partials/note.md", "A note")
+        self.write("content/index.md", "# Home\n\n{{> note.md }}")
+        self.write("content/blog/post.md", "# Post")
+        self.config = BuildConfig(root=self.root, workers=1, stages=(), cache_dir=None)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def read(self, name):
+        with open(os.path.join(self.root, name)) as f:
+            return f.read()
+
+    def test_pages_to_rebuild(self):
+        """Test that changes are traced to the pages they affect, and anything else takes a full build."""
+        daemon = BuildDaemon(self.config, None)
+        index_md = os.path.join(self.root, "content", "index.md")
+        post_md = os.path.join(self.root, "content", "blog", "post.md")
+        threading.Thread(target=daemon.run_builds).start()
+        try:
+            self.assertTrue(daemon.request()["full"])
+            index = daemon.index
+
+            self.assertEqual(index.pages_to_rebuild([post_md]), [post_md])
+            self.assertEqual(index.pages_to_rebuild([os.path.join(self.root, "partials", "note.md")]), [index_md])
+            self.assertEqual(index.pages_to_rebuild([self.config.template]), sorted([index_md, post_md]))
+            self.assertIsNone(index.pages_to_rebuild([os.path.join(self.root, "content", "new.md")]))
+            self.assertIsNone(index.pages_to_rebuild(None))
+            self.assertIsNone(SiteIndex().pages_to_rebuild([post_md]))
+        finally:
+            daemon.stop()
+
+    def test_rebuilds_affected_pages(self):
+        """Test that a rebuild for a partial regenerates the page including it, and only that page."""
+        daemon = BuildDaemon(self.config, None)
+        threading.Thread(target=daemon.run_builds).start()
+        try:
+            daemon.request()
+            self.write("partials/note.md", "A new note")
+            response = daemon.request([os.path.join(self.root, "partials", "note.md")])
+        finally:
+            daemon.stop()
+
+        self.assertEqual((response["ok"], response["full"], response["pages"]), (True, False, 1))
+        self.assertIn("A new note", self.read("public/index.html"))
+        self.assertEqual(len(daemon.index.pages), 2)
+
+    def test_requests_are_coalesced(self):
+        """Test that the requests queued while a build runs are covered by a single next build."""
+        daemon = BuildDaemon(self.config, None)
+        responses = []
+        requests = [threading.Thread(target=lambda: responses.append(daemon.request([self.config.template])))
+                    for _ in range(3)]
+        for request in requests:
+            request.start()
+        while len(daemon.pending) < 3:
+            threading.Event().wait(0.001)
+
+        builder = threading.Thread(target=daemon.run_builds)
+        builder.start()
+        for request in requests:
+            request.join()
+        daemon.stop()
+        builder.join()
+
+        self.assertEqual([response["coalesced"] for response in responses], [3, 3, 3])
+        self.assertTrue(all(response["latency"] > 0 for response in responses))
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix sockets")
+    def test_socket(self):
+        """Test a rebuild requested over the Unix socket."""
+        socket_path = os.path.join(self.root, "ssg.sock")
+        daemon = BuildDaemon(self.config, socket_path)
+        server = threading.Thread(target=daemon.serve)
+        server.start()
+        try:
+            while daemon.server is None:
+                threading.Event().wait(0.001)
+            self.write("content/blog/post.md", "# New post")
+            response = request_rebuild(socket_path, [os.path.join(self.root, "content", "blog", "post.md")], timeout=30)
+            self.assertTrue(response["ok"])
+            self.assertIn("New post", self.read("public/blog/post.html"))
+
+            # Valid JSON that isn't a request gets an error, not a dropped connection
+            for message in ([], "x", {"paths": "post.md"}):
+                self.assertEqual(send_request(socket_path, message, timeout=30), {"ok": False, "error": "Invalid request"})
+        finally:
+            stop_daemon(socket_path, timeout=30)
+            server.join()
+
+        self.assertFalse(os.path.exists(socket_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
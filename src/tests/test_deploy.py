@@ -0,0 +1,64 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.deploy import build_manifest, diff_manifests, remove_stale_files
+
+
+class TestDeployManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.write("index.html", "<p>Home</p>")
+        self.write("blog/post.html", "<p>Post</p>")
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.output_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_manifest_entries(self):
+        """Test that every file is listed with its size and content hash."""
+        manifest = build_manifest(self.output_dir)
+
+        self.assertEqual(list(manifest), ["blog/post.html", "index.html"])
+        self.assertEqual(manifest["index.html"]["size"], 11)
+        self.assertEqual(len(manifest["index.html"]["sha256"]), 64)
+
+    def test_reuses_hash_of_unwritten_files(self):
+        """Test that a file with the same size and mtime isn't hashed again."""
+        previous = build_manifest(self.output_dir)
+        previous["index.html"] = dict(previous["index.html"], sha256="cached")
+
+        self.assertEqual(build_manifest(self.output_dir, previous)["index.html"]["sha256"], "cached")
+
+    def test_diff(self):
+        """Test that added, changed and removed files are found, and unchanged ones left out."""
+        old = build_manifest(self.output_dir)
+
+        self.write("index.html", "<p>New home</p>")
+        self.write("about.html", "<p>About</p>")
+        os.remove(os.path.join(self.output_dir, "blog", "post.html"))
+
+        self.assertEqual(
+            diff_manifests(old, build_manifest(self.output_dir, old)),
+            {"added": ["about.html"], "changed": ["index.html"], "removed": ["blog/post.html"]},
+        )
+
+    def test_remove_stale_files(self):
+        """Test that files the build didn't produce are removed, with the directories left empty."""
+        index = os.path.join(self.output_dir, "index.html")
+        removed = remove_stale_files(self.output_dir, {index})
+
+        self.assertEqual(removed, [os.path.join(self.output_dir, "blog", "post.html")])
+        self.assertTrue(os.path.exists(index))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "blog")))
+
+
+if __name__ == "__main__":
+    unittest.main()
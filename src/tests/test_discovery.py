@@ -0,0 +1,74 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from src.discovery import DirectorySnapshot
+
+
+class TestDirectorySnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name in ("index.md", "blog/b.md", "blog/a.md", "blog/2024/old.md", "about/team.md"):
+            self.write(name)
+        self.age_directories()
+        self.snapshot_path = os.path.join(self.root, ".cache", "directories.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name):
+        path = os.path.join(self.root, "content", name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(name)
+
+    def age_directories(self):
+        # Directories modified in the last few seconds are never trusted, so date them back
+        past = time.time() - 60
+        for root, dirs, files in os.walk(self.root):
+            os.utime(root, (past, past))
+
+    def scan(self, threads=1):
+        snapshot = DirectorySnapshot.load(self.snapshot_path)
+        paths = snapshot.scan(os.path.join(self.root, "content"), threads)
+        snapshot.save(self.snapshot_path)
+        return snapshot, [os.path.relpath(path, os.path.join(self.root, "content")) for path in paths]
+
+    def test_scan_order(self):
+        """Test that files are listed by directory, then by name, the same with threads or without."""
+        expected = ["index.md", "about/team.md", "blog/a.md", "blog/b.md", "blog/2024/old.md"]
+        self.assertEqual(self.scan()[1], expected)
+        self.assertEqual(self.scan(threads=4)[1], expected)
+
+    def test_unchanged_directories_are_reused(self):
+        """Test that only the directories whose entries changed are listed again."""
+        first, _ = self.scan()
+        self.assertEqual(first.reused, 0)
+
+        second, _ = self.scan()
+        self.assertEqual(second.reused, len(second.directories))
+
+        self.write("blog/2024/new.md")
+        os.remove(os.path.join(self.root, "content", "about", "team.md"))
+        third, paths = self.scan(threads=2)
+
+        self.assertIn("blog/2024/new.md", paths)
+        self.assertNotIn("about/team.md", paths)
+        self.assertEqual(len(third.directories) - third.reused, 2)
+
+    def test_recent_directories_are_listed_again(self):
+        """Test that a directory modified just before it was listed isn't trusted next time."""
+        self.write("blog/c.md")
+        self.scan()
+        snapshot, _ = self.scan()
+        self.assertEqual(len(snapshot.directories) - snapshot.reused, 1)
+
+    def test_missing_directory(self):
+        """Test that a missing directory has no files."""
+        self.assertEqual(DirectorySnapshot().scan(os.path.join(self.root, "missing")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
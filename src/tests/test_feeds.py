@@ -0,0 +1,93 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.feeds import AtomFeedWriter, ListingWriter, SitemapWriter
+from src.links import page_url
+
+
+def make_page(number):
+    return {"url": f"/post{number}/", "title": f"Post {number}", "mtime": 1700000000 + number}
+
+
+class TestPageUrl(unittest.TestCase):
+
+    def test_page_url(self):
+        """Test the URLs pages are served at."""
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url("majesty/index.html"), "/majesty/")
+        self.assertEqual(page_url("blog/post.html"), "/blog/post.html")
+
+
+class TestGenerators(unittest.TestCase):
+
+    def setUp(self):
+        self.dest_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dest_dir)
+
+    def read(self, *path):
+        with open(os.path.join(self.dest_dir, *path), 'r') as f:
+            return f.read()
+
+    def test_single_sitemap(self):
+        """Test that a small site gets a single sitemap.xml."""
+        sitemap = SitemapWriter(self.dest_dir, "https://example.com/")
+        sitemap.add_page(make_page(1))
+        sitemap.close()
+
+        content = self.read("sitemap.xml")
+        self.assertIn("<loc>https://example.com/post1/</loc>", content)
+        self.assertIn("<lastmod>2023-11-14T22:13:21Z</lastmod>", content)
+        self.assertEqual(sorted(os.listdir(self.dest_dir)), ["sitemap.xml"])
+
+    def test_sharded_sitemap(self):
+        """Test that the sitemap is sharded with an index past max_urls."""
+        sitemap = SitemapWriter(self.dest_dir, "https://example.com", max_urls=2)
+        for number in range(5):
+            sitemap.add_page(make_page(number))
+        sitemap.close()
+
+        self.assertEqual(
+            sorted(os.listdir(self.dest_dir)),
+            ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", "sitemap.xml"],
+        )
+        self.assertIn("<sitemap><loc>https://example.com/sitemap-3.xml</loc></sitemap>", self.read("sitemap.xml"))
+        self.assertEqual(self.read("sitemap-3.xml").count("<url>"), 1)
+
+    def test_feed_keeps_newest_entries(self):
+        """Test that the feed lists only the newest pages, newest first."""
+        feed = AtomFeedWriter(self.dest_dir, "https://example.com", "Blog & News", max_entries=2)
+        for number in [3, 1, 4, 2]:
+            feed.add_page(make_page(number))
+        feed.close()
+
+        content = self.read("feed.xml")
+        self.assertIn("<title>Blog &amp; News</title>", content)
+        self.assertLess(content.index("Post 4"), content.index("Post 3"))
+        self.assertNotIn("Post 2", content)
+        self.assertNotIn("Post 1", content)
+
+    def test_listing_pages(self):
+        """Test that listing pages are paginated with previous/next links."""
+        template_path = os.path.join(self.dest_dir, "template.html")
+        with open(template_path, 'w') as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+        listing = ListingWriter(self.dest_dir, template_path, page_size=2)
+        for number in range(1, 5):
+            listing.add_page(make_page(number))
+        listing.close()
+
+        first = self.read("pages", "1", "index.html")
+        second = self.read("pages", "2", "index.html")
+        self.assertIn('<li><a href="/post1/">Post 1</a></li>', first)
+        self.assertIn('<a href="/pages/2/">Next</a>', first)
+        self.assertIn('<a href="/pages/1/">Previous</a>', second)
+        self.assertNotIn("Next", second)
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "pages", "3")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import unittest
+import os
+import random
+import re
+import time
+from src.block_cache import BlockCache
+from src.node_cache import dump_nodes, load_nodes
+from src.render_context import RenderContext
+from src.utils import (extract_markdown_images, extract_markdown_links, find_markdown_links,
+                       iter_markdown_html, markdown_to_html_node, split_nodes_image, split_nodes_link)
+from src.textnode import TextNode
+
+
+# SSG_FUZZ_ITERATIONS=100000 runs a long fuzzing session, SSG_FUZZ_SEED reproduces one
+ITERATIONS = int(os.environ.get("SSG_FUZZ_ITERATIONS", 200))
+SEED = int(os.environ.get("SSG_FUZZ_SEED", 2024))
+
+# Seconds any single generated document may take to render
+DOCUMENT_TIME_LIMIT = 1.0
+
+# Rendering 4 times more input may take at most this many times longer. Linear
+# code takes about 4 times longer, quadratic code 16 times.
+GROWTH_LIMIT = 8
+
+INLINE_PIECES = ["word", " ", "  ", "\t", "*", "**", "`", "[", "]", "(", ")", "!", "![", "](", "#",
+                 "&", "<", ">", '"', "'", "\\", "_", "-", "1.", "{{>", "}}", "é", "✓", "\n",
+                 "|", "\\|", "[^", "[^1]", ":-", "---"]
+
+LINE_PREFIXES = ["", "", "", "# ", "###### ", "####### ", "> ", ">", "- ", "* ", "+ ", "1. ", "2) ",
+                 "  ", "    ", "\t", "   - ", "> - ", "- > ", "```", "~~~", "```python ", "---", "{{> x.md }}",
+                 "| a | b |", "|:--|--:|", "|---", "[^1]: ", "[^a]:"]
+
+
+def random_inline(rng, length):
+    return "".join(rng.choice(INLINE_PIECES) for _ in range(length))
+
+
+def random_markdown(rng, lines):
+    """
+    Returns a random document mixing block syntax (headings, lists, quotes,
+    fences, nesting, blank lines) with inline syntax, most of it malformed.
+    """
+    document = []
+    for _ in range(lines):
+        if rng.random() < 0.2:
+            document.append("")
+            continue
+        prefix = "".join(rng.choice(LINE_PREFIXES) for _ in range(rng.randint(1, 3)))
+        document.append(prefix + random_inline(rng, rng.randint(0, 12)).replace("\n", " "))
+    return "\n".join(document)
+
+
+# Inputs on which a backtracking regex or a rescanning loop goes quadratic, by size
+ADVERSARIAL = {
+    "open brackets": lambda n: "[" * n,
+    "image openers": lambda n: "![" * n,
+    "unclosed link urls": lambda n: "[a](" * n,
+    "links without urls": lambda n: "[a]" * n + "(",
+    "empty labels": lambda n: "[]()" * n,
+    "heading padding": lambda n: "# a" + " " * n + "x",
+    "heading closing": lambda n: "# a" + " #" * n,
+    "unclosed emphasis": lambda n: "**a*" * n,
+    "unclosed code": lambda n: "`a" * n,
+    "quote markers": lambda n: ">" * n,
+    "list markers": lambda n: "- " * n + "a",
+    "nested lists": lambda n: "\n".join("  " * (i % 300) + "- a" for i in range(n // 10)),
+    "nested quotes": lambda n: "\n".join(">" * (i % 300) + " a" for i in range(n // 10)),
+    "lazy continuation": lambda n: "> - a\n" + "b\n" * (n // 2),
+    "whitespace": lambda n: " \t" * n,
+    "blank lines": lambda n: "\n \n" * n,
+    "fences": lambda n: "```\n" * n,
+    "footnote refs": lambda n: "[^" * n + "\n\n[^a]: x",
+    "table cells": lambda n: "| a |\n|---|\n" + "|" * n,
+    "table rows": lambda n: "| a | b |\n|:-|-:|\n" + "| [x](/y) | [^1] |\n" * (n // 10) + "\n[^1]: z",
+    "footnote definitions": lambda n: "".join(f"[^{i}]: a[^{i + 1}]\n" for i in range(n // 10)) + "[^0]",
+    "unclosed bash strings": lambda n: "```bash\n" + '"\\' * n + "\n```",
+    "unclosed template literals": lambda n: "```js\n" + "`\\" * n + "\n```",
+    "unclosed strings": lambda n: "```python\n" + '"\\' * n + "\n```",
+    "unclosed comments": lambda n: "```css\n" + "/* " * n + "\n```",
+    "css properties": lambda n: "```css\n" + "a: " * n + "\n```",
+}
+
+
+def render_time(markdown, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        markdown_to_html_node(markdown).to_html()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def reference_links(text, image=False, empty_label=False):
+    """
+    The regexes the link scanner replaced, kept as its specification.
+    """
+    pattern = r'\[([^\]%s)\]\(([^)]+)\)' % ("]*" if empty_label else "]+")
+    if image:
+        pattern = "!" + pattern
+    return [(match.start(), match.end(), match.group(1), match.group(2)) for match in re.finditer(pattern, text)]
+
+
+class TestParserTime(unittest.TestCase):
+
+    def test_adversarial_inputs_are_linear(self):
+        """Test that rendering time grows linearly with the size of adversarial inputs."""
+        for name, make in ADVERSARIAL.items():
+            with self.subTest(name):
+                small = render_time(make(5000))
+                large = render_time(make(20000))
+                # Below a few milliseconds the timings are mostly noise
+                self.assertLess(large, max(small, 0.005) * GROWTH_LIMIT,
+                                f"{name}: {small:.4f}s for 5000, {large:.4f}s for 20000")
+
+    def test_random_documents_render_quickly(self):
+        """Test that no random document takes long to render."""
+        rng = random.Random(SEED)
+        for i in range(ITERATIONS):
+            markdown = random_markdown(rng, rng.randint(1, 60))
+            elapsed = render_time(markdown, repeat=1)
+            self.assertLess(elapsed, DOCUMENT_TIME_LIMIT, f"seed {SEED}, document {i}: {markdown!r}")
+
+
+class TestDifferential(unittest.TestCase):
+
+    def test_renderers_agree(self):
+        """Test that the whole-tree, streaming, block-cached and serialized renderings are identical."""
+        rng = random.Random(SEED)
+        block_cache = BlockCache()
+
+        for i in range(ITERATIONS):
+            markdown = random_markdown(rng, rng.randint(1, 30))
+            message = f"seed {SEED}, document {i}: {markdown!r}"
+
+            context = RenderContext()
+            node = markdown_to_html_node(markdown, context)
+            expected = node.to_html()
+
+            streamed_context = RenderContext()
+            streamed = "".join(iter_markdown_html(markdown, streamed_context))
+            self.assertEqual(streamed, expected, message)
+            self.assertEqual(streamed_context.links, context.links, message)
+
+            # Twice, so the blocks are rendered once and then come from the cache
+            for _ in range(2):
+                cached_context = RenderContext(block_cache=block_cache)
+                cached = markdown_to_html_node(markdown, cached_context).to_html()
+                self.assertEqual(cached, expected, message)
+                self.assertEqual(cached_context.links, context.links, message)
+
+            self.assertEqual(load_nodes(dump_nodes(node)).to_html(), expected, message)
+
+    def test_link_scanner_matches_regexes(self):
+        """Test that the link scanner finds exactly what the regexes it replaced found."""
+        rng = random.Random(SEED)
+        for i in range(ITERATIONS * 5):
+            text = random_inline(rng, rng.randint(0, 40))
+            for opener, image in (("[", False), ("![", True)):
+                for empty_label in (False, True):
+                    self.assertEqual(list(find_markdown_links(text, opener, empty_label)),
+                                     reference_links(text, image, empty_label),
+                                     f"seed {SEED}, text {i}: {text!r}, opener {opener!r}, empty_label {empty_label}")
+
+    def test_extractors_agree_with_splitters(self):
+        """Test that the extract_* functions find the links and images the split_nodes_* functions split out."""
+        rng = random.Random(SEED)
+        for i in range(ITERATIONS * 5):
+            text = random_inline(rng, rng.randint(0, 40))
+            message = f"seed {SEED}, text {i}: {text!r}"
+
+            links = [(node.text, node.url) for node in split_nodes_link([TextNode(text, "text")]) if node.text_type == "link"]
+            images = [(node.text, node.url) for node in split_nodes_image([TextNode(text, "text")]) if node.text_type == "image"]
+            self.assertEqual(links, extract_markdown_links(text), message)
+            self.assertEqual(images, extract_markdown_images(text), message)
+
+            # Splitting keeps all the text that isn't link syntax
+            plain = "".join(node.text for node in split_nodes_link([TextNode(text, "text")]) if node.text_type == "text")
+            self.assertEqual(plain, re.sub(r'\[([^\]]+)\]\(([^)]+)\)', "", text), message)
+
+
+if __name__ == "__main__":
+    unittest.main()
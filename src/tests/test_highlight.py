@@ -0,0 +1,81 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.highlight import Highlighter, highlight
+from src.render_context import RenderContext
+from src.utils import markdown_to_html_node
+
+
+class TestHighlight(unittest.TestCase):
+
+    def test_python_tokens(self):
+        """Test that keywords, strings, numbers and comments are wrapped in spans."""
+        result = highlight("def f(): return 'a' # done\nx = 42", "py")
+        self.assertEqual(
+            result,
+            '<span class="tok-keyword">def</span> f(): <span class="tok-keyword">return</span> '
+            '<span class="tok-string">\'a\'</span> <span class="tok-comment"># done</span>\n'
+            'x = <span class="tok-number">42</span>',
+        )
+
+    def test_escapes_entities(self):
+        """Test that HTML special characters inside code are escaped."""
+        self.assertEqual(highlight("a < b && c > d", "unknown"), "a &lt; b &amp;&amp; c &gt; d")
+        self.assertEqual(
+            highlight('"<b>"', "javascript"),
+            '<span class="tok-string">"&lt;b&gt;"</span>',
+        )
+
+    def test_unclosed_strings(self):
+        """Test that an unclosed string runs to the end of its line, or of the code if strings can span lines."""
+        self.assertEqual(highlight('x = "a\ny', "python"), 'x = <span class="tok-string">"a</span>\ny')
+        self.assertEqual(highlight('echo "a\nb', "bash"), 'echo <span class="tok-string">"a\nb</span>')
+
+
+class TestHighlighter(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_memoizes_in_memory(self):
+        """Test that a repeated snippet is highlighted once."""
+        highlighter = Highlighter()
+        first = highlighter.highlight("x = 1", "python")
+        second = highlighter.highlight("x = 1", "py")
+
+        self.assertEqual(first, second)
+        self.assertEqual((highlighter.hits, highlighter.misses), (1, 1))
+
+    def test_reuses_disk_cache(self):
+        """Test that a new Highlighter reuses the results of a previous one."""
+        Highlighter(self.cache_dir).highlight("x = 1", "python")
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        highlighter = Highlighter(self.cache_dir)
+        highlighter.highlight("x = 1", "python")
+        self.assertEqual((highlighter.hits, highlighter.misses), (1, 0))
+
+
+class TestCodeBlocks(unittest.TestCase):
+
+    def test_code_block_with_language(self):
+        """Test that a language tag adds a highlighted <code> element."""
+        markdown = "```go\nfunc main() {}\n```"
+        html = markdown_to_html_node(markdown, RenderContext(highlighter=Highlighter())).to_html()
+        self.assertEqual(
+            html,
+            '<pre><code class="language-go"><span class="tok-keyword">func</span> main() {}</code></pre>',
+        )
+
+    def test_code_block_without_language_is_escaped(self):
+        """Test that code blocks without a language are escaped."""
+        html = markdown_to_html_node("```\n<div>&</div>\n```").to_html()
+        self.assertEqual(html, "<pre>&lt;div&gt;&amp;&lt;/div&gt;</pre>")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from src.htmlnode import HTMLNode, LeafNode, ParentNode
+from src.htmlnode import HTMLNode, LeafNode, ParentNode, attributes_to_html, escape_attribute, escape_text
 
 
 class TestHtmlNode(unittest.TestCase):
@@ -143,5 +143,34 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(parent.to_html(), expected_html)
 
 
+class TestEscaping(unittest.TestCase):
+
+    def test_escape_text(self):
+        """Test that &, < and > are escaped in text, and quotes are not."""
+        self.assertEqual(escape_text('a < b & "c" > d'), 'a &lt; b &amp; "c" &gt; d')
+
+    def test_escape_text_fast_path(self):
+        """Test that text with nothing to escape is returned as is."""
+        text = "Nothing to escape here"
+        self.assertIs(escape_text(text), text)
+
+    def test_escape_attribute(self):
+        """Test that quotes are escaped in attribute values, and values are converted to strings."""
+        self.assertEqual(escape_attribute('say "hi" & <bye>'), 'say &quot;hi&quot; &amp; &lt;bye&gt;')
+        self.assertEqual(escape_attribute(3), "3")
+
+    def test_attributes_to_html(self):
+        """Test boolean and missing attributes."""
+        props = {"href": "/a?x=1&y=2", "hidden": True, "title": None, "download": False}
+        self.assertEqual(attributes_to_html(props), ' href="/a?x=1&amp;y=2" hidden')
+        self.assertEqual(attributes_to_html({}), "")
+
+    def test_props_are_escaped_by_leaf_and_parent_nodes(self):
+        """Test that LeafNode and ParentNode serialize their props the same way."""
+        leaf = LeafNode(value="x", tag="a", props={"title": 'a "b"'})
+        parent = ParentNode(children=[leaf], tag="div", props={"title": 'a "b"'})
+        self.assertEqual(parent.to_html(), '<div title="a &quot;b&quot;"><a title="a &quot;b&quot;">x</a></div>')
+
+
 if __name__ == "__main__": 
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.layouts import Layout, LayoutError, Layouts
+from src.links import Routes
+from src.main import generate_page
+from src.utils import split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+
+    def test_split_front_matter(self):
+        """Test that front matter is parsed and replaced by blank lines."""
+        metadata, markdown = split_front_matter('---\nlayout: docs\ntitle: "Part: one"\n---\n# Title\n')
+
+        self.assertEqual(metadata, {"layout": "docs", "title": "Part: one"})
+        self.assertEqual(markdown, "\n\n\n\n# Title\n")
+
+    def test_no_front_matter(self):
+        """Test that a page without front matter is left as is."""
+        self.assertEqual(split_front_matter("# Title\n---\n"), ({}, "# Title\n---\n"))
+
+
+class TestLayout(unittest.TestCase):
+
+    def test_render_fills_slots(self):
+        """Test that slots are filled, and unknown ones left as written."""
+        layout = Layout("<title>{{ Title }}</title>{{ Content }}{{ Other }}", [])
+
+        self.assertEqual(layout.segments, ["<title>", "Title", "</title>", "Content", "", "Other", ""])
+        self.assertEqual(layout.render({"Title": "T", "Content": "C"}), "<title>T</title>C{{ Other }}")
+
+
+class TestLayouts(unittest.TestCase):
+
+    def setUp(self):
+        self.layouts_dir = tempfile.mkdtemp()
+        self.base = self.write("base.html", "<html><title>{{ Title }}</title>{{ Content }}</html>")
+        self.blog = self.write("blog.html", "{{ extends base }}\n<main>{{ Content }}</main>")
+
+    def tearDown(self):
+        shutil.rmtree(self.layouts_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.layouts_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_find_by_section(self):
+        """Test that the nearest section layout is used, then the default one, then the template."""
+        layouts = Layouts(self.layouts_dir)
+
+        self.assertEqual(layouts.find(os.path.join("blog", "2024"), default="t.html"), self.blog)
+        self.assertEqual(layouts.find("docs", default="t.html"), "t.html")
+
+        default = self.write("default.html", "{{ Content }}")
+        self.assertEqual(layouts.find("docs", default="t.html"), default)
+        self.assertEqual(layouts.find("blog", name="base"), self.base)
+
+    def test_unknown_layout(self):
+        """Test that naming a missing layout, or one outside the layouts directory, is an error."""
+        layouts = Layouts(self.layouts_dir)
+        with self.assertRaises(LayoutError):
+            layouts.find(name="missing")
+        with self.assertRaises(LayoutError):
+            layouts.find(name="../base")
+
+    def test_three_level_chain(self):
+        """Test that a layout chain is resolved into one compiled layout."""
+        post = self.write("post.html", "{{ extends blog }}\n<article>{{ Content }}</article>")
+        layout = Layouts(self.layouts_dir).get(post)
+
+        self.assertEqual(
+            layout.render({"Title": "T", "Content": "C"}),
+            "<html><title>T</title><main><article>C</article></main></html>",
+        )
+        self.assertEqual(layout.files, [post, self.blog, self.base])
+
+    def test_compiled_once_until_changed(self):
+        """Test that a compiled layout is reused until a file of its chain changes."""
+        layouts = Layouts(self.layouts_dir)
+        layout = layouts.get(self.blog)
+        self.assertIs(layouts.get(self.blog), layout)
+
+        self.write("base.html", "<body>{{ Content }}</body>")
+        os.utime(self.base, (0, 0))
+        self.assertEqual(layouts.get(self.blog).render({"Content": "C"}), "<body><main>C</main></body>")
+
+    def test_cycle(self):
+        """Test that layouts extending each other are reported."""
+        self.write("a.html", "{{ extends b }}\nA")
+        self.write("b.html", "{{ extends a }}\nB")
+
+        with self.assertRaisesRegex(LayoutError, "a.html -> b.html -> a.html"):
+            Layouts(self.layouts_dir).get(os.path.join(self.layouts_dir, "a.html"))
+
+    def test_routes(self):
+        """Test that the root-relative URLs of a layout and its parents are resolved when it is compiled."""
+        self.write("base.html", '<link href="/index.css"><body>{{ Content }}</body>')
+        self.write("blog.html", '{{ extends base }}\n<a href="/blog">Blog</a>{{ Content }}')
+
+        layouts = Layouts(self.layouts_dir, routes=Routes.from_pages("/docs/", ["/blog/"]))
+        self.assertEqual(layouts.get(self.blog).render({"Content": "C"}),
+                         '<link href="/docs/index.css"><body><a href="/docs/blog/">Blog</a>C</body>')
+
+    def test_toc_slot(self):
+        """Test that a {{ Toc }} slot is filled with the table of contents of the page."""
+        layout = self.write("docs.html", "<nav>{{ Toc }}</nav><main>{{ Content }}</main>")
+        source = self.write("page.md", "# Guide\n\n## Step")
+        dest = os.path.join(self.layouts_dir, "out", "page.html")
+
+        generate_page(source, layout, dest)
+        with open(dest) as f:
+            html = f.read()
+
+        self.assertTrue(html.startswith('<nav><nav class="toc"><ul><li><a href="#guide">Guide</a>'))
+        self.assertIn('<h2 id="step">Step</h2>', html)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.config import BuildConfig
+from src.links import LinkIndex, Routes, resolve_internal_url
+from src.main import build
+from src.render_context import RenderContext
+from src.utils import markdown_to_html_node, parse_inline_markdown
+
+
+class TestResolveInternalUrl(unittest.TestCase):
+
+    def test_absolute_path(self):
+        """Test that absolute paths are normalized."""
+        self.assertEqual(resolve_internal_url("/majesty/", "/index.html"), "/majesty")
+        self.assertEqual(resolve_internal_url("/", "/majesty/index.html"), "/")
+
+    def test_relative_path(self):
+        """Test that relative paths are resolved against the page."""
+        self.assertEqual(resolve_internal_url("../images/a.png#top", "/majesty/index.html"), "/images/a.png")
+
+    def test_external_and_fragment(self):
+        """Test that external links and same-page fragments are skipped."""
+        self.assertIsNone(resolve_internal_url("https://example.com/x", "/index.html"))
+        self.assertIsNone(resolve_internal_url("mailto:someone@example.com", "/index.html"))
+        self.assertIsNone(resolve_internal_url("#section", "/index.html"))
+
+
+class TestCollectLinks(unittest.TestCase):
+
+    def test_parse_inline_markdown_records_links(self):
+        """Test that links and images are recorded with their line numbers."""
+        context = RenderContext("page.md")
+        html = parse_inline_markdown("A [link](/a)\nand ![img](/b.png) [again](/c)", context, 5)
+
+        self.assertEqual(html, 'A <a href="/a">link</a>\nand <img src="/b.png" alt="img"> <a href="/c">again</a>')
+        self.assertEqual(sorted(context.links), [(5, "/a", "link"), (6, "/b.png", "image"), (6, "/c", "link")])
+
+    def test_markdown_to_html_node_line_numbers(self):
+        """Test that line numbers refer to the markdown source."""
+        markdown = "\n# Title\n\nSome [text](/one)\n\n* item\n* [two](/two)\n"
+        context = RenderContext("page.md")
+        markdown_to_html_node(markdown, context)
+
+        self.assertEqual(context.links, [(4, "/one", "link"), (7, "/two", "link")])
+
+
+class TestLinkIndex(unittest.TestCase):
+
+    def test_broken_links(self):
+        """Test that only links without a matching output path are reported."""
+        index = LinkIndex()
+        index.add_output("index.html")
+        index.add_output("majesty/index.html")
+        index.add_output("images/rivendell.png")
+        index.add_links("content/majesty/index.md", "majesty/index.html", [
+            (3, "/", "link"),
+            (5, "/images/rivendell.png", "image"),
+            (7, "../majesty/", "link"),
+            (9, "/missing", "link"),
+            (11, "https://example.com", "link"),
+        ])
+
+        self.assertEqual(index.broken_links(), [("content/majesty/index.md", 9, "/missing", "link")])
+
+
+class TestRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.routes = Routes.from_pages("docs", ["/", "/majesty/", "/blog/post.html"])
+
+    def test_resolve(self):
+        """Test that root-relative URLs go under the base URL, sections to their index page."""
+        self.assertEqual(self.routes.resolve("/"), "/docs/")
+        self.assertEqual(self.routes.resolve("/index.html"), "/docs/")
+        self.assertEqual(self.routes.resolve("/majesty"), "/docs/majesty/")
+        self.assertEqual(self.routes.resolve("/majesty/index.html#top"), "/docs/majesty/#top")
+        self.assertEqual(self.routes.resolve("/blog/post.html?page=2"), "/docs/blog/post.html?page=2")
+        self.assertEqual(self.routes.resolve("/images/a.png"), "/docs/images/a.png")
+
+    def test_other_urls_are_left_alone(self):
+        """Test that relative, protocol-relative, external and fragment URLs are unchanged."""
+        for url in ("post.html", "../majesty/", "#top", "//cdn.example.com/a.js", "https://example.com/", "mailto:a@b.c"):
+            self.assertEqual(self.routes.resolve(url), url)
+
+    def test_rendered_links(self):
+        """Test that links and images are resolved as they are rendered, and recorded as written."""
+        context = RenderContext(routes=self.routes)
+        html = markdown_to_html_node("[Read](/majesty) ![Ring](/images/ring.png) [Up](../)", context).to_html()
+
+        self.assertEqual(html, '<p><a href="/docs/majesty/">Read</a> <img src="/docs/images/ring.png" alt="Ring"> '
+                               '<a href="../">Up</a></p>')
+        self.assertEqual([url for _, url, _ in context.links], ["/images/ring.png", "/majesty", "../"])
+
+    def test_template_attributes(self):
+        """Test that the root-relative URLs of a template's attributes are resolved."""
+        self.assertEqual(
+            self.routes.rewrite_attributes('<link href="/index.css"><a href=\'/majesty\'>M</a><script src="//cdn/a.js"></script>'),
+            '<link href="/docs/index.css"><a href=\'/docs/majesty/\'>M</a><script src="//cdn/a.js"></script>',
+        )
+
+    def test_fingerprint(self):
+        """Test that the fingerprint changes with the base URL and the sections."""
+        fingerprints = {
+            self.routes.fingerprint,
+            Routes.from_pages("/docs/", ["/", "/majesty/", "/blog/post.html"]).fingerprint,
+            Routes.from_pages("/docs/", ["/", "/majesty/", "/blog/"]).fingerprint,
+            Routes.from_pages("/site/", ["/", "/majesty/", "/blog/post.html"]).fingerprint,
+        }
+        self.assertEqual(len(fingerprints), 3)
+
+
+class TestRepeatedBuilds(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write("static/template.html", '<link href="/index.css">{{ Content }}')
+        self.write("partials/nav.md", "[home](/index.html)")
+        self.write("content/index.md", "# Home\n\n{{> nav.md }}\n\nSee [about](/about.html)")
+        self.write("content/about.md", "# About\n\nSee [about](/about.html)")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def test_base_url_changes_between_builds(self):
+        """Test that builds in one process with other base URLs share no rendered links, without a cache directory."""
+        # At the root, links are left as written
+        for base_url, home in (("/", "/index.html"), ("/docs/", "/docs/"), ("/", "/index.html")):
+            build(BuildConfig(root=self.root, workers=1, cache_dir=None, stages=(), base_url=base_url))
+            with open(os.path.join(self.root, "public", "index.html")) as f:
+                html = f.read()
+
+            self.assertIn(f'<link href="{base_url}index.css">', html)
+            self.assertIn(f'<a href="{home}">home</a>', html)
+            self.assertIn(f'<a href="{base_url}about.html">about</a>', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
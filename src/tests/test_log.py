@@ -0,0 +1,47 @@
+import unittest
+import io
+import json
+import logging
+from src.log import logger, setup_logging
+
+
+class TestLogging(unittest.TestCase):
+
+    def test_per_file_messages_off_by_default(self):
+        """Test that DEBUG records are dropped at the default level."""
+        stream = io.StringIO()
+        with setup_logging(stream=stream):
+            logger.debug("Copying file: a -> b")
+            logger.info("Built 1 pages")
+
+        self.assertEqual(stream.getvalue(), "Built 1 pages\n")
+
+    def test_json_lines(self):
+        """Test that JSON mode writes one object per record, with its fields."""
+        stream = io.StringIO()
+        with setup_logging(logging.DEBUG, "json", stream=stream):
+            logger.debug("Generated page", extra={"event": "page", "source": "a.md"})
+            logger.warning("Broken link", extra={"event": "broken_link", "line": 3})
+
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([entry["level"] for entry in entries], ["debug", "warning"])
+        self.assertEqual(entries[0]["source"], "a.md")
+        self.assertEqual(entries[1]["line"], 3)
+
+    def test_progress_bar(self):
+        """Test that progress mode draws a bar instead of per-page messages."""
+        stream = io.StringIO()
+        with setup_logging(mode="progress", stream=stream):
+            logger.info("Found 2 markdown files", extra={"event": "pages_found", "total": 2})
+            logger.debug("Generated page one", extra={"event": "page"})
+            logger.debug("Generated page two", extra={"event": "page"})
+            logger.debug("Copying file: a -> b")
+
+        output = stream.getvalue()
+        self.assertIn("2/2 pages\n", output)
+        self.assertNotIn("Generated page", output)
+        self.assertNotIn("Copying", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
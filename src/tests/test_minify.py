@@ -0,0 +1,117 @@
+import unittest
+import gzip
+import os
+import shutil
+import tempfile
+from src.config import BuildConfig
+from src.main import build
+from src.minify import compressed_siblings, minify_html, minify_css, precompress_output, write_output
+
+
+class TestMinifyHtml(unittest.TestCase):
+
+    def test_collapses_whitespace_between_tags(self):
+        """Test that layout whitespace between tags is removed."""
+        html = "<html>\n  <body>\n    <p>Hello   world</p>\n  </body>\n</html>"
+        self.assertEqual(minify_html(html), "<html><body><p>Hello world</p></body></html>")
+
+    def test_keeps_space_between_inline_elements(self):
+        """Test that a single space between inline elements is kept."""
+        html = "<p><b>bold</b> <i>italic</i></p>"
+        self.assertEqual(minify_html(html), html)
+
+    def test_preserves_pre_and_code(self):
+        """Test that the contents of <pre> and <code> are untouched."""
+        html = "<div>\n  <pre>line 1\n    line 2</pre>\n  <p>a  <code>x  =  1</code></p>\n</div>"
+        expected = "<div><pre>line 1\n    line 2</pre><p>a <code>x  =  1</code></p></div>"
+        self.assertEqual(minify_html(html), expected)
+
+    def test_removes_comments(self):
+        """Test that HTML comments are stripped."""
+        self.assertEqual(minify_html("<p>a<!-- note --></p>"), "<p>a</p>")
+
+
+class TestMinifyCss(unittest.TestCase):
+
+    def test_minify_css(self):
+        """Test that comments and redundant whitespace are removed."""
+        css = "/* base */\nbody {\n    margin: 0;\n    padding: 20px;\n}\n\nh1,\nh2 {\n    color: red;\n}\n"
+        self.assertEqual(minify_css(css), "body{margin:0;padding:20px}h1,h2{color:red}")
+
+    def test_preserves_strings(self):
+        """Test that whitespace inside string literals is kept."""
+        css = 'body { font-family: "Segoe  UI", Arial; }'
+        self.assertEqual(minify_css(css), 'body{font-family:"Segoe  UI",Arial}')
+
+
+class TestWriteOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.dest_dir = tempfile.mkdtemp()
+        self.dest_path = os.path.join(self.dest_dir, 'index.html')
+
+    def tearDown(self):
+        shutil.rmtree(self.dest_dir)
+
+    def test_writes_precompressed_siblings(self):
+        """Test that a .gz sibling with the same content is written."""
+        write_output(self.dest_path, "<p>\n  Hello\n</p>", minify=True, precompress=True)
+
+        with open(self.dest_path, 'r') as f:
+            self.assertEqual(f.read(), "<p> Hello </p>")
+
+        with gzip.open(self.dest_path + ".gz", 'rt') as f:
+            self.assertEqual(f.read(), "<p> Hello </p>")
+
+    def test_skips_unchanged_output(self):
+        """Test that unchanged output is neither rewritten nor recompressed."""
+        write_output(self.dest_path, "<p>Hello</p>", precompress=True)
+        for path in [self.dest_path] + compressed_siblings(self.dest_path):
+            os.utime(path, (0, 0))
+
+        write_output(self.dest_path, "<p>Hello</p>", precompress=True)
+        self.assertEqual(os.path.getmtime(self.dest_path + ".gz"), 0)
+
+        write_output(self.dest_path, "<p>Changed</p>", precompress=True)
+        self.assertNotEqual(os.path.getmtime(self.dest_path + ".gz"), 0)
+
+    def test_precompress_output_replaces_stale_siblings(self):
+        """Test that siblings older than their file are written again."""
+        write_output(self.dest_path, "<p>Hello</p>", precompress=True)
+        write_output(self.dest_path, "<p>Changed</p>")
+        os.utime(self.dest_path + ".gz", (0, 0))
+
+        self.assertEqual(precompress_output(self.dest_path), compressed_siblings(self.dest_path))
+        with gzip.open(self.dest_path + ".gz", 'rt') as f:
+            self.assertEqual(f.read(), "<p>Changed</p>")
+
+
+class TestPostRenderStage(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name, text in (("static/template.html", "<title>{{ Title }}</title>\n<main>\n  {{ Content }}\n</main>"),
+                           ("content/index.md", "# Home")):
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_generator_outputs(self):
+        """Test that the sitemap, feed and listing pages are precompressed, and the listing pages minified, like the pages."""
+        build(BuildConfig(root=self.root, workers=1, stages=("minify", "precompress", "sitemap", "feed", "listing")))
+
+        output_dir = os.path.join(self.root, "public")
+        for name in ("index.html", "sitemap.xml", "feed.xml", "pages/1/index.html"):
+            path = os.path.join(output_dir, name)
+            with open(path, 'rb') as f, gzip.open(path + ".gz", 'rb') as compressed:
+                self.assertEqual(compressed.read(), f.read(), name)
+        with open(os.path.join(output_dir, "pages", "1", "index.html")) as f:
+            self.assertNotIn("\n", f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.htmlnode import LeafNode, ParentNode
+from src.node_cache import NodeCache, dump_nodes, load_nodes, markdown_digest
+from src.utils import markdown_to_html_node
+
+
+class TestNodeFormat(unittest.TestCase):
+
+    def test_round_trip(self):
+        """Test that a tree with every kind of node and attribute value survives serialization."""
+        node = ParentNode(children=[
+            LeafNode(value="Title ✓", tag="h1", props={"id": "title"}),
+            ParentNode(children=[LeafNode(value="one", tag="li"), "<li>raw</li>"], tag="ol",
+                       props={"start": 3, "reversed": True, "hidden": False, "title": None}),
+            "<p>raw html</p>",
+        ], is_root=True)
+
+        loaded = load_nodes(dump_nodes(node))
+
+        self.assertEqual(loaded.to_html(), node.to_html())
+        self.assertTrue(loaded.is_root)
+        self.assertEqual(loaded.children[1].props, {"start": 3, "reversed": True, "hidden": False, "title": None})
+        self.assertEqual(loaded.children[1].children[1], "<li>raw</li>")
+
+    def test_strings_are_interned(self):
+        """Test that repeated strings are only stored once."""
+        items = [LeafNode(value="same text", tag="li", props={"class": "item"}) for _ in range(100)]
+        data = dump_nodes(ParentNode(children=items, tag="ul"))
+
+        self.assertEqual(data.count(b"same text"), 1)
+        self.assertEqual(data.count(b"item"), 1)
+
+    def test_rendered_markdown(self):
+        """Test that a parsed markdown document renders the same after a round trip."""
+        node = markdown_to_html_node("# Title\n\n- [a](/a)\n- b\n\n```python\nx = 1\n```\n\n> quote")
+        self.assertEqual(load_nodes(dump_nodes(node)).to_html(), node.to_html())
+
+    def test_rejects_other_data(self):
+        with self.assertRaises(ValueError):
+            load_nodes(b"not a tree")
+
+
+class TestNodeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.node = ParentNode(children=[LeafNode(value="text", tag="p")], is_root=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_hit_for_same_markdown(self):
+        """Test that the tree, links and includes come back for unchanged markdown only."""
+        cache = NodeCache(self.cache_dir)
+        counts = {"blocks": {"paragraph": 1}, "inline": {"link": 1}}
+        cache.put("page.md", markdown_digest("text"), self.node, [(1, "/a", "link")], [], [(2, "b", "B", "b")], counts)
+
+        node, links, includes, headings, cached_counts = NodeCache(self.cache_dir).get("page.md", markdown_digest("text"))
+        self.assertEqual(headings, [(2, "b", "B", "b")])
+        self.assertEqual(cached_counts, counts)
+        self.assertEqual(node.to_html(), "<p>text</p>")
+        self.assertEqual(links, [(1, "/a", "link")])
+        self.assertIsNone(cache.get("page.md", markdown_digest("changed")))
+        self.assertIsNone(cache.get("other.md", markdown_digest("text")))
+
+    def test_miss_when_partial_changes(self):
+        """Test that an entry is dropped when a partial it includes changed."""
+        partial = os.path.join(self.cache_dir, "footer.md")
+        with open(partial, 'w') as f:
+            f.write("footer")
+
+        cache = NodeCache(os.path.join(self.cache_dir, "nodes"))
+        cache.put("page.md", markdown_digest("text"), self.node, [], [partial])
+        self.assertIsNotNone(cache.get("page.md", markdown_digest("text")))
+
+        os.utime(partial, (0, 0))
+        self.assertIsNone(cache.get("page.md", markdown_digest("text")))
+
+
+if __name__ == "__main__":
+    unittest.main()
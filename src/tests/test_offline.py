@@ -0,0 +1,76 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from src.offline import PRECACHE_MANIFEST, SERVICE_WORKER, precache_entries, write_offline_files
+
+
+class TestOffline(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.outputs = {
+            self.write("index.html", "<p>Home</p>"),
+            self.write("blog/post.html", "<p>Post</p>"),
+            self.write("index.html.gz", "compressed"),
+            self.write(SERVICE_WORKER, "old worker"),
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.output_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def read_precache(self):
+        with open(os.path.join(self.output_dir, PRECACHE_MANIFEST)) as f:
+            return dict(json.load(f))
+
+    def test_precache_entries(self):
+        """Test that pages are precached, and compressed siblings and the worker itself aren't."""
+        entries = precache_entries(self.output_dir, self.outputs)
+        self.assertEqual(list(entries), ["blog/post.html", "index.html"])
+
+    def test_reuses_previous_hashes(self):
+        """Test that a file with the same size and mtime as in the previous manifest isn't hashed again."""
+        previous = precache_entries(self.output_dir, self.outputs)
+        previous["index.html"] = dict(previous["index.html"], sha256="cached" * 4)
+
+        self.assertEqual(precache_entries(self.output_dir, self.outputs, previous)["index.html"]["sha256"], "cached" * 4)
+
+    def test_revisions_follow_content(self):
+        """Test that only the revision of a changed file changes, and the worker changes with it."""
+        write_offline_files(self.output_dir, precache_entries(self.output_dir, self.outputs))
+        first = self.read_precache()
+        with open(os.path.join(self.output_dir, SERVICE_WORKER)) as f:
+            first_worker = f.read()
+
+        self.write("index.html", "<p>New home</p>")
+        write_offline_files(self.output_dir, precache_entries(self.output_dir, self.outputs))
+        second = self.read_precache()
+        with open(os.path.join(self.output_dir, SERVICE_WORKER)) as f:
+            second_worker = f.read()
+
+        self.assertEqual(first["blog/post.html"], second["blog/post.html"])
+        self.assertNotEqual(first["index.html"], second["index.html"])
+        self.assertIn(f'["index.html","{second["index.html"]}"]', second_worker)
+        self.assertNotEqual(first_worker, second_worker)
+
+    def test_unchanged_files_are_left_alone(self):
+        """Test that rewriting the same precache list keeps both files' mtime."""
+        entries = precache_entries(self.output_dir, self.outputs)
+        outputs = write_offline_files(self.output_dir, entries, precompress=True)
+        mtimes = {path: os.stat(path).st_mtime_ns for path in outputs}
+
+        self.assertIn(os.path.join(self.output_dir, SERVICE_WORKER + ".gz"), outputs)
+        self.assertEqual(write_offline_files(self.output_dir, entries, precompress=True), outputs)
+        self.assertEqual({path: os.stat(path).st_mtime_ns for path in outputs}, mtimes)
+
+
+if __name__ == "__main__":
+    unittest.main()
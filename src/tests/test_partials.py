@@ -0,0 +1,159 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.block_cache import BlockCache
+from src.block_parser import parse_blocks
+from src.links import Routes
+from src.main import generate_page
+from src.partials import IncludeError, IncludeGraph, Partials, get_partials
+from src.render_context import RenderContext
+from src.utils import markdown_to_html_node
+
+
+class TestIncludeBlocks(unittest.TestCase):
+
+    def test_include_is_a_top_level_block(self):
+        """Test that an include line becomes its own block, but only at the top level."""
+        document = parse_blocks("Intro\n{{> footer.md }}\n\n- {{> item.md }}")
+
+        self.assertEqual([block.kind for block in document.children], ['paragraph', 'include', 'unordered list'])
+        self.assertEqual(document.children[1].path, "footer.md")
+
+    def test_include_after_a_list(self):
+        """Test that an include right after a list is at the top level."""
+        for container in ("- a", "1. a"):
+            with self.subTest(container=container):
+                document = parse_blocks(f"{container}\n\n{{{{> footer.md }}}}")
+                self.assertEqual(document.children[-1].kind, 'include')
+
+    def test_include_without_partials(self):
+        """Test that the directive is kept as text when there are no partials to render it from."""
+        html = markdown_to_html_node("{{> footer.md }}").to_html()
+        self.assertEqual(html, "<p>{{&gt; footer.md }}</p>")
+
+
+class TestPartials(unittest.TestCase):
+
+    def setUp(self):
+        self.partials_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.partials_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.partials_dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_markdown_partial(self):
+        """Test that a markdown partial is rendered in place, with its links recorded at the include's line."""
+        path = self.write("footer.md", "Read the [license](/license).")
+        context = RenderContext(partials=Partials(self.partials_dir))
+
+        html = markdown_to_html_node("# Page\n\n{{> footer.md }}", context).to_html()
+
+        self.assertEqual(html, '<h1 id="page">Page</h1><p>Read the <a href="/license">license</a>.</p>')
+        self.assertEqual(context.includes, [path])
+        self.assertEqual(context.links, [(3, "/license", "link")])
+
+    def test_nested_partials_and_template(self):
+        """Test that partials can include partials, in templates too."""
+        footer = self.write("footer.html", "<footer>{{> year.html }}</footer>")
+        year = self.write("year.html", "2024")
+        template = self.write("template.html", "<body>{{ Content }}{{> footer.html }}</body>")
+
+        html, includes = Partials(self.partials_dir).template(template)
+
+        self.assertEqual(html, "<body>{{ Content }}<footer>2024</footer></body>")
+        self.assertEqual(includes, [footer, year])
+
+    def test_rendered_once_until_changed(self):
+        """Test that a partial is rendered once, and again after it (or a partial it includes) changes."""
+        self.write("outer.html", "[{{> inner.html }}]")
+        inner = self.write("inner.html", "a")
+        partials = Partials(self.partials_dir)
+
+        first = partials.render("outer.html")
+        self.assertIs(partials.render("outer.html")[0], first[0])
+
+        self.write("inner.html", "b")
+        os.utime(inner, (0, 0))
+        self.assertEqual(partials.render("outer.html")[0], "[b]")
+
+    def test_cycle(self):
+        """Test that an include cycle is reported instead of recursing forever."""
+        self.write("a.md", "{{> b.md }}")
+        self.write("b.md", "{{> a.md }}")
+
+        with self.assertRaisesRegex(IncludeError, "a.md -> b.md -> a.md"):
+            Partials(self.partials_dir).render("a.md")
+
+    def test_outside_partials_dir(self):
+        """Test that includes can't read files outside the partials directory."""
+        with self.assertRaises(IncludeError):
+            Partials(self.partials_dir).render("../secret.md")
+
+    def test_not_cached_as_a_block(self):
+        """Test that the block cache doesn't keep a partial's content for the include line."""
+        self.write("note.md", "old")
+        partials = Partials(self.partials_dir)
+        cache = BlockCache()
+
+        markdown_to_html_node("{{> note.md }}", RenderContext(block_cache=cache, partials=partials))
+        path = self.write("note.md", "new")
+        os.utime(path, (0, 0))
+        html = markdown_to_html_node("{{> note.md }}", RenderContext(block_cache=cache, partials=partials)).to_html()
+
+        self.assertEqual(html, "<p>new</p>")
+
+    def test_fingerprints_get_partials_of_their_own(self):
+        """Test that a partial rendered under some routes isn't reused under others."""
+        self.write("nav.md", "[home](/index.html)")
+        for fingerprint, base_url in ((None, "/"), ("docs", "/docs/")):
+            partials = get_partials(self.partials_dir, fingerprint)
+            html, _, _ = partials.render("nav.md", RenderContext(routes=Routes.from_pages(base_url, ["/"])))
+            self.assertEqual(html, f'<p><a href="{base_url}">home</a></p>')
+
+
+    def test_template_and_page_under_a_base_url(self):
+        """Test that a partial in both the template and the page has its links resolved in both."""
+        self.write("nav.md", "[other](/other/)")
+        template = self.write("template.html", "<header>{{> nav.md }}</header>{{ Content }}")
+        source = self.write("page.md", "# Page\n\n{{> nav.md }}")
+        dest = os.path.join(self.partials_dir, "out", "page.html")
+
+        generate_page(source, template, dest, partials_dir=self.partials_dir, routes=Routes("/docs/"))
+
+        with open(dest) as f:
+            html = f.read()
+        self.assertEqual(html.count('href="/docs/other/"'), 2)
+        self.assertNotIn('href="/other/"', html)
+
+
+class TestIncludeGraph(unittest.TestCase):
+
+    def test_dependents(self):
+        """Test that only the pages using a partial depend on it."""
+        graph = IncludeGraph()
+        graph.add_page("a.md", ["footer.md", "nav.md"])
+        graph.add_page("b.md", ["footer.md"])
+        graph.add_page("c.md", [])
+
+        self.assertEqual(graph.dependents("nav.md"), ["a.md"])
+        self.assertEqual(graph.dependents("footer.md"), ["a.md", "b.md"])
+        self.assertEqual(graph.dependents("c.md"), [])
+
+    def test_pages_added_again_replace_their_includes(self):
+        """Test that a page that no longer includes a partial stops depending on it."""
+        graph = IncludeGraph()
+        graph.add_page("a.md", ["footer.md", "nav.md"])
+        graph.add_page("a.md", ["footer.md"])
+
+        self.assertEqual(graph.dependents("nav.md"), [])
+        self.assertEqual(graph.dependents("footer.md"), ["a.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
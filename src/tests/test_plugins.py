@@ -0,0 +1,162 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.main import generate_page
+from src.plugins import PluginError, Registry
+from src.render_context import RenderContext
+from src.utils import CORE_REGISTRY, get_registry, markdown_to_html_node
+
+
+PLUGIN = '''
+from htmlnode import LeafNode
+
+
+def mark(text, context, line):
+    return text.replace("==", "<mark>", 1).replace("==", "</mark>", 1)
+
+
+def notes(document, context):
+    for block in document.children:
+        if block.kind == 'paragraph' and block.lines[0].startswith("NOTE:"):
+            block.kind = 'note'
+
+
+def render_note(block, context, tight):
+    return LeafNode(value=" ".join(block.lines)[5:].strip(), tag="aside")
+
+
+def stamp(page):
+    page["markdown"] += "\\n\\nAdded ==before== rendering"
+
+
+def sign(page):
+    page["html"] = page["html"].replace("</main>", "<footer>signed</footer></main>")
+
+
+def register(registry):
+    registry.add_inline_rule("mark", mark, trigger="==", before="link")
+    registry.add_block_transform(notes)
+    registry.add_block_renderer("note", render_note)
+    registry.add_pre_render(stamp)
+    registry.add_post_render(sign)
+'''
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.plugin_path = os.path.join(self.temp_dir, "notes.py")
+        with open(self.plugin_path, 'w') as f:
+            f.write(PLUGIN)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def render(self, markdown, registry):
+        return markdown_to_html_node(markdown, RenderContext(registry=registry)).to_html()
+
+    def test_core_rules_have_triggers(self):
+        """Test that the built-in inline rules run in order, each with a trigger."""
+        self.assertEqual([name for name, _, _ in CORE_REGISTRY.inline_rules], ["bold", "italic", "code", "footnote", "image", "link"])
+        self.assertTrue(all(trigger for _, trigger, _ in CORE_REGISTRY.inline_rules))
+        self.assertIs(get_registry(()), CORE_REGISTRY)
+
+    def test_plugin_renderers_and_rules(self):
+        """Test that a plugin's transform, block renderer and inline rule are used."""
+        registry = CORE_REGISTRY.copy()
+        registry.load(self.plugin_path)
+
+        self.assertEqual(self.render("NOTE: careful\n\nSome ==marked== [text](/a)", registry),
+                         '<aside>careful</aside><p>Some <mark>marked</mark> <a href="/a">text</a></p>')
+        # The built-in registry is left alone
+        self.assertEqual(self.render("NOTE: careful", CORE_REGISTRY), "<p>NOTE: careful</p>")
+
+    def test_plugin_time_is_recorded(self):
+        """Test that the time spent in a plugin adds up, and the built-in handlers aren't timed."""
+        registry = CORE_REGISTRY.copy()
+        registry.load(self.plugin_path)
+        self.render("NOTE: a\n\n==b==", registry)
+
+        timings = registry.take_timings()
+        self.assertEqual(list(timings), ["notes"])
+        self.assertGreater(timings["notes"], 0)
+        self.assertEqual(registry.take_timings(), {})
+
+    def test_rule_replacement_and_order(self):
+        """Test that a rule with an existing name replaces it, and before places a new one."""
+        registry = Registry()
+        registry.add_inline_rule("a", lambda text, context, line: text + "a")
+        registry.add_inline_rule("c", lambda text, context, line: text + "c")
+        registry.add_inline_rule("b", lambda text, context, line: text + "b", before="c")
+        registry.add_inline_rule("a", lambda text, context, line: text + "A")
+
+        self.assertEqual([name for name, _, _ in registry.inline_rules], ["a", "b", "c"])
+        with self.assertRaises(PluginError):
+            registry.add_inline_rule("d", lambda text, context, line: text, before="missing")
+
+    def test_load_errors(self):
+        """Test that missing plugins and plugins without register() are reported."""
+        empty_path = os.path.join(self.temp_dir, "empty.py")
+        with open(empty_path, 'w') as f:
+            f.write("x = 1\n")
+
+        for plugin in ("no_such_plugin_module", os.path.join(self.temp_dir, "missing.py"), empty_path):
+            with self.assertRaises(PluginError):
+                Registry().load(plugin)
+
+    def test_fingerprint_follows_code(self):
+        """Test that the fingerprint changes when a plugin's code does."""
+        first = CORE_REGISTRY.copy()
+        first.load(self.plugin_path)
+        with open(self.plugin_path, 'a') as f:
+            f.write("\n# changed\n")
+        second = CORE_REGISTRY.copy()
+        second.load(self.plugin_path)
+
+        self.assertTrue(first.fingerprint)
+        self.assertNotEqual(first.fingerprint, second.fingerprint)
+
+    def test_page_hooks(self):
+        """Test that pre-render hooks change the markdown and post-render hooks the page."""
+        source = os.path.join(self.temp_dir, "page.md")
+        template = os.path.join(self.temp_dir, "template.html")
+        dest = os.path.join(self.temp_dir, "out", "page.html")
+        with open(source, 'w') as f:
+            f.write("# Title")
+        with open(template, 'w') as f:
+            f.write("<main>{{ Content }}</main>")
+
+        page = generate_page(source, template, dest, plugins=(self.plugin_path,))
+        with open(dest) as f:
+            html = f.read()
+
+        self.assertEqual(html, '<main><h1 id="title">Title</h1><p>Added <mark>before</mark> rendering</p><footer>signed</footer></main>')
+        self.assertIn("notes", page["plugin_times"])
+
+    def test_blocks_and_partials_are_not_shared_across_plugins(self):
+        """Test that what was rendered without a plugin isn't reused with it, without any cache directory."""
+        partials_dir = os.path.join(self.temp_dir, "partials")
+        os.makedirs(partials_dir)
+        with open(os.path.join(partials_dir, "note.md"), 'w') as f:
+            f.write("In a ==partial==")
+        source = os.path.join(self.temp_dir, "page.md")
+        template = os.path.join(self.temp_dir, "template.html")
+        dest = os.path.join(self.temp_dir, "out", "page.html")
+        with open(source, 'w') as f:
+            f.write("A ==mark==\n\n{{> note.md }}")
+        with open(template, 'w') as f:
+            f.write("<main>{{ Content }}</main>")
+
+        generate_page(source, template, dest, partials_dir=partials_dir)
+        generate_page(source, template, dest, partials_dir=partials_dir, plugins=(self.plugin_path,))
+        with open(dest) as f:
+            html = f.read()
+
+        self.assertIn("<p>A <mark>mark</mark></p>", html)
+        self.assertIn("<p>In a <mark>partial</mark></p>", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
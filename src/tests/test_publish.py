@@ -0,0 +1,133 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.config import BuildConfig
+from src.main import build
+from src.minify import write_output
+from src.publish import KEEP_GENERATIONS, StagedPublisher, exchange_paths
+from src.site_index import SiteIndex
+
+
+class TestStagedPublisher(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.root, "public")
+        os.makedirs(self.output_dir)
+        self.write(os.path.join(self.output_dir, "index.html"), "<p>Home</p>")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def publish(self, text):
+        publisher = StagedPublisher(self.output_dir)
+        staging = publisher.prepare()
+        write_output(os.path.join(staging, "index.html"), text)
+        thread = publisher.publish()
+        if thread is not None:
+            thread.join()
+        return staging
+
+    def test_first_publish_replaces_directory(self):
+        """Test that the plain output directory becomes a link to the new generation."""
+        staging = self.publish("<p>New</p>")
+
+        self.assertTrue(os.path.islink(self.output_dir))
+        self.assertEqual(os.path.realpath(self.output_dir), os.path.realpath(staging))
+        self.assertEqual(self.read(os.path.join(self.output_dir, "index.html")), "<p>New</p>")
+
+    def test_first_publish_keeps_old_directory(self):
+        """Test that the plain output directory joins the generations, older than the new one."""
+        staging = self.publish("<p>New</p>")
+
+        generations = sorted(os.listdir(os.path.dirname(staging)))
+        self.assertEqual(generations[-1], os.path.basename(staging))
+        self.assertEqual(self.read(os.path.join(os.path.dirname(staging), generations[0], "index.html")), "<p>Home</p>")
+        self.assertEqual([name for name in os.listdir(self.root) if name.endswith(".tmp")], [])
+
+    def test_exchange_paths(self):
+        """Test that a directory and a link to another one swap places."""
+        other = os.path.join(self.root, "other")
+        os.makedirs(other)
+        link = os.path.join(self.root, "link")
+        os.symlink("other", link)
+
+        if not exchange_paths(link, self.output_dir):
+            self.skipTest("renameat2 exchange isn't supported here")
+        self.assertTrue(os.path.islink(self.output_dir))
+        self.assertEqual(os.path.realpath(self.output_dir), os.path.realpath(other))
+        self.assertEqual(self.read(os.path.join(link, "index.html")), "<p>Home</p>")
+
+    def test_staging_shares_unchanged_files(self):
+        """Test that the staged generation links to the live files, and writing there leaves the live ones alone."""
+        self.publish("<p>Home</p>")
+        live_path = os.path.join(self.output_dir, "index.html")
+
+        publisher = StagedPublisher(self.output_dir)
+        staging = publisher.prepare()
+        staged_path = os.path.join(staging, "index.html")
+        self.assertTrue(os.path.samefile(live_path, staged_path))
+
+        write_output(staged_path, "<p>Changed</p>")
+        self.assertEqual(self.read(live_path), "<p>Home</p>")
+
+        publisher.discard()
+        self.assertFalse(os.path.exists(staging))
+        self.assertEqual(self.read(live_path), "<p>Home</p>")
+
+    def test_old_generations_are_removed(self):
+        """Test that only the live generation and the ones kept before it remain."""
+        for i in range(4):
+            staging = self.publish(f"<p>{i}</p>")
+
+        generations = sorted(os.listdir(self.output_dir + ".generations"))
+        self.assertEqual(len(generations), KEEP_GENERATIONS + 1)
+        self.assertEqual(generations[-1], os.path.basename(staging))
+
+
+class TestStagedBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write("static/template.html", "{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post.md", "# Post")
+        self.config = BuildConfig(root=self.root, workers=1, stages=("staged",))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_partial_rebuilds_keep_every_page(self):
+        """Test that a rebuild of one page publishes a generation that still holds the others."""
+        index = SiteIndex()
+        build(self.config, index)
+        post = self.write("content/blog/post.md", "# New post")
+        report = build(self.config, index, [post])
+
+        self.assertFalse(report["full"])
+        public = os.path.join(self.root, "public")
+        self.assertTrue(os.path.islink(public))
+        self.assertEqual(sorted(os.listdir(public)), ["blog", "index.html", "template.html"])
+        with open(os.path.join(public, "blog", "post.html")) as f:
+            self.assertIn("New post", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
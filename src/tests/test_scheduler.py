@@ -0,0 +1,122 @@
+import unittest
+import gzip
+import os
+import shutil
+import tempfile
+from src.layouts import Layout
+from src.main import generate_page, iter_jobs
+from src.minify import write_stream
+from src.render_context import RenderContext
+from src.scheduler import MemoryBudget, estimate_page_memory
+from src.utils import iter_markdown_html, markdown_to_html_node
+
+
+class TestMemoryBudget(unittest.TestCase):
+
+    def test_fits(self):
+        """Test that jobs fit next to the ones in flight up to the budget, and a lone job always fits."""
+        budget = MemoryBudget(limit=1000, reserved=200)
+
+        self.assertTrue(budget.fits(5000))
+        budget.acquire(500)
+        self.assertTrue(budget.fits(300))
+        self.assertFalse(budget.fits(301))
+
+        budget.release(500)
+        self.assertEqual((budget.in_flight, budget.peak_in_flight), (0, 500))
+
+    def test_no_limit(self):
+        self.assertTrue(MemoryBudget().fits(10 ** 12))
+
+    def test_estimate_grows_with_size(self):
+        self.assertGreater(estimate_page_memory(2000), estimate_page_memory(1000))
+
+
+class TestIterJobs(unittest.TestCase):
+
+    def test_throttles_in_pool(self):
+        """Test that jobs which don't fit wait for earlier ones, and results keep their order."""
+        jobs = [(i, 2) for i in range(8)]
+        budget = MemoryBudget(limit=250)
+
+        results = list(iter_jobs(pow, jobs, workers=2, costs=[100] * 8, budget=budget))
+
+        self.assertEqual(results, [i ** 2 for i in range(8)])
+        self.assertEqual(budget.peak_in_flight, 200)
+        self.assertGreater(budget.throttled, 0)
+        self.assertEqual(budget.in_flight, 0)
+
+    def test_sequential(self):
+        budget = MemoryBudget(limit=50)
+        self.assertEqual(list(iter_jobs(pow, [(2, 3), (3, 2)], costs=[100, 100], budget=budget)), [8, 9])
+        self.assertEqual(budget.peak_in_flight, 100)
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.dest_dir = tempfile.mkdtemp()
+        self.dest_path = os.path.join(self.dest_dir, "page.html")
+
+    def tearDown(self):
+        shutil.rmtree(self.dest_dir)
+
+    def test_streamed_page_matches(self):
+        """Test that a page written block by block is the same as one rendered whole."""
+        markdown = "# Title\n\nSome [link](/a)\n\n- one\n- two\n\n```python\nx = 1\n```\n"
+        layout = Layout("<title>{{ Title }}</title><main>{{ Content }}</main>", [])
+        context = RenderContext()
+
+        write_stream(self.dest_path, layout.render_parts({"Title": "T", "Content": iter_markdown_html(markdown, context)}),
+                     precompress=True)
+
+        expected = layout.render({"Title": "T", "Content": markdown_to_html_node(markdown).to_html()})
+        with open(self.dest_path) as f:
+            self.assertEqual(f.read(), expected)
+        with gzip.open(self.dest_path + ".gz", 'rt') as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(context.links, [(3, "/a", "link")])
+
+    def test_parsed_as_written(self):
+        """Test that lines are only read once the blocks before them have been written."""
+        read = []
+        def lines():
+            for line in ["# Title", "", "First", "", "Second"]:
+                read.append(line)
+                yield line
+
+        content = iter_markdown_html(lines())
+        self.assertEqual(next(content), '<h1 id="title">Title</h1>')
+        self.assertNotIn("Second", read)
+        self.assertEqual("".join(content), "<p>First</p><p>Second</p>")
+
+    def test_streamed_file_matches(self):
+        """Test that a file read a line at a time renders like one read whole, and that its dropped table of contents is reported."""
+        source = os.path.join(self.dest_dir, "page.md")
+        template = os.path.join(self.dest_dir, "template.html")
+        with open(source, 'w') as f:
+            f.write("---\nauthor: me\n# not a title\n---\n# Title\n\n## Part\n\ntext\n")
+        with open(template, 'w') as f:
+            f.write("<title>{{ Title }}</title>{{ Toc }}{{ Content }}")
+
+        whole = generate_page(source, template, os.path.join(self.dest_dir, "whole.html"))
+        with self.assertLogs("ssg", "WARNING") as logs:
+            streamed = generate_page(source, template, self.dest_path, stream=True)
+
+        with open(self.dest_path) as f:
+            self.assertEqual(f.read(), '<title>Title</title><h1 id="title">Title</h1><h2 id="part">Part</h2><p>text</p>')
+        self.assertEqual(streamed["cost"]["blocks"], whole["cost"]["blocks"])
+        self.assertIn("empty table of contents", logs.output[0])
+
+    def test_unchanged_output_is_kept(self):
+        """Test that a streamed file with the same content keeps its mtime."""
+        write_stream(self.dest_path, ["<p>", "same", "</p>"])
+        os.utime(self.dest_path, (0, 0))
+        write_stream(self.dest_path, ["<p>same</p>"])
+
+        self.assertEqual(os.path.getmtime(self.dest_path), 0)
+        self.assertEqual(os.listdir(self.dest_dir), ["page.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
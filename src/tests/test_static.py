@@ -2,7 +2,7 @@ import unittest
 import os
 import shutil
 import tempfile
-from src.copy_static import clear_and_copy, recursive_copy
+from src.copy_static import clear_and_copy, copy_if_changed, list_files, recursive_copy
 
 class TestFileCopy(unittest.TestCase):
 
@@ -72,5 +72,26 @@ class TestFileCopy(unittest.TestCase):
         with open(os.path.join(self.dest_dir, 'subdir', 'file2.txt'), 'r') as f:
             self.assertEqual(f.read(), 'This is file 2.')
 
+    def test_list_files(self):
+        """Test that list_files pairs every source file with its destination."""
+        self.assertEqual(list_files(self.src_dir, self.dest_dir), [
+            (os.path.join(self.src_dir, 'file1.txt'), os.path.join(self.dest_dir, 'file1.txt')),
+            (os.path.join(self.src_dir, 'subdir', 'file2.txt'), os.path.join(self.dest_dir, 'subdir', 'file2.txt')),
+        ])
+
+    def test_copy_if_changed(self):
+        """Test that copy_if_changed leaves identical files, and their mtime, alone."""
+        src_file = os.path.join(self.src_dir, 'subdir', 'file2.txt')
+        dest_file = os.path.join(self.dest_dir, 'subdir', 'file2.txt')
+
+        self.assertTrue(copy_if_changed(src_file, dest_file))
+        os.utime(dest_file, (0, 0))
+        self.assertFalse(copy_if_changed(src_file, dest_file))
+        self.assertEqual(os.path.getmtime(dest_file), 0)
+
+        with open(src_file, 'w') as f:
+            f.write('This is file 2, changed.')
+        self.assertTrue(copy_if_changed(src_file, dest_file))
+
 if __name__ == '__main__':
     unittest.main()
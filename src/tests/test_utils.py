@@ -433,7 +433,7 @@ class TestMarkdownToHtmlNode(unittest.TestCase):
         """Test Markdown with a single heading."""
         markdown = "# Heading Level 1"
         html_node = markdown_to_html_node(markdown)
-        expected_output = '<h1>Heading Level 1</h1>'
+        expected_output = '<h1 id="heading-level-1">Heading Level 1</h1>'
         self.assertEqual(html_node.to_html(), expected_output)
 
     def test_paragraph(self):
@@ -507,7 +507,7 @@ print('Code block')
 """
         html_node = markdown_to_html_node(markdown)
         expected_output = (
-            '<h1>Heading Level 1</h1>'
+            '<h1 id="heading-level-1">Heading Level 1</h1>'
             '<p>This is a paragraph.</p>'
             '<ul><li>List item 1</li><li>List item 2</li></ul>'
             '<pre>print(\'Code block\')</pre>'
@@ -557,3 +557,72 @@ if __name__ == "__main__":
 
 
 
+
+
+class TestParseInlineMarkdownEscaping(unittest.TestCase):
+
+    def test_text_is_escaped(self):
+        """Test that HTML in the text is escaped, inline code included."""
+        self.assertEqual(
+            parse_inline_markdown("1 < 2 & `<b>` **bold**"),
+            "1 &lt; 2 &amp; <code>&lt;b&gt;</code> <b>bold</b>",
+        )
+
+    def test_quotes_in_attributes_are_escaped(self):
+        """Test that quotes can't break out of href, src and alt."""
+        self.assertEqual(
+            parse_inline_markdown('![a "b"](/x.png) [c](/y"z)'),
+            '<img src="/x.png" alt="a &quot;b&quot;"> <a href="/y&quot;z">c</a>',
+        )
+
+    def test_ampersands_in_attributes_are_escaped_once(self):
+        """Test that attribute values are escaped like every other attribute, not twice."""
+        self.assertEqual(
+            parse_inline_markdown('![R&D <1>](/a.png?x=1&y=2) [c](/b?p=1&amp;q=2)'),
+            '<img src="/a.png?x=1&amp;y=2" alt="R&amp;D &lt;1&gt;"> <a href="/b?p=1&amp;amp;q=2">c</a>',
+        )
+
+
+class TestHeadingAnchors(unittest.TestCase):
+
+    def test_slugify(self):
+        """Test that slugs are lowercase words joined by hyphens, without punctuation."""
+        self.assertEqual(slugify("Hello, World!"), "hello-world")
+        self.assertEqual(slugify("  Déjà   vu  "), "déjà-vu")
+        self.assertEqual(slugify("?!"), "section")
+
+    def test_ids_are_unique_per_page(self):
+        """Test that repeated headings get numbered ids that skip the ones already used."""
+        html = markdown_to_html_node("## Intro\n\n## Intro-1\n\n## Intro\n\n## Intro").to_html()
+        self.assertEqual(
+            html,
+            '<h2 id="intro">Intro</h2><h2 id="intro-1">Intro-1</h2><h2 id="intro-2">Intro</h2><h2 id="intro-3">Intro</h2>',
+        )
+
+    def test_cached_headings_keep_unique_ids(self):
+        """Test that a heading from the block cache is renumbered when its id is taken on the page."""
+        from src.block_cache import BlockCache
+        from src.render_context import RenderContext
+
+        cache = BlockCache()
+        markdown_to_html_node("## Setup", RenderContext(block_cache=cache))
+        context = RenderContext(block_cache=cache)
+        html = markdown_to_html_node("## Setup\n\ntext\n\n## Setup", context).to_html()
+
+        self.assertEqual(html, '<h2 id="setup">Setup</h2><p>text</p><h2 id="setup-1">Setup</h2>')
+        self.assertEqual([heading[1] for heading in context.headings], ["setup", "setup-1"])
+
+    def test_toc(self):
+        """Test that the table of contents nests like the heading levels, with plain text links."""
+        from src.render_context import RenderContext
+
+        context = RenderContext()
+        markdown_to_html_node("# Guide\n\n## *Install*\n\n#### Deep\n\n## Use\n\n# Other", context)
+        self.assertEqual(
+            toc_to_html_node(context.headings).to_html(),
+            '<nav class="toc"><ul><li><a href="#guide">Guide</a><ul>'
+            '<li><a href="#install">Install</a><ul><li><a href="#deep">Deep</a></li></ul></li>'
+            '<li><a href="#use">Use</a></li></ul></li>'
+            '<li><a href="#other">Other</a></li></ul></nav>',
+        )
+        self.assertIsNone(toc_to_html_node([]))
@@ -1,6 +1,12 @@
+import html
 import re
 from textnode import TextNode
-from htmlnode import LeafNode, ParentNode
+from htmlnode import LeafNode, ParentNode, escape_attribute, escape_text
+from highlight import highlight
+from block_parser import Block, iter_blocks, parse_blocks
+from block_cache import block_key
+from render_context import RenderContext
+from plugins import Registry
 
 text_type_text = "text"
 text_type_bold = "bold"
@@ -9,6 +15,13 @@ text_type_code = "code"
 text_type_link = "link"
 text_type_image = "image"
 
+# A footnote reference, [^label]. Labels can't hold "[", so no match scans past the next one.
+FOOTNOTE_REF = re.compile(r'\[\^([^\[\]\s]+)\]')
+
+# The tags of rendered inline HTML, whose text is already escaped
+TAGS = re.compile(r'<[^>]*>')
+SLUG_STRIP = re.compile(r'[^\w\s-]')
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     """
     Takes a list of old nodes, a delimiter, and a text type.
@@ -41,32 +54,61 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
     return new_nodes
 
+def find_markdown_links(text, opener="[", empty_label=False):
+    r"""
+    Finds the [label](url) links in a text, or the ![alt](url) images with
+    opener="![", and yields (start, end, label, url) for each of them.
+
+    The matches are the ones re.finditer would give for \[([^\]]+)\]\(([^)]+)\)
+    (with * instead of + for the label if empty_label), but the text is
+    scanned once. The regex tries every opener and scans ahead from each, which
+    is quadratic on text like "[[[[..." or "[a](" repeated.
+    """
+    position = 0
+    while True:
+        start = text.find(opener, position)
+        if start == -1:
+            return
+
+        label_start = start + len(opener)
+        close = text.find("]", label_start)
+        if close == -1:
+            return
+
+        if close == label_start and not empty_label:
+            position = start + 1
+            continue
+
+        # Labels can't contain "]", so every opener before close would end its
+        # label there as well: if this one isn't followed by a url, none is
+        if text.startswith("(", close + 1):
+            end = text.find(")", close + 2)
+            if end == -1:
+                # No later link can be closed either
+                return
+            if end > close + 2:
+                yield start, end + 1, text[label_start:close], text[close + 2:end]
+                position = end + 1
+                continue
+
+        position = close + 1
+
+
 def extract_markdown_images(text):
     """
     Extracts markdown image syntax from a string and returns a list of tuples.
     Each tuple contains the alt_text and the URL.
     """
-    # Regular expression to match ![alt_text](url)
-    pattern = r'!\[([^\]]+)\]\(([^)]+)\)'
-    
-    # Find all matches in the text
-    matches = re.findall(pattern, text)
-    
-    return matches
+    # Find all the ![alt_text](url) in the text
+    return [(alt_text, url) for _, _, alt_text, url in find_markdown_links(text, "![")]
 
 def extract_markdown_links(text):
     """
     Extracts markdown link syntax from a string and returns a list of tuples.
     Each tuple contains the link_text and the URL.
     """
-    # Regular expression to match [link_text](url)
-    pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-    
-    # Find all matches in the text
-    matches = re.findall(pattern, text)
-    
-    return matches
-
+    # Find all the [link_text](url) in the text
+    return [(link_text, url) for _, _, link_text, url in find_markdown_links(text)]
 
 
 def split_nodes_link(old_nodes):
@@ -75,21 +117,15 @@ def split_nodes_link(old_nodes):
     Example: [text](url)
     """
     new_nodes = []
-    
-    # Regex pattern for Markdown links [text](url)
-    link_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
 
     for node in old_nodes:
         if node.text_type != "text":
             new_nodes.append(node)
             continue
 
-        # Find all matches for the link pattern
+        # Find all the links in the text
         start = 0
-        for match in re.finditer(link_pattern, node.text):
-            link_text, link_url = match.groups()
-            link_start, link_end = match.span()
-
+        for link_start, link_end, link_text, link_url in find_markdown_links(node.text):
             # Add the text before the link (if any)
             if start < link_start:
                 new_nodes.append(TextNode(node.text[start:link_start], text_type_text))
@@ -111,21 +147,15 @@ def split_nodes_image(old_nodes):
     Example: ![alt_text](url)
     """
     new_nodes = []
-    
-    # Regex pattern for Markdown images ![alt_text](url)
-    image_pattern = r'!\[([^\]]+)\]\(([^)]+)\)'
 
     for node in old_nodes:
         if node.text_type != "text":
             new_nodes.append(node)
             continue
 
-        # Find all matches for the image pattern
+        # Find all the images in the text
         start = 0
-        for match in re.finditer(image_pattern, node.text):
-            alt_text, image_url = match.groups()
-            image_start, image_end = match.span()
-
+        for image_start, image_end, alt_text, image_url in find_markdown_links(node.text, "!["):
             # Add the text before the image (if any)
             if start < image_start:
                 new_nodes.append(TextNode(node.text[start:image_start], text_type_text))
@@ -171,8 +201,27 @@ def markdown_to_blocks(markdown):
     Each block can be a heading, a paragraph, or a list block.
     Leading/trailing whitespace is removed, and empty blocks are filtered out.
     """
-    # Step 1: Split the Markdown into blocks based on two or more newlines
-    blocks = re.split(r'\n\s*\n', markdown.strip())
+    return [block for _, block in markdown_to_blocks_with_lines(markdown)]
+
+
+
+def markdown_to_blocks_with_lines(markdown):
+    """
+    Same as markdown_to_blocks, but returns (line, block) tuples where line is
+    the 1-based line number the block starts on in the markdown source.
+    """
+    # Step 1: Split the Markdown into blocks based on two or more newlines,
+    # keeping track of the line each block starts on
+    stripped = markdown.strip()
+    line = markdown[:len(markdown) - len(markdown.lstrip())].count("\n") + 1
+
+    raw_blocks = []
+    start = 0
+    for separator in re.finditer(r'\n\s*\n', stripped):
+        raw_blocks.append((line, stripped[start:separator.start()]))
+        line += stripped.count("\n", start, separator.end())
+        start = separator.end()
+    raw_blocks.append((line, stripped[start:]))
 
 
     # Step 2: Normalize each block by removing excessive spaces, but preserving newlines inside lists
@@ -182,11 +231,11 @@ def markdown_to_blocks(markdown):
         return "\n".join(normalized_lines)
     
     # Step 3: Normalize each block and ensure separation
-    blocks = [normalize_block(block) for block in blocks]
+    blocks = [(line, normalize_block(block)) for line, block in raw_blocks]
 
 
     # Step 4: Filter out empty blocks (in case of excessive newlines)
-    blocks = [block for block in blocks if block]
+    blocks = [(line, block) for line, block in blocks if block]
 
     
     return blocks
@@ -232,83 +281,592 @@ def block_to_block_type(block):
 
 
 
-def markdown_to_html_node(markdown):
+def markdown_to_html_node(markdown, context=None):
     """
     Converts a full markdown document into a single HTMLNode containing many child HTMLNodes.
+
+    If a RenderContext is given, the link and image targets found while parsing
+    are recorded on it together with their line numbers.
     """
-    # Create a root ParentNode that will hold all child nodes (no tag needed)
-    root = ParentNode(children=[], is_root=True)
+    # Step 1: Parse the Markdown into a tree of blocks, which plugins can rework
+    document = parse_blocks(markdown)
+    for transform in _registry(context).block_transforms:
+        transform(document, context)
+    context = _page_context(document, context)
+
+    # Step 2: Convert every top-level block and add it to a root ParentNode (no tag needed)
+    if _use_block_cache(document, context):
+        children = [cached_block_to_html(block, context) for block in document.children]
+    else:
+        children = [block_to_html_node(block, context) for block in document.children]
+
+    # Step 3: List the footnotes referenced on the page at its end
+    if document.footnotes:
+        footnotes = footnotes_to_html_node(context)
+        if footnotes is not None:
+            children.append(footnotes)
+
+    # An empty document renders to an empty string
+    return ParentNode(children=children or [""], is_root=True)
+
+
+
+def iter_markdown_html(markdown, context=None):
+    """
+    Converts a markdown document to HTML one top-level block at a time, so the
+    HTML of a very large document never has to be held all at once.
+
+    The document is parsed as its blocks are converted, so it can also be an
+    iterable of lines without their line endings, read from a file as they are
+    needed, provided it has no footnotes. A document with footnotes, whose
+    references can come before their definitions, or whose parse tree the
+    plugins transform, is parsed whole first.
+
+    Yields:
+        str: The HTML of each top-level block, in order.
+    """
+    context = context if context is not None else RenderContext()
+    document = Block('document', 1, footnotes={})
+    blocks = iter_blocks(markdown.splitlines() if isinstance(markdown, str) else markdown, document)
+
+    transforms = _registry(context).block_transforms
+    if transforms or (isinstance(markdown, str) and "[^" in markdown):
+        document.children = list(blocks)
+        for transform in transforms:
+            transform(document, context)
+        context.footnotes = document.footnotes
+        blocks = _drop_converted(document)
+    use_block_cache = _use_block_cache(document, context)
 
-    # Step 1: Split the Markdown into blocks
-    blocks = markdown_to_blocks(markdown)
-    
-    # Step 2: Iterate through each block, determine its type, and convert to HTMLNode
     for block in blocks:
-        block_type = block_to_block_type(block)
-
-        # Step 3: Convert each block based on its type
-        if block_type == 'heading':
-            heading_level = len(block.split()[0])  # Number of # symbols
-            heading_text = block[heading_level + 1:].strip()  # The actual heading text
-            heading_text = parse_inline_markdown(heading_text)  # Handle inline elements
-            node = LeafNode(value=heading_text, tag=f"h{heading_level}")
-        
-        elif block_type == 'paragraph':
-            block = parse_inline_markdown(block)  # Handle inline elements for paragraphs
-            node = LeafNode(value=block, tag="p")
-        
-        elif block_type == 'code block':
-            code_content = block.strip("```").strip()  # Remove the backticks
-            node = LeafNode(value=code_content, tag="pre")  # Use <pre> for code blocks
-        
-        elif block_type == 'quote block':
-            quote_content = "\n".join(line[2:] for line in block.splitlines())  # Remove the '> ' from each line
-            node = LeafNode(value=quote_content, tag="blockquote")
-        
-        elif block_type == 'unordered list':
-            list_items = [LeafNode(value=parse_inline_markdown(item[2:]), tag="li") for item in block.splitlines()]
-            node = ParentNode(children=list_items, tag="ul")  # Use <ul> for unordered lists
-        
-        elif block_type == 'ordered list':
-            list_items = [LeafNode(value=parse_inline_markdown(item.split(". ", 1)[1]), tag="li") for item in block.splitlines()]
-            node = ParentNode(children=list_items, tag="ol")  # Use <ol> for ordered lists
-        
+        context.count_blocks((block,))
+        if use_block_cache:
+            yield cached_block_to_html(block, context)
         else:
-            # Fallback to a paragraph if the block type is unknown
-            block = parse_inline_markdown(block)  # Handle inline elements
-            node = LeafNode(value=block, tag="p")
-        
-        # Step 4: Add the node to the root ParentNode
-        root.children.append(node)
-    
-    return root
+            node = block_to_html_node(block, context)
+            yield node if isinstance(node, str) else node.to_html()
+
+    if context.footnotes:
+        footnotes = footnotes_to_html_node(context)
+        if footnotes is not None:
+            yield footnotes.to_html()
+
+
+
+def _drop_converted(document):
+    # Takes the top-level blocks out of the document, dropping each once it has been converted
+    blocks = document.children
+    document.children = []
+    blocks.reverse()
+    while blocks:
+        yield blocks.pop()
+
+
+
+def _page_context(document, context):
+    # Heading ids and footnote numbers are unique per page, which takes a context to keep track of
+    context = context if context is not None else RenderContext()
+    if document.footnotes:
+        context.footnotes = document.footnotes
+    context.count_blocks(document.children)
+    return context
+
+
+
+def _use_block_cache(document, context):
+    # The numbers of footnote references depend on the rest of the page, so a
+    # page with footnotes doesn't share its blocks with other pages
+    return context is not None and context.block_cache is not None and not document.footnotes
+
 
-def parse_inline_markdown(text):
+
+def cached_block_to_html(block, context):
+    """
+    Renders a top-level block to an HTML string through context.block_cache, so a
+    block repeated across pages (a disclaimer, a shared list of links) is only
+    converted once. The links recorded for it are moved to the block's line.
+    """
+    # An include renders another file, which the block's text says nothing about
+    if block.kind == 'include':
+        return block_to_html_node(block, context)
+
+    key = block_key(block)
+    entry = context.block_cache.get(key)
+
+    if entry is None:
+        context.block_misses += 1
+
+        # Render with a context of its own to collect just this block's links
+        block_context = RenderContext(context.source_path, context.highlighter, registry=context.registry, routes=context.routes)
+        node = block_to_html_node(block, block_context)
+        html_fragment = node if isinstance(node, str) else node.to_html()
+        links = [(line - block.line, url, kind) for line, url, kind in block_context.links]
+        headings = block_context.headings
+        inline_matches = block_context.inline_matches
+        context.block_cache.put(key, html_fragment, links, headings, inline_matches)
+    else:
+        context.block_hits += 1
+        html_fragment, links, headings, inline_matches = entry
+
+    # Heading ids are made unique within the block. If the page already has
+    # one of them, or a heading with the same slug, the block's ids would
+    # collide, so it is rendered again for this page instead.
+    if any(slug in context.heading_ids or heading_id in context.heading_ids for _, heading_id, _, slug in headings):
+        node = block_to_html_node(block, context)
+        return node if isinstance(node, str) else node.to_html()
+
+    for offset, url, kind in links:
+        context.add_link(url, block.line + offset, kind)
+    for level, heading_id, text, slug in headings:
+        context.add_heading(level, slug, text)
+    for name, count in inline_matches.items():
+        context.add_inline_matches(name, count)
+    return html_fragment
+
+
+
+def _registry(context):
+    return context.registry if context is not None and context.registry is not None else CORE_REGISTRY
+
+
+
+def block_to_html_node(block, context=None, tight=False):
+    """
+    Converts a Block from parse_blocks, and the blocks nested in it, into an
+    HTMLNode, with the renderer registered for the block's kind.
+
+    Paragraphs of tight list items (tight=True) are returned as plain HTML
+    strings, so they aren't wrapped in <p>.
+    """
+    render = _registry(context).block_renderers.get(block.kind)
+    if render is None:
+        raise ValueError(f"Unknown block kind: {block.kind}")
+    return render(block, context, tight)
+
+
+
+def render_heading(block, context=None, tight=False):
+    heading_text = parse_inline_markdown(block.lines[0].strip(), context, block.line)  # Handle inline elements
+
+    # Give the heading an id to link to, unique on the page, and record it for the table of contents
+    text = TAGS.sub("", heading_text)
+    slug = slugify(html.unescape(text))
+    props = {"id": context.add_heading(block.level, slug, text) if context is not None else slug}
+
+    # An empty heading (a line of just "#") has no text for a LeafNode
+    if not heading_text:
+        return ParentNode(children=[""], tag=f"h{block.level}", props=props)
+    return LeafNode(value=heading_text, tag=f"h{block.level}", props=props)
+
+
+def slugify(text):
     """
-    Parse inline markdown elements like bold, italic, code, and links and convert them to HTML.
+    Returns the id of a heading with this text: its lowercase words, without
+    punctuation, joined by hyphens.
     """
+    slug = "-".join(SLUG_STRIP.sub("", text.lower()).split())
+    return slug or "section"
+
+
+def toc_to_html_node(headings):
+    """
+    Builds the table of contents of a page from the (level, id, text, slug) of its
+    headings, a <nav class="toc"> with lists nested like the heading levels,
+    or returns None if the page has no headings.
+    """
+    if not headings:
+        return None
+
+    # Each item is its link and the items nested under it. The stack holds the
+    # (level, items) of the open lists, a heading closes the ones at its level or deeper.
+    root = []
+    stack = [(0, root)]
+    for level, heading_id, text, _ in headings:
+        while stack[-1][0] >= level:
+            stack.pop()
+        item = (f'<a href="#{escape_attribute(heading_id)}">{text}</a>', [])
+        stack[-1][1].append(item)
+        stack.append((level, item[1]))
+
+    def to_list(items):
+        return ParentNode(children=[ParentNode(children=[link, to_list(nested)] if nested else [link], tag="li")
+                                    for link, nested in items], tag="ul")
+
+    return ParentNode(children=[to_list(root)], tag="nav", props={"class": "toc"})
+
+
+def render_paragraph(block, context=None, tight=False):
+    paragraph = "\n".join(re.sub(r'[ \t]+', ' ', line.strip()) for line in block.lines)
+    paragraph = parse_inline_markdown(paragraph, context, block.line)  # Handle inline elements for paragraphs
+    return paragraph if tight else LeafNode(value=paragraph, tag="p")
+
+
+def render_code_block(block, context=None, tight=False):
+    return code_to_html_node("\n".join(block.lines), block.language, context)
+
+
+def render_quote(block, context=None, tight=False):
+    children = [block_to_html_node(child, context) for child in block.children]
+
+    # A quote holding a single paragraph keeps its text directly inside <blockquote>
+    if len(block.children) == 1 and block.children[0].kind == 'paragraph':
+        return LeafNode(value=children[0].value, tag="blockquote")
+    return ParentNode(children=children or [""], tag="blockquote")
+
+
+def render_list(block, context=None, tight=False):
+    list_items = [block_to_html_node(item, context, tight=not block.loose) for item in block.children]
+    if block.kind == 'unordered list':
+        return ParentNode(children=list_items, tag="ul")  # Use <ul> for unordered lists
+
+    props = {"start": block.start} if block.start != 1 else None
+    return ParentNode(children=list_items, tag="ol", props=props)  # Use <ol> for ordered lists
+
+
+def render_list_item(block, context=None, tight=False):
+    children = [block_to_html_node(child, context, tight) for child in block.children]
+
+    if len(children) == 1 and isinstance(children[0], str) and children[0]:
+        return LeafNode(value=children[0], tag="li")
+    return ParentNode(children=children or [""], tag="li")
+
+
+def render_table(block, context=None, tight=False):
+    # The alignment of each column is turned into attributes once, for all its cells
+    column_props = [{"align": alignment} if alignment else None for alignment in block.alignments]
+
+    header = ParentNode(children=[_table_cell(cell, "th", props, context, block.line)
+                                  for cell, props in zip(block.header, column_props)], tag="tr")
+    children = [ParentNode(children=[header], tag="thead")]
+
+    # Rows follow the header and the delimiter row, one per line
+    rows = [ParentNode(children=[_table_cell(cell, "td", props, context, line)
+                                 for cell, props in zip(row, column_props)], tag="tr")
+            for line, row in enumerate(block.rows, block.line + 2)]
+    if rows:
+        children.append(ParentNode(children=rows, tag="tbody"))
 
-    # Handle bold (**bold** -> <strong>bold</strong>)
-    text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
+    return ParentNode(children=children, tag="table")
 
-    # Handle italic (*italic* -> <em>italic</em>)
-    text = re.sub(r'\*(.*?)\*', r'<i>\1</i>', text)
 
-    # Handle inline code (`code` -> <code>code</code>)
-    text = re.sub(r'`(.*?)`', r'<code>\1</code>', text)
+def _table_cell(text, tag, props, context, line):
+    cell_html = parse_inline_markdown(text, context, line)
+    if not cell_html:
+        return ParentNode(children=[""], tag=tag, props=props)  # An empty cell
+    return LeafNode(value=cell_html, tag=tag, props=props)
 
-    # Handle links ([text](url) -> <a href="url">text</a>)
-    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2">\1</a>', text)
 
+def render_footnote(block, context=None, tight=False):
+    # Footnote definitions are listed at the end of the page, by footnotes_to_html_node
+    return ""
+
+
+def footnotes_to_html_node(context):
+    """
+    Renders the footnotes referenced on a page, numbered in the order they were
+    first referenced in, into a <section class="footnotes">, or returns None if
+    none was. Footnotes referenced by other footnotes are added as they are found.
+    """
+    items = []
+    while len(items) < len(context.footnote_numbers):
+        for label in list(context.footnote_numbers)[len(items):]:
+            number = context.footnote_numbers[label]
+            children = [block_to_html_node(child, context) for child in context.footnotes[label].children]
+
+            # The link back to the reference goes at the end of the last paragraph
+            backref = f'<a href="#fnref-{number}" class="footnote-backref">&#8617;</a>'
+            last = children[-1] if children else None
+            if getattr(last, "tag", None) == "p" and getattr(last, "value", None):
+                children[-1] = LeafNode(value=f"{last.value} {backref}", tag="p")
+            else:
+                children.append(backref)
+
+            items.append(ParentNode(children=children, tag="li", props={"id": f"fn-{number}"}))
+
+    if not items:
+        return None
+    return ParentNode(children=[ParentNode(children=items, tag="ol")], tag="section", props={"class": "footnotes"})
+
+
+def render_include(block, context=None, tight=False):
+    # Without partials to render it from, the directive stays as written
+    if context is None or context.partials is None:
+        return LeafNode(value=escape_text(f"{{{{> {block.path} }}}}"), tag="p")
+
+    partial_html, includes, links = context.partials.render(block.path, context)
+    context.add_includes(includes)
+    for line, url, kind in links:
+        context.add_link(url, block.line, kind)
+    return partial_html
+
+
+
+def code_to_html_node(code, language="", context=None):
+    """
+    Converts the contents of a fenced code block into a <pre> node with the code escaped.
+
+    A language tag after the opening fence (```python) adds a
+    <code class="language-python"> with the code syntax highlighted,
+    through the context's Highlighter if there is one.
+    """
+    language = re.sub(r'[^\w+#-]', '', language or "")
+
+    # Drop blank lines around the code, but keep the indentation of the first line
+    code_content = code.strip("\n").rstrip()
+
+    if not language:
+        if not code_content:
+            return ParentNode(children=[""], tag="pre")  # An empty code block
+        return LeafNode(value=escape_text(code_content), tag="pre")  # Use <pre> for code blocks
+
+    if context is not None and context.highlighter is not None:
+        highlighted = context.highlighter.highlight(code_content, language)
+    else:
+        highlighted = highlight(code_content, language)
+
+    return LeafNode(value=f'<code class="language-{language}">{highlighted}</code>', tag="pre")
+
+
+
+def parse_inline_markdown(text, context=None, line=1):
+    """
+    Parse inline markdown elements like bold, italic, code, images and links and convert them to HTML.
+
+    The text is HTML-escaped, then goes through the registered inline rules
+    whose trigger it contains. Image and link targets are recorded on the
+    RenderContext, if one is given, with the line they appear on (text is
+    assumed to start on the given line).
+    """
+    # Escape the text first, none of the markdown syntax below uses &, < or >
+    text = escape_text(text)
+
+    for name, trigger, rule in _registry(context).inline_rules:
+        if trigger is None or trigger in text:
+            text = rule(text, context, line)
+
+    return text
+
+
+def _count_matches(context, name, count):
+    # Recorded for the per-page cost report
+    if context is not None:
+        context.add_inline_matches(name, count)
+
+
+def _bold(text, context, line):
+    # **bold** -> <b>bold</b>
+    text, count = re.subn(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
+    _count_matches(context, "bold", count)
+    return text
+
+
+def _italic(text, context, line):
+    # *italic* -> <i>italic</i>
+    text, count = re.subn(r'\*(.*?)\*', r'<i>\1</i>', text)
+    _count_matches(context, "italic", count)
     return text
 
 
+def _inline_code(text, context, line):
+    # `code` -> <code>code</code>
+    text, count = re.subn(r'`(.*?)`', r'<code>\1</code>', text)
+    _count_matches(context, "code", count)
+    return text
+
+
+def _footnote_refs(text, context, line):
+    # [^label] -> a numbered link to the footnote, if the page defines one with that label
+    if context is None or not context.footnotes:
+        return text
+
+    def replace(match):
+        label = html.unescape(match.group(1)).lower()
+        if label not in context.footnotes:
+            return match.group(0)
+
+        first = label not in context.footnote_numbers
+        number = context.footnote_number(label)
+        context.add_inline_matches("footnote", 1)
+        anchor = f' id="fnref-{number}"' if first else ""
+        return f'<sup class="footnote-ref"><a href="#fn-{number}"{anchor}>{number}</a></sup>'
+
+    return FOOTNOTE_REF.sub(replace, text)
+
+
+def _replace_links(text, context, line, opener, replace):
+    """
+    Replaces the links (or images) in text with replace(label, url), recording
+    their targets. The line counter only moves forward, so this stays linear in the text.
+    """
+    parts = []
+    end = 0
+    position, line_number = 0, line
+    kind = "image" if opener == "![" else "link"
+
+    for start, next_end, label, url in find_markdown_links(text, opener, empty_label=opener == "!["):
+        if context is not None:
+            line_number += text.count("\n", position, start)
+            position = start
+            context.add_link(html.unescape(url), line_number, kind)
+            context.add_inline_matches(kind, 1)
+
+        parts.append(text[end:start])
+        parts.append(replace(label, url))
+        end = next_end
+
+    parts.append(text[end:])
+    return "".join(parts)
+
+
+def _attribute(value):
+    # The text was escaped for use between tags, attributes need their own escaping
+    return escape_attribute(html.unescape(value))
+
+
+def _url_attribute(url, context):
+    # The link as it is served, e.g. under the site's base URL
+    url = html.unescape(url)
+    return escape_attribute(context.resolve_url(url) if context is not None else url)
+
+
+def _images(text, context, line):
+    # ![alt](url) -> <img src="url" alt="alt">
+    return _replace_links(text, context, line, "![",
+                          lambda alt_text, url: f'<img src="{_url_attribute(url, context)}" alt="{_attribute(alt_text)}">')
+
+
+def _links(text, context, line):
+    # [text](url) -> <a href="url">text</a>
+    return _replace_links(text, context, line, "[",
+                          lambda link_text, url: f'<a href="{_url_attribute(url, context)}">{link_text}</a>')
+
+
+# The built-in renderers and inline rules, which plugins add to or replace
+CORE_REGISTRY = Registry()
+CORE_REGISTRY.add_block_renderer('heading', render_heading)
+CORE_REGISTRY.add_block_renderer('paragraph', render_paragraph)
+CORE_REGISTRY.add_block_renderer('code block', render_code_block)
+CORE_REGISTRY.add_block_renderer('quote block', render_quote)
+CORE_REGISTRY.add_block_renderer('unordered list', render_list)
+CORE_REGISTRY.add_block_renderer('ordered list', render_list)
+CORE_REGISTRY.add_block_renderer('list item', render_list_item)
+CORE_REGISTRY.add_block_renderer('table', render_table)
+CORE_REGISTRY.add_block_renderer('footnote', render_footnote)
+CORE_REGISTRY.add_block_renderer('include', render_include)
+CORE_REGISTRY.add_inline_rule('bold', _bold, trigger="**")
+CORE_REGISTRY.add_inline_rule('italic', _italic, trigger="*")
+CORE_REGISTRY.add_inline_rule('code', _inline_code, trigger="`")
+CORE_REGISTRY.add_inline_rule('footnote', _footnote_refs, trigger="[^")
+CORE_REGISTRY.add_inline_rule('image', _images, trigger="![")
+CORE_REGISTRY.add_inline_rule('link', _links, trigger="](")
+
+_registries = {}
+
+
+def get_registry(plugins=()):
+    """
+    Returns the Registry of this process with a list of plugins loaded on
+    top of the built-in renderers, so every page a worker process renders shares it.
+    """
+    plugins = tuple(plugins)
+    if not plugins:
+        return CORE_REGISTRY
+
+    if plugins not in _registries:
+        registry = CORE_REGISTRY.copy()
+        for plugin in plugins:
+            registry.load(plugin)
+        _registries[plugins] = registry
+    return _registries[plugins]
+
+
+
+FRONT_MATTER = re.compile(r'---[ \t]*\n(.*?\n)?---[ \t]*(?:\n|$)', re.DOTALL)
+
+
+def split_front_matter(markdown):
+    """
+    Separates the front matter, "key: value" lines between two "---" lines at
+    the very start of a page, from the markdown.
+
+    The front matter is replaced with blank lines, so the lines of the rest of
+    the markdown keep their numbers.
+
+    Returns:
+        tuple: The front matter as a dict, and the markdown.
+    """
+    match = FRONT_MATTER.match(markdown)
+    if match is None:
+        return {}, markdown
+
+    metadata = _front_matter_values((match.group(1) or "").splitlines())
+    return metadata, "\n" * match.group().count("\n") + markdown[match.end():]
+
+
+
+def _front_matter_values(lines):
+    metadata = {}
+    for line in lines:
+        key, separator, value = line.partition(":")
+        if separator and key.strip() and not line.startswith("#"):
+            metadata[key.strip().lower()] = value.strip().strip('"\'')
+    return metadata
+
+
+
+FRONT_MATTER_FENCE = re.compile(r'---[ \t]*')
+
+
+def scan_markdown_file(path):
+    """
+    Reads a markdown file a line at a time, without holding it in memory, for
+    its front matter (see split_front_matter) and whether it has footnotes.
+
+    Returns:
+        tuple: The front matter as a dict, the number of lines it takes up,
+        and whether the file has footnotes.
+    """
+    metadata, front_matter_lines, footnotes = {}, 0, False
+    front_matter = None
+    with open(path, 'r') as md_file:
+        for number, line in enumerate(md_file, 1):
+            footnotes = footnotes or "[^" in line
+            text = line.rstrip("\n")
+            if number == 1:
+                if FRONT_MATTER_FENCE.fullmatch(text) and line.endswith("\n"):
+                    front_matter = []
+            elif front_matter is not None:
+                if FRONT_MATTER_FENCE.fullmatch(text):
+                    metadata, front_matter_lines = _front_matter_values(front_matter), number
+                    front_matter = None
+                else:
+                    front_matter.append(text)
+
+    return metadata, front_matter_lines, footnotes
+
+
+
+def read_markdown_lines(path, front_matter_lines=0):
+    """
+    Yields the lines of a markdown file without their line endings, reading
+    them as they are needed, with its front matter blanked out like
+    split_front_matter does.
+    """
+    with open(path, 'r') as md_file:
+        for number, line in enumerate(md_file, 1):
+            if number <= front_matter_lines:
+                yield ""
+            else:
+                yield from line.splitlines()
+
+
+
 def extract_title(markdown):
     """
     Extracts the H1 header from the markdown text.
     
     Args:
-        markdown (str): The markdown content as a string.
+        markdown (str): The markdown content as a string, or an iterable of its lines.
     
     Returns:
         str: The extracted H1 header text.
@@ -316,7 +874,7 @@ def extract_title(markdown):
     Raises:
         Exception: If no H1 header is found in the markdown.
     """
-    lines = markdown.splitlines()
+    lines = markdown.splitlines() if isinstance(markdown, str) else markdown
     
     for line in lines:
         line = line.strip()
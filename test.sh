@@ -1 +1,8 @@
-python3 -m unittest discover -s src/tests
+# ./test.sh runs the unit tests, ./test.sh perf the performance tier (see src/tests/perf)
+export PYTHONPATH=src
+
+if [ "$1" = "perf" ]; then
+    SSG_PERF=1 python3 -m unittest discover -s src/tests/perf
+else
+    python3 -m unittest discover -s src/tests
+fi